@@ -0,0 +1,57 @@
+"""Measure the startup time of the `plastron` command line tool.
+
+Each case runs in a fresh Python process, so that the module import cost is
+included, and is repeated to report the median and best times. The "eager"
+case builds the parser the old way, importing every command module, for
+comparison with the "lazy" parser that `plastron.cli.main()` uses.
+
+    python plastron-cli/benchmarks/startup.py [--repeat N]
+"""
+import statistics
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+
+CASES = {
+    'import plastron.cli': 'import plastron.cli',
+    'lazy parser, --help': (
+        'import sys; sys.argv = ["plastron", "--help"]\n'
+        'from plastron.cli import main\n'
+        'try:\n    main()\nexcept SystemExit:\n    pass'
+    ),
+    'lazy parser, echo --help': (
+        'import sys; sys.argv = ["plastron", "echo", "--help"]\n'
+        'from plastron.cli import main\n'
+        'try:\n    main()\nexcept SystemExit:\n    pass'
+    ),
+    'eager parser (all commands)': (
+        'from argparse import ArgumentParser\n'
+        'from plastron.cli import load_commands\n'
+        'load_commands(ArgumentParser().add_subparsers())'
+    ),
+}
+
+
+def run(code: str, repeat: int) -> list[float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = ArgumentParser(description='Measure plastron CLI startup time')
+    parser.add_argument('-n', '--repeat', type=int, default=5, help='number of runs per case; defaults to 5')
+    args = parser.parse_args()
+
+    print(f'{"case":<32} {"median":>8} {"best":>8}')
+    for name, code in CASES.items():
+        times = run(code, args.repeat)
+        print(f'{name:<32} {statistics.median(times):>7.3f}s {min(times):>7.3f}s')
+
+
+if __name__ == '__main__':
+    main()
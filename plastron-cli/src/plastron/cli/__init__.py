@@ -5,11 +5,12 @@ import logging
 import logging.config
 import os
 import sys
-from argparse import ArgumentParser, FileType
+from argparse import ArgumentParser, FileType, _SubParsersAction
 from argparse import Namespace
 from datetime import datetime
 from importlib import import_module
 from pkgutil import iter_modules
+from types import ModuleType
 from typing import Iterable
 
 import yaml
@@ -17,33 +18,118 @@ from rdflib import URIRef, Literal
 from rdflib.util import from_n3
 
 from plastron.cli import commands
-from plastron.context import PlastronContext
 from plastron.utils import DEFAULT_LOGGING_OPTIONS, envsubst, check_python_version, uri_or_curie
 
 logger = logging.getLogger(__name__)
 now = datetime.utcnow().strftime('%Y%m%d%H%M%S')
 version = importlib.metadata.version('plastron-cli')
 
+COMMANDS_GROUP = 'plastron.commands'
+
+
+def get_command_module_names() -> dict[str, str]:
+    """Map each command name to the name of the module that implements it,
+    without importing any of the modules.
+
+    Commands are registered as entry points in the `plastron.commands` group,
+    where the value of each entry point is a module with `configure_cli()`
+    and `Command`. If there are none (e.g., when running from a source tree
+    whose installed metadata is out of date), the modules of the
+    `plastron.cli.commands` package are listed instead."""
+    names = {ep.name: ep.value for ep in importlib.metadata.entry_points(group=COMMANDS_GROUP)}
+    if names:
+        return names
+    for _, module_name, _ in iter_modules(commands.__path__):
+        # Special case handling for "importcommand", because "import" is
+        # a Python reserved word that is not usable as a module name,
+        # while we want "import" to be the Plastron command
+        name = 'import' if module_name == 'importcommand' else module_name
+        names[name] = commands.__name__ + '.' + module_name
+    return names
+
 
 def load_commands(subparsers):
-    # load all defined subcommands from the plastron.commands package, using
-    # introspection
+    """Import every command module, and add its subparser. Use
+    `LazySubParsersAction` instead to only import the command that runs."""
+    names_by_module = {}
+    for name, module_name in get_command_module_names().items():
+        names_by_module.setdefault(module_name, []).append(name)
+
     command_modules = {}
-    for finder, name, ispkg in iter_modules(commands.__path__):
-        module_name = name
-        if module_name == "importcommand":
-            # Special case handling for "importcommand", because "import" is
-            # a Python reserved word that is not usable as a module name,
-            # while we want "import" to be the Plastron command
-            name = "import"
-
-        module = import_module(commands.__name__ + '.' + module_name)
+    for module_name, names in names_by_module.items():
+        # the other names for a module are aliases
+        basename = module_name.rsplit('.', 1)[-1].replace('importcommand', 'import')
+        name = basename if basename in names else names[0]
+        module = import_module(module_name)
         if hasattr(module, 'configure_cli'):
             module.configure_cli(subparsers)
             command_modules[name] = module
     return command_modules
 
 
+class LazySubParsersAction(_SubParsersAction):
+    """Subparsers action that registers each command by name only, and imports
+    the command's module (and adds its real arguments) when the command is
+    selected on the command line. Showing the top-level help, or running one
+    command, does not import the others or their dependencies.
+
+    Aliases (e.g., `ls` for `list`) should be registered as entry points of
+    their own; a name that is not registered causes all the command modules
+    to be loaded, as a last resort.
+
+    ```pycon
+    >>> subparsers = parser.add_subparsers(title='commands', action=LazySubParsersAction)
+    >>> args = parser.parse_args(['-c', 'config.yml', 'echo', '-b', 'foo'])
+    ```
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.module_names = get_command_module_names()
+        self.loaded: dict[str, ModuleType] = {}
+        self.placeholders = set()
+        for name in self.module_names:
+            # placeholder, replaced when the command's module is loaded
+            super().add_parser(name)
+            self.placeholders.add(name)
+
+    @property
+    def modules(self) -> dict[str, ModuleType]:
+        """The command modules that have been loaded so far, by command name."""
+        return {
+            name: self.loaded[module_name]
+            for name, module_name in self.module_names.items()
+            if module_name in self.loaded
+        }
+
+    def add_parser(self, name, **kwargs):
+        # replace the placeholders, so each command is only listed once
+        for key in (name, *kwargs.get('aliases', ())):
+            if key in self.placeholders:
+                del self._name_parser_map[key]
+                self.placeholders.remove(key)
+        return super().add_parser(name, **kwargs)
+
+    def load(self, name: str) -> ModuleType:
+        module_name = self.module_names[name]
+        if module_name not in self.loaded:
+            module = import_module(module_name)
+            module.configure_cli(self)
+            self.loaded[module_name] = module
+        return self.loaded[module_name]
+
+    def load_all(self):
+        for name in self.module_names:
+            self.load(name)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        if values:
+            if values[0] in self.module_names:
+                self.load(values[0])
+            elif values[0] not in self._name_parser_map:
+                self.load_all()
+        super().__call__(parser, namespace, values, option_string)
+
+
 def get_uris(args: Namespace) -> Iterable[str]:
     if hasattr(args, 'uris_file') or hasattr(args, 'uris'):
         if hasattr(args, 'uris_file') and args.uris_file is not None:
@@ -104,9 +190,7 @@ def main():
         default=False
     )
 
-    subparsers = parser.add_subparsers(title='commands')
-
-    command_modules = load_commands(subparsers)
+    subparsers = parser.add_subparsers(title='commands', action=LazySubParsersAction)
 
     # parse command line args
     args = parser.parse_args()
@@ -116,6 +200,9 @@ def main():
         parser.print_help()
         sys.exit(0)
 
+    # imported here, since it pulls in all the repository, broker, and Solr clients
+    from plastron.context import PlastronContext
+
     # new-style, combined config file (a la plastron.daemon)
     config = envsubst(yaml.safe_load(args.config_file))
     plastron_context = PlastronContext(config=config, args=args)
@@ -149,7 +236,7 @@ def main():
     check_python_version()
 
     # get the selected subcommand
-    command_module = command_modules[args.cmd_name]
+    command_module = subparsers.load(args.cmd_name)
 
     # dispatch to the selected subcommand
     try:
@@ -1,11 +1,14 @@
 from importlib import import_module
-from typing import Generator, Any
+from typing import TYPE_CHECKING, Any, Generator
 
-from plastron.context import PlastronContext
+if TYPE_CHECKING:
+    # only needed for type hints; importing the context (and the clients it
+    # creates) is deferred until a command actually runs
+    from plastron.context import PlastronContext
 
 
 class BaseCommand:
-    def __init__(self, context: PlastronContext = None):
+    def __init__(self, context: 'PlastronContext' = None):
         self.context = context
         self.result = None
 
@@ -5,11 +5,10 @@ from datetime import datetime
 from plastron.cli import get_uris
 from plastron.repo.utils import context
 from plastron.cli.commands import BaseCommand
-from plastron.client import ClientError
 from plastron.models.pcdm import PCDMObject
-from plastron.repo import RepositoryError
+from plastron.repo.delete import DeleteEngine
 from plastron.utils import parse_predicate_list
-from plastron.jobs import ItemLog
+from plastron.jobs import SQLiteItemLog
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +40,25 @@ def configure_cli(subparsers):
         help='file recording the URIs of deleted resources',
         action='store'
     )
+    parser.add_argument(
+        '--purge-tombstones',
+        help='also remove the tombstone left behind by each deleted resource',
+        action='store_true'
+    )
+    parser.add_argument(
+        '-w', '--workers',
+        help='number of concurrent requests to use when reading and deleting; defaults to 8',
+        type=int,
+        action='store',
+        default=8
+    )
+    parser.add_argument(
+        '--batch-size',
+        help='number of resources to delete in each batch; defaults to 100',
+        type=int,
+        action='store',
+        default=100
+    )
     parser.add_argument(
         '-f', '--file',
         dest='uris_file',
@@ -59,7 +77,7 @@ class Command(BaseCommand):
     def __call__(self, args: Namespace):
         self.context.client.test_connection()
         if args.completed:
-            completed_log = ItemLog(args.completed, ['uri', 'title', 'timestamp'], 'uri')
+            completed_log = SQLiteItemLog(args.completed, ['uri', 'title', 'timestamp'], 'uri')
         else:
             completed_log = None
 
@@ -72,27 +90,45 @@ class Command(BaseCommand):
             # if recursive was not specified, traverse nothing
             traverse = []
 
-        uris = get_uris(args)
+        engine = DeleteEngine(
+            repo=self.context.repo,
+            traverse=traverse,
+            max_workers=args.workers,
+            batch_size=args.batch_size,
+            purge_tombstones=args.purge_tombstones,
+            dry_run=args.dry_run,
+        )
+
+        verb = 'Would delete' if args.dry_run else 'Deleted'
+        uris = list(get_uris(args))
+        if args.use_transactions and not args.dry_run:
+            # each starting URI and its subtree is deleted in its own transaction
+            uri_groups = [[uri] for uri in uris]
+        else:
+            uri_groups = [uris]
 
-        for uri in uris:
-            with context(repo=self.context.repo, use_transactions=args.use_transactions, dry_run=args.dry_run):
-                try:
-                    for resource in self.context.repo[uri].walk(traverse=traverse):
-                        obj = resource.describe(PCDMObject)
-                        title = obj.title
-                        if args.dry_run:
-                            logger.info(f'Would delete resource {resource.url} "{title}"')
+        try:
+            for uri_group in uri_groups:
+                with context(repo=self.context.repo, use_transactions=args.use_transactions, dry_run=args.dry_run):
+                    for status in self._run(engine.run(uri_group)):
+                        count = status['count']
+                        logger.info(
+                            f'{verb} {count["deleted"]}/{count["total"]} resource(s) '
+                            f'({status["progress"]}%, {status["rate"]:.1f}/s)'
+                        )
+                        if completed_log is None or args.dry_run:
                             continue
-                        resource.delete()
-                        if completed_log is not None:
+                        timestamp = datetime.now().isoformat('T')
+                        for resource in status['deleted']:
                             completed_log.append({
                                 'uri': resource.url,
-                                'title': str(title),
-                                'timestamp': datetime.now().isoformat('T'),
+                                'title': str(resource.describe(PCDMObject).title),
+                                'timestamp': timestamp,
                             })
-                except RepositoryError as e:
-                    if isinstance(e.__cause__, ClientError) and e.__cause__.status_code in (404, 410):
-                        # not a problem to try and delete something that is not there
-                        logger.info(f'Resource {uri} does not exist; skipping')
-                    else:
-                        raise
+                    logger.info(
+                        f'{verb} {self.result["count"]["deleted"]} resource(s) in {self.result["elapsed"]:.2f}s '
+                        f'({self.result["rate"]:.1f}/s)'
+                    )
+        finally:
+            if completed_log is not None:
+                completed_log.close()
@@ -11,7 +11,7 @@ from plastron.models.annotations import TextblockOnPage
 from plastron.namespaces import pcdmuse
 from plastron.ocr.alto import ALTOResource
 from plastron.repo.pcdm import PCDMPageResource
-from plastron.jobs import ItemLog
+from plastron.jobs.logs import ItemLog
 
 logger = logging.getLogger(__name__)
 now = datetime.utcnow().strftime('%Y%m%d%H%M%S')
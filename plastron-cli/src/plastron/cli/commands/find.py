@@ -1,13 +1,12 @@
 import logging
 from argparse import Namespace
-from typing import Callable, Iterable, Iterator
 
 from rdflib import Literal, URIRef
 
 from plastron.cli import parse_data_property, parse_object_property
 from plastron.cli.commands import BaseCommand
 from plastron.namespaces import get_manager, rdf
-from plastron.repo import RepositoryResource
+from plastron.repo.search import IndexedFinder, SearchError, find
 from plastron.utils import parse_predicate_list, uri_or_curie
 
 logger = logging.getLogger(__name__)
@@ -75,6 +74,22 @@ def configure_cli(subparsers):
         default=False,
         action='store_true'
     )
+    parser.add_argument(
+        '--use-index',
+        help=(
+            'use the Solr index to find candidate resources, and check only those against the repository; '
+            'falls back to walking the repository if the properties cannot be searched in the index'
+        ),
+        action='store_true',
+        default=False
+    )
+    parser.add_argument(
+        '-w', '--workers',
+        help='number of candidate resources to check concurrently when using the index; defaults to 4',
+        type=int,
+        action='store',
+        default=4
+    )
     parser.add_argument(
         'uris', nargs='*',
         metavar='URI',
@@ -114,35 +129,33 @@ class Command(BaseCommand):
             for p in traverse:
                 logger.info(f'  {p.n3(namespace_manager=manager)}')
 
-        for uri in args.uris:
-            for resource in find(
-                start_resource=self.context.repo[uri],
-                matcher=self.match,
-                traverse=traverse,
-                properties=self.properties,
-            ):
-                self.resource_count += 1
-                print(resource.url)
+        if args.use_index:
+            # optional mapping of predicates to the Solr fields to search for them
+            index_fields = self.config.get('INDEX_FIELDS', None)
+            if index_fields is not None:
+                index_fields = {uri_or_curie(p): names for p, names in index_fields.items()}
+            finder = IndexedFinder(
+                self.context.repo,
+                self.context.solr,
+                fields=index_fields,
+                max_workers=args.workers,
+            )
+            search = finder.find
+        else:
+            search = find
+
+        try:
+            for uri in args.uris:
+                for resource in search(
+                    start_resource=self.context.repo[uri],
+                    matcher=self.match,
+                    traverse=traverse,
+                    properties=self.properties,
+                ):
+                    self.resource_count += 1
+                    print(resource.url)
+        except SearchError as e:
+            raise RuntimeError(str(e)) from e
 
         logger.info(f'Found {self.resource_count} resource(s)')
 
-
-def find(
-        start_resource: RepositoryResource,
-        matcher: Callable[[Iterable], bool],
-        traverse: list[URIRef] = None,
-        properties: list[tuple] = None
-) -> Iterator[RepositoryResource]:
-    if traverse is None:
-        traverse = []
-    if properties is None:
-        properties = []
-    for resource in start_resource.walk(traverse=traverse):
-        if len(properties) > 0:
-            subject = URIRef(resource.url)
-            if matcher((subject, p, o) in resource.graph for p, o in properties):
-                yield resource
-        else:
-            # with no filters specified, list all resources found
-            # this mimics the behavior of the Linux "find" command
-            yield resource
@@ -86,6 +86,16 @@ def configure_cli(subparsers):
         help='only validate, do not do the actual import',
         action='store_true'
     )
+    parser.add_argument(
+        '--validation-workers',
+        help=(
+            'with --validate-only, validate the rows in N worker processes; '
+            '0 uses one process per CPU; defaults to validating in a single process'
+        ),
+        metavar='N',
+        type=int,
+        action='store'
+    )
     parser.add_argument(
         '--make-template',
         help='create a CSV template for the given model',
@@ -262,6 +272,10 @@ class Command(BaseCommand):
                     ),
                 )
 
+        validation_workers = getattr(args, 'validation_workers', None)
+        if validation_workers is None:
+            validation_workers = self.config.get('VALIDATION_WORKERS', None)
+
         logger.debug(f'Running job {job.id}')
         self.run(job.run(
             context=self.context,
@@ -270,6 +284,7 @@ class Command(BaseCommand):
             percentage=args.percentage,
             validate_only=args.validate_only,
             publish=args.publish,
+            validation_workers=validation_workers,
         ))
 
         for key, value in self.result['count'].items():
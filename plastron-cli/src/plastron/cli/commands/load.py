@@ -12,7 +12,7 @@ from plastron.cli.commands import BaseCommand
 from plastron.client.transactions import transaction
 from plastron.repo import DataReadError
 from plastron.cli import ConfigError
-from plastron.jobs import ItemLog
+from plastron.jobs.logs import ItemLog
 
 logger = logging.getLogger(__name__)
 now = datetime.utcnow().strftime('%Y%m%d%H%M%S')
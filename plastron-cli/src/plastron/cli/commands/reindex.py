@@ -4,11 +4,12 @@ from os import getpid, uname
 
 from plastron.cli import get_uris
 from plastron.cli.commands import BaseCommand
-from plastron.messaging.messages import Message
-from plastron.rdfmapping.resources import RDFResource
-from plastron.repo import Tombstone
+from plastron.jobs.indexjob import IndexJob
+from plastron.jobs.reindexjob import ReindexJob
+from plastron.messaging.broker import BatchPublisher
+from plastron.repo.indexing import SolrIndexer
 from plastron.stomp import __version__
-from plastron.utils import parse_predicate_list
+from plastron.utils import RateLimiter, parse_predicate_list
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +32,41 @@ def configure_cli(subparsers):
         metavar='KEY',
         default='all',
     )
+    parser.add_argument(
+        '--direct',
+        help=(
+            'send documents directly to the Solr index configured in the SOLR section, '
+            'in batches, instead of sending a reindexing message per resource'
+        ),
+        action='store_true',
+    )
+    parser.add_argument(
+        '-b', '--batch-size',
+        help=(
+            'number of messages to send in each STOMP transaction; '
+            'defaults to the BATCH_SIZE configured for the command, or 100'
+        ),
+        type=int,
+        action='store',
+    )
+    parser.add_argument(
+        '-w', '--workers',
+        help=(
+            'number of resources to read from the repository concurrently; '
+            'defaults to the WORKERS configured for the command, or 4'
+        ),
+        type=int,
+        action='store',
+    )
+    parser.add_argument(
+        '--rate',
+        help=(
+            'maximum number of messages to send per second; '
+            'defaults to the RATE_LIMIT configured for the command, or no limit'
+        ),
+        type=float,
+        action='store',
+    )
     parser.add_argument(
         'uris', nargs='*',
         help='URI of repository object to reindex',
@@ -51,43 +87,59 @@ class Command(BaseCommand):
             ) from e
 
     def __call__(self, args: Namespace):
+        if args.direct:
+            self.index_directly(args)
+            return
+
         routing_headers = self.get_routing_headers(args.index)
         logger.info(f'Indexing to {args.index}')
         if self.context.broker.connect(client_id=f'plastrond/{__version__}-{uname().nodename}-{getpid()}'):
-            reindexing_queue = self.context.broker.destination('reindexing')
-            indexing_queue = self.context.broker.destination('indexing')
-            username = args.delegated_user or 'plastron'
-            traverse = parse_predicate_list(args.recursive) if args.recursive is not None else []
-            uris = get_uris(args)
-
-            for uri in uris:
-                for resource in self.context.repo[uri].walk(traverse=traverse, include_tombstones=True):
-                    logger.info(f'Reindexing {resource.url}')
-                    if isinstance(resource, Tombstone):
-                        logger.info(f'Resource {resource.url} has been removed, sending message to delete from indexes')
-                        indexing_queue.send(Message(
-                            headers={
-                                'CamelFcrepoEventName': 'delete',
-                                'CamelFcrepoUri': resource.url,
-                                'CamelFcrepoPath': resource.path,
-                                'CamelFcrepoUser': username,
-                                **routing_headers,
-                            },
-                            persistent='true',
-                        ))
-                    else:
-                        types = ','.join(resource.describe(RDFResource).rdf_type.values)
-                        reindexing_queue.send(Message(
-                            headers={
-                                'CamelFcrepoUri': resource.url,
-                                'CamelFcrepoPath': resource.path,
-                                'CamelFcrepoResourceType': types,
-                                'CamelFcrepoUser': username,
-                                **routing_headers,
-                            },
-                            persistent='true',
-                        ))
-
-            self.context.broker.disconnect()
+            batch_size = args.batch_size or int(self.config.get('BATCH_SIZE', 100))
+            rate = args.rate if args.rate is not None else float(self.config.get('RATE_LIMIT', 0))
+            job = ReindexJob(
+                repo=self.context.repo,
+                publisher=BatchPublisher(
+                    broker=self.context.broker,
+                    batch_size=batch_size,
+                    rate_limiter=RateLimiter(rate=rate),
+                ),
+                reindexing_queue=self.context.broker.destination('reindexing'),
+                indexing_queue=self.context.broker.destination('indexing'),
+                uris=list(get_uris(args)),
+                traverse=parse_predicate_list(args.recursive) if args.recursive is not None else [],
+                routing_headers=routing_headers,
+                username=args.delegated_user or 'plastron',
+                max_workers=args.workers or int(self.config.get('WORKERS', 4)),
+            )
+            try:
+                self.run(job.run())
+            finally:
+                self.context.broker.disconnect()
+            count = self.result['count']
+            logger.info(
+                f'Sent {count["sent"]} message(s) for {count["resources"]} resource(s) and '
+                f'{count["deleted"]} deleted resource(s) in {self.result["transactions"]} transaction(s)'
+            )
+            if 'error' in self.result:
+                raise RuntimeError(f'Reindexing did not complete: {self.result["error"]}')
         else:
             raise RuntimeError(f'STOMP connection failed for {self.context.broker}')
+
+    def index_directly(self, args: Namespace):
+        traverse = parse_predicate_list(args.recursive) if args.recursive is not None else []
+        job = IndexJob(
+            repo=self.context.repo,
+            indexer=SolrIndexer.from_config(self.context.config.get('SOLR', {})),
+            uris=list(get_uris(args)),
+            traverse=traverse,
+        )
+        self.run(job.run())
+        count = self.result['count']
+        logger.info(
+            f'Indexed {count["indexed"]} of {count["resources"]} resources '
+            f'({count["skipped"]} without a Solr mapping) in {self.result["batches"]} batches'
+        )
+        for uri, reason in self.result['failures'].items():
+            logger.error(f'Solr rejected {uri}: {reason}')
+        for uri, reason in self.result['errors'].items():
+            logger.error(f'Unable to read {uri}: {reason}')
@@ -2,7 +2,7 @@ import logging
 from argparse import FileType, Namespace
 
 from plastron.cli.commands import BaseCommand
-from plastron.jobs import ItemLog
+from plastron.jobs import SQLiteItemLog
 from plastron.jobs.updatejob import UpdateJob
 from plastron.utils import parse_predicate_list
 
@@ -55,6 +55,13 @@ def configure_cli(subparsers):
         help='file recording the URIs of updated resources',
         action='store'
     )
+    parser.add_argument(
+        '-w', '--workers',
+        help='number of resources to update concurrently, each in its own transaction; defaults to 8',
+        type=int,
+        action='store',
+        default=8
+    )
     parser.add_argument(
         '-f', '--file',
         help='File containing a list of URIs to update',
@@ -83,7 +90,7 @@ class Command(BaseCommand):
             logger.info('Dry run enabled, no actual updates will take place')
 
         if args.completed and not args.dry_run:
-            completed_log = ItemLog(args.completed, ['uri', 'title', 'timestamp'], 'uri')
+            completed_log = SQLiteItemLog(args.completed, ['uri', 'title', 'timestamp'], 'uri')
         else:
             completed_log = None
 
@@ -110,5 +117,11 @@ class Command(BaseCommand):
             traverse=traverse,
             completed=completed_log,
             dry_run=args.dry_run,
+            use_transactions=args.use_transactions,
+            max_workers=args.workers,
         )
-        self.run(update_job.run())
+        try:
+            self.run(update_job.run())
+        finally:
+            if completed_log is not None:
+                completed_log.close()
@@ -1,8 +1,14 @@
 import csv
 import logging
-from argparse import Namespace
+import sys
+from argparse import FileType, Namespace
+from collections import Counter
+from typing import Iterator
 
 from plastron.cli.commands import BaseCommand
+from plastron.repo.indexing import QUERY_BUILDERS, SolrVerifier
+
+logger = logging.getLogger(__name__)
 
 
 def configure_cli(subparsers):
@@ -16,28 +22,75 @@ def configure_cli(subparsers):
         action='store',
         default=None
     )
+    parser.add_argument(
+        '-b', '--batch-size',
+        help='number of URIs to check in each Solr query; defaults to 100',
+        type=int,
+        action='store',
+        default=100
+    )
+    parser.add_argument(
+        '-w', '--workers',
+        help='number of Solr queries to run concurrently; defaults to 4',
+        type=int,
+        action='store',
+        default=4
+    )
+    parser.add_argument(
+        '--query-mode',
+        help='how to query for a batch of URIs: with the Solr "terms" query parser (the default), or with "or" queries',
+        choices=list(QUERY_BUILDERS),
+        default='terms'
+    )
+    parser.add_argument(
+        '--scope',
+        help=(
+            'Solr query for the documents that are expected to be in the log; '
+            'any matching documents whose URIs are not in the log are reported as "extra"'
+        ),
+        action='store',
+        metavar='QUERY',
+        default=None
+    )
+    parser.add_argument(
+        '-o', '--output',
+        help='CSV file to write missing (and extra) URIs to; defaults to STDOUT',
+        type=FileType('w'),
+        default=sys.stdout
+    )
 
     parser.set_defaults(cmd_name='verify')
 
 
+def read_uris(filename: str) -> Iterator[str]:
+    try:
+        with open(filename) as csvfile:
+            for item in csv.DictReader(csvfile):
+                yield item['uri']
+    except OSError as e:
+        raise RuntimeError(f'Unable to read {filename}: {e}')
+
+
 class Command(BaseCommand):
     def __call__(self, args: Namespace):
-        invalid_items = []
-        try:
-            with open(args.log) as csvfile:
-                reader = csv.DictReader(csvfile)
-
-                for item in reader:
-                    query = self.context.solr.search(f'id:\"{item["uri"]}\"')
-
-                    if len(query) == 0:
-                        invalid_items.append(item["uri"])
-        except OSError as e:
-            raise RuntimeError(f'Unable to read {args.log}: {e}')
-
-        if len(invalid_items) > 0:
-            logging.info(f"There are {len(invalid_items)} items in the mapfile whose URIs aren't indexed:")
-            for item in invalid_items:
-                print(item)
+        verifier = SolrVerifier(
+            self.context.solr,
+            batch_size=args.batch_size,
+            max_workers=args.workers,
+            query_mode=args.query_mode,
+        )
+        writer = csv.DictWriter(args.output, fieldnames=['uri', 'status'])
+        writer.writeheader()
+        count = Counter()
+        for result in verifier.verify(read_uris(args.log), scope=args.scope):
+            writer.writerow({'uri': result.uri, 'status': result.status})
+            count[result.status] += 1
+        args.output.flush()
+
+        if count['missing'] > 0:
+            logger.info(f"There are {count['missing']} items in the mapfile whose URIs aren't indexed")
         else:
-            logging.info("All URIs in the mapfile are indexed!")
+            logger.info("All URIs in the mapfile are indexed!")
+        if count['extra'] > 0:
+            logger.info(f"There are {count['extra']} indexed items in scope whose URIs aren't in the mapfile")
+        logger.info(f'Verified using {verifier.queries} Solr queries')
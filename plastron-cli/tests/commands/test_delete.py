@@ -8,7 +8,7 @@ from httpretty import HEAD, GET, DELETE
 
 from plastron.cli.commands.delete import Command
 from plastron.repo import RepositoryError
-from plastron.jobs import ItemLog
+from plastron.jobs.logs import ItemLog
 
 
 def register_responses(responses, uri):
@@ -86,6 +86,9 @@ def test_delete_command(plastron_context, register_transaction, path, responses,
         uris=[f'/{path}'],
         use_transactions=True,
         recursive=None,
+        workers=2,
+        batch_size=10,
+        purge_tombstones=False,
     )
     plastron_context.args = args
 
@@ -116,6 +119,9 @@ def test_completed_log(datadir, repo, plastron_context, register_transaction):
         uris=['/test'],
         use_transactions=True,
         recursive=None,
+        workers=2,
+        batch_size=10,
+        purge_tombstones=False,
     )
     plastron_context.args = args
 
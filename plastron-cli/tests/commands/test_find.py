@@ -1,10 +1,14 @@
 from argparse import Namespace
+from types import SimpleNamespace
+from unittest.mock import MagicMock
 
 import httpretty
+import pysolr
 import pytest
 from rdflib import Graph, Literal
 
 from plastron.cli.commands.find import find, Command
+from plastron.context import PlastronContext
 from plastron.namespaces import rdf, pcdm, dcterms, ldp
 
 
@@ -42,6 +46,8 @@ def test_find(datadir, repo, simulate_repo, matcher, properties, expected_count)
                 types=[],
                 match_all=True,
                 match_any=False,
+                use_index=False,
+                workers=4,
                 uris=['/container'],
             ),
             ['/container', '/container/1', '/container/2'],
@@ -55,6 +61,8 @@ def test_find(datadir, repo, simulate_repo, matcher, properties, expected_count)
                 types=['pcdm:Object'],
                 match_all=True,
                 match_any=False,
+                use_index=False,
+                workers=4,
                 uris=['/container'],
             ),
             ['/container/1']
@@ -68,6 +76,8 @@ def test_find(datadir, repo, simulate_repo, matcher, properties, expected_count)
                 types=['pcdm:Object'],
                 match_all=False,
                 match_any=True,
+                use_index=False,
+                workers=4,
                 uris=['/container'],
             ),
             ['/container/1', '/container/2']
@@ -85,3 +95,68 @@ def test_find_command(capsys, datadir, repo, plastron_context, simulate_repo, ar
     assert len(captured.out.splitlines()) == len(expected_paths)
     for path in expected_paths:
         assert f'http://localhost:9999{path}\n' in captured.out
+
+
+@httpretty.activate
+def test_find_command_using_index(capsys, datadir, repo, plastron_context, simulate_repo):
+    graph = Graph().parse(file=(datadir / 'graph.ttl').open())
+    simulate_repo(graph)
+    solr = MagicMock(spec=pysolr.Solr)
+    solr.search.return_value = SimpleNamespace(
+        docs=[{'id': 'http://localhost:9999/container/2'}],
+        hits=1,
+        nextCursorMark=None,
+    )
+    plastron_context._solr = solr
+    args = Namespace(
+        delegated_user=None,
+        recursive='ldp:contains',
+        data_properties=[('dcterms:title', 'Moonpig')],
+        object_properties=[],
+        types=['umd:Item'],
+        match_all=True,
+        match_any=False,
+        use_index=True,
+        workers=2,
+        uris=['/container'],
+    )
+    plastron_context.args = args
+    cmd = Command(context=plastron_context)
+    cmd(args)
+    captured = capsys.readouterr()
+    assert captured.out == 'http://localhost:9999/container/2\n'
+    assert solr.search.call_args.args[0] == '(title__txt:"Moonpig") AND (content_model_name__str:("Item"))'
+
+
+@httpretty.activate
+def test_find_command_using_index_with_configured_fields(capsys, datadir, repo, repo_base_config, simulate_repo):
+    graph = Graph().parse(file=(datadir / 'graph.ttl').open())
+    simulate_repo(graph)
+    plastron_context = PlastronContext(config={
+        'REPOSITORY': repo_base_config,
+        'COMMANDS': {'FIND': {'INDEX_FIELDS': {'dcterms:title': ['display_title']}}},
+    })
+    solr = MagicMock(spec=pysolr.Solr)
+    solr.search.return_value = SimpleNamespace(docs=[], hits=0, nextCursorMark=None)
+    plastron_context._solr = solr
+    args = Namespace(
+        delegated_user=None,
+        recursive='ldp:contains',
+        data_properties=[('dcterms:title', 'Moonpig')],
+        object_properties=[],
+        types=['umd:Item'],
+        match_all=True,
+        match_any=False,
+        use_index=True,
+        workers=2,
+        uris=['/container'],
+    )
+    plastron_context.args = args
+    cmd = Command(context=plastron_context)
+    # an index without any content models cannot be searched
+    with pytest.raises(RuntimeError):
+        cmd(args)
+
+    solr.search.return_value = SimpleNamespace(docs=[], hits=1, nextCursorMark=None)
+    cmd(args)
+    assert solr.search.call_args.args[0] == '(display_title:"Moonpig") AND (content_model_name__str:("Item"))'
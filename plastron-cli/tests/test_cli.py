@@ -1,5 +1,10 @@
+import subprocess
+import sys
 from argparse import ArgumentParser
-from plastron.cli import load_commands
+
+import pytest
+
+from plastron.cli import LazySubParsersAction, get_command_module_names, load_commands
 from plastron.cli.commands import importcommand
 
 
@@ -17,3 +22,58 @@ def test_find_commands_correctly_handles_import_command():
     command_modules = load_commands(subparsers)
     assert "import" in command_modules
     assert command_modules["import"] == importcommand
+
+
+def test_lazy_subparsers_list_all_commands():
+    parser = ArgumentParser(prog='plastron')
+    subparsers = parser.add_subparsers(title='commands', action=LazySubParsersAction)
+    assert set(subparsers.choices) == set(get_command_module_names())
+    assert 'import' in subparsers.choices
+    assert subparsers.modules == {}
+
+
+def test_lazy_subparsers_load_selected_command():
+    parser = ArgumentParser(prog='plastron')
+    parser.set_defaults(cmd_name=None)
+    subparsers = parser.add_subparsers(title='commands', action=LazySubParsersAction)
+    args = parser.parse_args(['import', '--validate-only', '-m', 'Item'])
+    assert args.cmd_name == 'import'
+    assert args.validate_only
+    assert list(subparsers.modules) == ['import']
+    assert subparsers.modules['import'] == importcommand
+    # the placeholder was replaced, not duplicated
+    assert list(subparsers.choices).count('import') == 1
+
+
+def test_parsing_does_not_import_other_commands():
+    # run in a fresh interpreter, since other tests have already imported the commands
+    code = (
+        'import sys\n'
+        'from argparse import ArgumentParser\n'
+        'from plastron.cli import LazySubParsersAction\n'
+        'parser = ArgumentParser()\n'
+        'parser.add_subparsers(action=LazySubParsersAction).required = True\n'
+        'parser.parse_args(["echo", "-b", "foo"])\n'
+        'print(sorted(m for m in sys.modules if m.startswith("plastron.cli.commands.")))\n'
+        'print("plastron.context" in sys.modules)\n'
+    )
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.splitlines() == ["['plastron.cli.commands.echo']", 'False']
+
+
+@pytest.mark.parametrize('name', ['list', 'ls'])
+def test_lazy_subparsers_aliases(name):
+    parser = ArgumentParser(prog='plastron')
+    parser.set_defaults(cmd_name=None)
+    subparsers = parser.add_subparsers(title='commands', action=LazySubParsersAction)
+    args = parser.parse_args([name, '-l', '/foo'])
+    assert args.cmd_name == 'list'
+    assert args.long
+    assert subparsers.load(args.cmd_name) is subparsers.load(name)
+
+
+def test_command_module_names_without_entry_points(monkeypatch):
+    monkeypatch.setattr('importlib.metadata.entry_points', lambda group: [])
+    names = get_command_module_names()
+    assert names['import'] == 'plastron.cli.commands.importcommand'
+    assert names['list'] == 'plastron.cli.commands.list'
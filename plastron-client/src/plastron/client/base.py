@@ -1,4 +1,5 @@
 import logging
+import threading
 from http import HTTPStatus
 from pathlib import Path
 from typing import Optional, Any, Callable
@@ -9,7 +10,7 @@ from requests.auth import AuthBase
 
 from plastron.client.endpoint import Endpoint
 from plastron.client.utils import SessionHeaderAttribute, TypedText, OMIT_SERVER_MANAGED_TRIPLES, ResourceURI, \
-    serialize, build_sparql_update
+    serialize, build_sparql_update, URLSet
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +35,7 @@ class Client:
         on_behalf_of: str = None,
         load_binaries: bool = True,
         session: Session = None,
+        existing_urls_cache_size: int = 10000,
     ):
         self.endpoint: Endpoint = endpoint
         """Fedora repository endpoint"""
@@ -54,6 +56,11 @@ class Client:
         self.ua_string = ua_string
         self.delegated_user = on_behalf_of
 
+        # URLs of containers known to exist; only positive results are
+        # cached, and entries are invalidated by `delete()`
+        self._existing_urls = URLSet(maxsize=existing_urls_cache_size)
+        self._existing_urls_lock = threading.Lock()
+
     def request(self, method: str, url: str, **kwargs) -> Response:
         """Send an HTTP request using the configured `session`. Additional
         keyword arguments are passed to the underlying `session.request()`
@@ -96,7 +103,9 @@ class Client:
         return self.request('GET', url, **kwargs)
 
     def delete(self, url: str, **kwargs) -> Response:
-        """Send an HTTP DELETE request using the configured session."""
+        """Send an HTTP DELETE request using the configured session. Removes
+        `url` and any URLs beneath it from the path existence cache."""
+        self.forget_existing(url)
         return self.request('DELETE', url, **kwargs)
 
     def get_description(
@@ -182,22 +191,57 @@ class Client:
     def path_exists(self, path: str, **kwargs) -> bool:
         """Checks whether the repository path given `path` exists on the
         configured `endpoint`. Uses the `exists` method to do the actual
-        check."""
-        return self.exists(self.endpoint.url + path, **kwargs)
+        check.
+
+        Positive results are remembered for the lifetime of this client (or
+        until the path is deleted using `delete()`, or the least recently used
+        of `existing_urls_cache_size` paths is dropped), so repeated checks of
+        the same path only send a single HEAD request."""
+        url = self.endpoint.url + path
+        with self._existing_urls_lock:
+            if url in self._existing_urls:
+                return True
+        if self.exists(url, **kwargs):
+            self.remember_existing(url)
+            return True
+        return False
+
+    def remember_existing(self, url: str):
+        """Record that the resource at `url` is known to exist."""
+        with self._existing_urls_lock:
+            self._existing_urls.add(url)
+
+    def forget_existing(self, url: str):
+        """Remove `url`, and any URLs that have `url` as a path prefix, from
+        the path existence cache."""
+        with self._existing_urls_lock:
+            self._existing_urls.discard_tree(url)
 
     def paths_to_create(self, path: Path) -> list[Path]:
         """Return a list of path prefixes in `path` that need to be created
         before creating `path` (i.e., they do not exist in the repository that
         `client` is configured to work with). This list is ordered from shortest
-        to longest prefix."""
+        to longest prefix.
+
+        Since an existing resource implies that all of its ancestors exist,
+        this uses a binary search over the prefixes to find the longest one
+        that exists, so deep paths only need a logarithmic number of HEAD
+        requests. Combined with the path existence cache, creating many
+        siblings in the same container only checks the container once."""
 
         if self.path_exists(str(path)):
             return []
-        to_create = [path]
-        for ancestor in path.parents:
-            if not self.path_exists(str(ancestor)):
-                to_create.insert(0, ancestor)
-        return to_create
+        candidates = [*reversed(path.parents), path]
+        # the last candidate (the target path) is known not to exist;
+        # find the index of the first prefix that is missing
+        low, high = 0, len(candidates) - 1
+        while low < high:
+            mid = (low + high) // 2
+            if self.path_exists(str(candidates[mid])):
+                low = mid + 1
+            else:
+                high = mid
+        return candidates[low:]
 
     def get_location(self, response: Response) -> Optional[str]:
         """Return the value of the `Location` HTTP header in `response`,
@@ -219,7 +263,8 @@ class Client:
         if url is not None:
             response = self.put(url, **kwargs)
         elif path is not None:
-            response = self.put(self.endpoint.url + path, **kwargs)
+            url = self.endpoint.url + path
+            response = self.put(url, **kwargs)
         else:
             if 'headers' not in kwargs:
                 kwargs['headers'] = {}
@@ -231,12 +276,18 @@ class Client:
         if response.status_code == HTTPStatus.CREATED:
             created_uri = self.get_location(response) or url
             description_uri = self.get_description_uri(created_uri, response)
+            if url is not None:
+                self.remember_existing(url)
 
             return ResourceURI(created_uri, description_uri)
         else:
             raise ClientError(response)
 
     def create_at_path(self, target_path: Path, graph: Graph = None):
+        """Create a resource at `target_path`, first creating any missing
+        ancestor containers. The missing containers are determined up front
+        by `paths_to_create()`, and are then created in a single pass, from
+        shortest to longest path, without further existence checks."""
         all_paths = self.paths_to_create(target_path)
 
         if len(all_paths) == 0:
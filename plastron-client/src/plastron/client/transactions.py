@@ -10,7 +10,7 @@ from requests import ConnectionError, Response
 
 from plastron.client.base import Client, ClientError
 from plastron.client.endpoint import Endpoint
-from plastron.client.utils import TypedText
+from plastron.client.utils import TypedText, rewrite_graph_nodes
 
 logger = logging.getLogger(__name__)
 
@@ -173,26 +173,12 @@ class TransactionClient(Client):
     def insert_transaction_uri_for_graph(self, graph: Optional[Graph]) -> Optional[Graph]:
         if graph is None:
             return None
-        for s, p, o in graph:
-            s_txn = self.insert_transaction_uri(s)
-            o_txn = self.insert_transaction_uri(o)
-            # swap the triple if either the subject or object is changed
-            if s != s_txn or o != o_txn:
-                graph.add((s_txn, p, o_txn))
-                graph.remove((s, p, o))
-        return graph
+        return rewrite_graph_nodes(graph, self.insert_transaction_uri)
 
     def remove_transaction_uri_for_graph(self, graph: Optional[Graph]) -> Optional[Graph]:
         if graph is None:
             return None
-        for s, p, o in graph:
-            s_txn = self.remove_transaction_uri(s)
-            o_txn = self.remove_transaction_uri(o)
-            # swap the triple if either the subject or object is changed
-            if s != s_txn or o != o_txn:
-                graph.add((s_txn, p, o_txn))
-                graph.remove((s, p, o))
-        return graph
+        return rewrite_graph_nodes(graph, self.remove_transaction_uri)
 
     def transaction(self, keep_alive: int = 90):
         """Immediately raises a `TransactionError`, since you cannot nest transactions."""
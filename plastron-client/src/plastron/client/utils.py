@@ -1,8 +1,9 @@
 import logging
 import os
 from base64 import urlsafe_b64encode
-from collections import namedtuple
-from typing import NamedTuple
+from bisect import bisect_left, insort
+from collections import OrderedDict, namedtuple
+from typing import Any, Callable, NamedTuple
 
 from rdflib import Graph, Literal, URIRef
 
@@ -39,6 +40,66 @@ class ResourceURI(namedtuple('Resource', ['uri', 'description_uri'])):
         return self.uri
 
 
+class URLSet:
+    """Bounded set of URLs that supports removing a URL and all the URLs
+    beneath it. The URLs are kept in a sorted list, so the URLs beneath a
+    given URL are a contiguous range that can be found by binary search,
+    without scanning the whole set. Once the set holds `maxsize` URLs,
+    adding another drops the least recently used URL. Not thread-safe.
+
+    ```pycon
+    >>> urls = URLSet(maxsize=100)
+    >>> urls.add('http://example.com/rest/a')
+    >>> urls.add('http://example.com/rest/a/b')
+    >>> urls.add('http://example.com/rest/ab')
+    >>> urls.discard_tree('http://example.com/rest/a')
+    2
+    >>> 'http://example.com/rest/ab' in urls
+    True
+    ```
+    """
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._sorted: list[str] = []
+        self._recent: OrderedDict[str, None] = OrderedDict()
+
+    def __contains__(self, url: str) -> bool:
+        if url in self._recent:
+            self._recent.move_to_end(url)
+            return True
+        return False
+
+    def __len__(self):
+        return len(self._recent)
+
+    def add(self, url: str):
+        if url in self:
+            return
+        insort(self._sorted, url)
+        self._recent[url] = None
+        while len(self._recent) > self.maxsize:
+            oldest, _ = self._recent.popitem(last=False)
+            del self._sorted[bisect_left(self._sorted, oldest)]
+
+    def discard_tree(self, url: str) -> int:
+        """Remove `url`, and any URLs that have `url` as a path prefix.
+        Returns the number of URLs removed."""
+        removed = 0
+        if url in self._recent:
+            del self._recent[url]
+            del self._sorted[bisect_left(self._sorted, url)]
+            removed += 1
+        prefix = url.rstrip('/') + '/'
+        # every string that starts with the prefix sorts before the prefix with
+        # its final "/" replaced by the next character, "0"
+        start = bisect_left(self._sorted, prefix)
+        end = bisect_left(self._sorted, prefix[:-1] + '0', lo=start)
+        for descendant in self._sorted[start:end]:
+            del self._recent[descendant]
+        del self._sorted[start:end]
+        return removed + end - start
+
+
 class TypedText(NamedTuple):
     """Data object combining a string value and its media type,
     expressed as a MIME type string.
@@ -179,3 +240,25 @@ def build_sparql_update(delete_graph: Graph = None, insert_graph: Graph = None)
         return f"INSERT DATA {{ {inserts} }}"
     else:
         return ''
+
+
+def rewrite_graph_nodes(graph: Graph, rewrite: Callable[[Any], Any]) -> Graph:
+    """Apply `rewrite` to each distinct subject and object of `graph`, and
+    replace the nodes that it changes. Only the triples that use a changed
+    node are found (through the graph's subject and object indexes), removed,
+    and re-added with the new nodes.
+
+    `graph` is updated in place, and returned."""
+    nodes = {node for s, _, o in graph for node in (s, o)}
+    mapping = {node: new_node for node in nodes if (new_node := rewrite(node)) != node}
+    affected = set()
+    for node in mapping:
+        affected.update(graph.triples((node, None, None)))
+        affected.update(graph.triples((None, None, node)))
+    # remove all the old triples first, so that one rewritten triple cannot
+    # collide with another triple that is yet to be rewritten
+    for triple in affected:
+        graph.remove(triple)
+    for s, p, o in affected:
+        graph.add((mapping.get(s, s), p, mapping.get(o, o)))
+    return graph
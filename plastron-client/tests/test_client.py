@@ -11,7 +11,7 @@ from requests_jwtauth import HTTPBearerAuth
 
 from plastron.client import Endpoint, Client, ClientError
 from plastron.client.auth import ClientCertAuth
-from plastron.client.utils import random_slug, ResourceURI
+from plastron.client.utils import random_slug, ResourceURI, URLSet
 
 
 @pytest.fixture()
@@ -190,6 +190,29 @@ def test_paths_to_create():
     assert client.paths_to_create(Path('/foo')) == []
 
 
+def test_paths_to_create_deep():
+    existing = {'/', '/a', '/a/b'}
+    requested = []
+
+    def _request(method, url, **kwargs):
+        path = url.replace('http://example.com/fcrepo/rest', '')
+        requested.append(path)
+        return MockOKResponse() if path in existing else MockNotFoundResponse()
+
+    mock_session = MagicMock(spec=Session)
+    mock_session.request.side_effect = _request
+
+    client = Client(
+        endpoint=Endpoint('http://example.com/fcrepo/rest'),
+        session=mock_session,
+    )
+    assert client.paths_to_create(Path('/a/b/c/d/e/f/g')) == [
+        Path('/a/b/c'), Path('/a/b/c/d'), Path('/a/b/c/d/e'), Path('/a/b/c/d/e/f'), Path('/a/b/c/d/e/f/g'),
+    ]
+    # binary search over the 7 ancestors, rather than checking each one
+    assert len(requested) < 8
+
+
 def test_client_is_reachable(endpoint):
     session = MagicMock(spec=Session)
     session.request.return_value = MockOKResponse()
@@ -226,3 +249,27 @@ def test_client_test_connection_error(endpoint):
     client = Client(endpoint=endpoint, session=session)
     with pytest.raises(ConnectionError):
         client.test_connection()
+
+
+def test_url_set_discard_tree():
+    urls = URLSet()
+    for path in ['/a', '/a/b', '/a/b/c', '/ab', '/a-b', '/b']:
+        urls.add('http://example.com/rest' + path)
+    assert urls.discard_tree('http://example.com/rest/a') == 3
+    assert len(urls) == 3
+    for path in ['/ab', '/a-b', '/b']:
+        assert 'http://example.com/rest' + path in urls
+    assert urls.discard_tree('http://example.com/rest/c') == 0
+
+
+def test_url_set_is_bounded():
+    urls = URLSet(maxsize=3)
+    for path in ['/a', '/b', '/c']:
+        urls.add('http://example.com/rest' + path)
+    # using "/a" makes "/b" the least recently used
+    assert 'http://example.com/rest/a' in urls
+    urls.add('http://example.com/rest/d')
+    assert len(urls) == 3
+    assert 'http://example.com/rest/b' not in urls
+    assert urls.discard_tree('http://example.com/rest/') == 3
+    assert len(urls) == 0
@@ -73,3 +73,37 @@ def test_create_in_container(client: Client, repo_app):
         resource = client.create_in_container(Path('/foo'))
         assert resource.uri
         assert re.match('http://localhost:9999/foo/.+', str(resource.uri))
+
+
+def test_create_siblings_checks_container_once(client: Client, repo_app, monkeypatch):
+    head_urls = []
+    original_head = client.head
+
+    def _head(url, **kwargs):
+        head_urls.append(url)
+        return original_head(url, **kwargs)
+
+    monkeypatch.setattr(client, 'head', _head)
+    with repo_app.run('localhost', 9999):
+        client.create_at_path(Path('/foo/bar/baz'))
+        head_urls.clear()
+        client.create_at_path(Path('/foo/bar/baz/1'))
+        client.create_at_path(Path('/foo/bar/baz/2'))
+        assert head_urls == [
+            'http://localhost:9999/foo/bar/baz/1',
+            'http://localhost:9999/foo/bar/baz/2',
+        ]
+        assert client.path_exists('/foo/bar/baz/1')
+        assert client.path_exists('/foo/bar/baz/2')
+
+
+def test_delete_invalidates_path_cache(client: Client, repo_app):
+    with repo_app.run('localhost', 9999):
+        client.create_at_path(Path('/foo/bar'))
+        assert client.path_exists('/foo/bar')
+        repo_app.config['RESOURCES'].clear()
+        # still cached
+        assert client.path_exists('/foo/bar')
+        client.delete('http://localhost:9999/foo')
+        assert not client.path_exists('/foo')
+        assert not client.path_exists('/foo/bar')
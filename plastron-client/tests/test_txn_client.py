@@ -1,5 +1,5 @@
 import pytest
-from rdflib import URIRef, Literal
+from rdflib import Graph, URIRef, Literal
 
 from plastron.client import Endpoint
 from plastron.client.transactions import transaction, TransactionClient, Transaction, TransactionError
@@ -57,3 +57,26 @@ def test_cannot_nest_transactions(txn_client):
             pass
 
     assert str(e.value).startswith('Failed to create transaction')
+
+
+def test_insert_and_remove_transaction_uri_for_graph(txn_client):
+    foo = URIRef('http://example.com/repo/foo')
+    foo_txn = URIRef('http://example.com/repo/tx:123456/foo')
+    title = URIRef('http://purl.org/dc/terms/title')
+    graph = Graph()
+    graph.add((foo, title, Literal('Foo')))
+    graph.add((URIRef(foo + '#bar'), URIRef('http://pcdm.org/models#memberOf'), foo))
+    graph.add((URIRef('http://example.org/other'), title, Literal('Other')))
+
+    txn_graph = txn_client.insert_transaction_uri_for_graph(graph)
+    assert set(txn_graph) == {
+        (foo_txn, title, Literal('Foo')),
+        (URIRef(foo_txn + '#bar'), URIRef('http://pcdm.org/models#memberOf'), foo_txn),
+        (URIRef('http://example.org/other'), title, Literal('Other')),
+    }
+    assert set(txn_client.remove_transaction_uri_for_graph(txn_graph)) == {
+        (foo, title, Literal('Foo')),
+        (URIRef(foo + '#bar'), URIRef('http://pcdm.org/models#memberOf'), foo),
+        (URIRef('http://example.org/other'), title, Literal('Other')),
+    }
+    assert txn_client.insert_transaction_uri_for_graph(None) is None
@@ -8,7 +8,7 @@ from typing import Any, Optional, Type, TypeVar
 
 import yaml
 
-from plastron.jobs.logs import ItemLog
+from plastron.jobs.logs import SQLiteItemLog
 
 logger = logging.getLogger(__name__)
 
@@ -52,7 +52,7 @@ class Job:
         self.config = None
         # record of items that are successfully loaded
         completed_fieldnames = ['id', 'timestamp', 'title', 'uri', 'status']
-        self.completed_log = ItemLog(self.dir / 'completed.log.csv', completed_fieldnames, 'id')
+        self.completed_log = SQLiteItemLog(self.dir / 'completed.log.csv', completed_fieldnames, 'id')
 
     def __str__(self):
         return self.id
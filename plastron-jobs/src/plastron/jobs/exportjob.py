@@ -201,7 +201,9 @@ class ExportJob(Job):
         bag = make_bag(temp_dir.name)
 
         export_dir = os.path.join(temp_dir.name, 'data')
-        serializer = serializer_class(directory=export_dir)
+        # stream the rows to disk as they are serialized, to keep memory usage
+        # constant regardless of the number of items exported
+        serializer = serializer_class(directory=export_dir, streaming=True)
         yield {
             'time': timer.now(),
             'count': count,
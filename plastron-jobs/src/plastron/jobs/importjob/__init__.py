@@ -1,12 +1,15 @@
 import logging
+import multiprocessing
 import os
-from collections import Counter
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
+from itertools import islice
 from pathlib import Path
 from shutil import copyfileobj
-from typing import Optional, Any, IO, Generator, Iterable
+from typing import Optional, Any, IO, Generator, Iterable, Iterator, NamedTuple
 
 from bs4 import BeautifulSoup
 from rdflib import URIRef
@@ -15,21 +18,29 @@ from plastron.client import ClientError
 from plastron.context import PlastronContext
 from plastron.files import BinarySource, ZipFileSource, RemoteFileSource, HTTPFileSource, LocalFileSource
 from plastron.handles import HandleInfo
-from plastron.jobs import JobError, JobConfig, Job, ItemLog
-from plastron.jobs.importjob.spreadsheet import MetadataSpreadsheet, InvalidRow, Row, MetadataError
+from plastron.jobs import JobError, JobConfig, Job, SQLiteItemLog
+from plastron.jobs.importjob.spreadsheet import MetadataSpreadsheet, InvalidRow, Row, MetadataError, LineReference
 from plastron.models import get_model_from_name, ModelClassNotFoundError
 from plastron.models.annotations import FullTextAnnotation, TextualBody
 from plastron.namespaces import sc
-from plastron.rdfmapping.validation import ValidationResultsDict, ValidationResult, ValidationSuccess, ValidationFailure
+from plastron.rdfmapping.validation import (
+    ValidationResultsDict,
+    ValidationResult,
+    ValidationSuccess,
+    ValidationFailure,
+    Violation,
+)
 from plastron.repo import RepositoryError, ContainerResource
 from plastron.repo.pcdm import PCDMObjectResource
 from plastron.repo.publish import PublishableResource
 from plastron.utils import datetimestamp
+from plastron.validation import vocabularies
 from plastron.validation import ValidationError
 
 logger = logging.getLogger(__name__)
 DROPPED_INVALID_FIELDNAMES = ['id', 'timestamp', 'title', 'uri', 'reason']
 DROPPED_FAILED_FIELDNAMES = ['id', 'timestamp', 'title', 'uri', 'reason']
+VALIDATION_CHUNK_SIZE = 32
 
 
 class ImportedItemStatus(Enum):
@@ -58,6 +69,10 @@ def get_loggable_uri(item):
     return uri
 
 
+def get_failure_reason(violations: Iterable[Violation]) -> str:
+    return 'Validation failures: ' + '; '.join(f'{v.property} {v.message}' for v in violations)
+
+
 class ImportRun:
     """
     A single run of an import job. Records the logs of invalid and failed items (if any).
@@ -87,21 +102,21 @@ class ImportRun:
         return self
 
     @property
-    def invalid_items(self) -> ItemLog:
+    def invalid_items(self) -> SQLiteItemLog:
         """
         Log of items that failed metadata validation during this import run.
         """
         if self._invalid_items is None:
-            self._invalid_items = ItemLog(self.dir / 'dropped-invalid.log.csv', DROPPED_INVALID_FIELDNAMES, 'id')
+            self._invalid_items = SQLiteItemLog(self.dir / 'dropped-invalid.log.csv', DROPPED_INVALID_FIELDNAMES, 'id')
         return self._invalid_items
 
     @property
-    def failed_items(self) -> ItemLog:
+    def failed_items(self) -> SQLiteItemLog:
         """
         Log of items that failed when loading into the repository during this import run.
         """
         if self._failed_items is None:
-            self._failed_items = ItemLog(self.dir / 'dropped-failed.log.csv', DROPPED_FAILED_FIELDNAMES, 'id')
+            self._failed_items = SQLiteItemLog(self.dir / 'dropped-failed.log.csv', DROPPED_FAILED_FIELDNAMES, 'id')
         return self._failed_items
 
     def progress_message(self, n: int, **kwargs) -> dict[str, Any]:
@@ -129,6 +144,7 @@ class ImportRun:
             validate_only: bool = False,
             import_file: IO = None,
             publish: bool = False,
+            validation_workers: int = None,
     ) -> Generator[dict[str, Any], None, dict[str, Any]]:
         """Execute this import run. Returns a generator that yields a dictionary of
         current status after each item. The generator also returns a final status
@@ -148,6 +164,10 @@ class ImportRun:
 
         print('job status', result['type'])
         ```
+
+        In validation-only mode, if `validation_workers` is given, the rows are
+        validated in that many worker processes (or one per CPU, if it is 0)
+        instead of in this process. See `validate_rows()`.
         """
         if self.dir is not None:
             raise RuntimeError('Run completed, cannot start again')
@@ -160,6 +180,8 @@ class ImportRun:
             logger.info(f'Loading {percentage}% of the total items')
         if validate_only:
             logger.info('Validation-only mode, skipping imports')
+        elif validation_workers is not None:
+            logger.warning('Validation workers are only used in validation-only mode')
         if publish:
             logger.info('Publishing all imported items')
 
@@ -188,78 +210,84 @@ class ImportRun:
             skipped_items=0,
         )
         logger.info(f'Found {self.count["initially_completed_items"]} completed items')
-        if self.count['initially_completed_items'] > 0:
-            logger.debug(f'Completed item identifiers: {self.job.completed_log.item_keys}')
+        if self.count['initially_completed_items'] > 0 and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f'Completed item identifiers: {set(self.job.completed_log.keys())}')
 
         self.state = 'validate_in_progress' if validate_only else 'import_in_progress'
         yield self.progress_message(0)
-        for n, row in enumerate(metadata.rows(limit=limit, percentage=percentage, completed=self.job.completed_log), 1):
-            if isinstance(row, InvalidRow):
-                self.drop_invalid(item=None, line_reference=row.line_reference, reason=row.reason)
-                self.count['invalid_items'] += 1
-                yield self.progress_message(n)
-                continue
-
-            logger.debug(f'Row data: {row.data}')
-            import_row = ImportRow(self.job, context, row, validate_only, publish)
-
-            # count the number of files referenced in this row
-            self.count['files'] += len(row.filenames)
-
-            # validate metadata and files
-            try:
-                validation = import_row.validate_item()
-            except RuntimeError as e:
-                self.count['errors'] += 1
-                logger.warning(f'"{import_row}" caused an error, skipping')
-                self.drop_failed(
-                    item=import_row.item,
-                    line_reference=row.line_reference,
-                    reason=str(e),
-                )
-                yield self.progress_message(n)
-                continue
-
-            if validation.ok:
-                self.count['valid_items'] += 1
-                logger.info(f'"{import_row}" is valid')
+        rows = metadata.rows(limit=limit, percentage=percentage, completed=self.job.completed_log)
+        try:
+            if validate_only and validation_workers is not None:
+                yield from self.validate_in_parallel(rows, validation_workers)
             else:
-                # drop invalid items
-                self.count['invalid_items'] += 1
-                logger.warning(f'"{import_row}" is invalid, skipping')
-                reasons = [f'{name} {result}' for name, result in validation.failures()]
-                self.drop_invalid(
-                    item=import_row.item,
-                    line_reference=row.line_reference,
-                    reason=f'Validation failures: {"; ".join(reasons)}'
-                )
-                yield self.progress_message(n)
-                continue
-
-            if validate_only:
-                # validation-only mode
-                yield self.progress_message(n)
-                continue
-
-            try:
-                status = import_row.update_repo()
-                self.complete(import_row, status)
-                if status == ImportedItemStatus.CREATED:
-                    self.count['created_items'] += 1
-                elif status == ImportedItemStatus.MODIFIED:
-                    self.count['updated_items'] += 1
-                elif status == ImportedItemStatus.UNCHANGED:
-                    self.count['unchanged_items'] += 1
-                    self.count['skipped_items'] += 1
-                else:
-                    raise RuntimeError(f'Unknown status "{status}" returned when importing "{import_row.item}"')
-            except JobError as e:
-                self.count['items_with_errors'] += 1
-                logger.error(f'{import_row} import failed: {e}')
-                self.drop_failed(import_row.item, row.line_reference, reason=str(e))
-
-            # update the status
-            yield self.progress_message(n)
+                for n, row in enumerate(rows, 1):
+                    if isinstance(row, InvalidRow):
+                        self.drop_invalid(item=None, line_reference=row.line_reference, reason=row.reason)
+                        self.count['invalid_items'] += 1
+                        yield self.progress_message(n)
+                        continue
+
+                    logger.debug(f'Row data: {row.data}')
+                    import_row = ImportRow(self.job, context, row, validate_only, publish)
+
+                    # count the number of files referenced in this row
+                    self.count['files'] += len(row.filenames)
+
+                    # validate metadata and files
+                    try:
+                        validation = import_row.validate_item()
+                    except RuntimeError as e:
+                        self.count['errors'] += 1
+                        logger.warning(f'"{import_row}" caused an error, skipping')
+                        self.drop_failed(
+                            item=import_row.item,
+                            line_reference=row.line_reference,
+                            reason=str(e),
+                        )
+                        yield self.progress_message(n)
+                        continue
+
+                    if validation.ok:
+                        self.count['valid_items'] += 1
+                        logger.info(f'"{import_row}" is valid')
+                    else:
+                        # drop invalid items
+                        self.count['invalid_items'] += 1
+                        logger.warning(f'"{import_row}" is invalid, skipping')
+                        self.drop_invalid(
+                            item=import_row.item,
+                            line_reference=row.line_reference,
+                            reason=get_failure_reason(validation.violations()),
+                        )
+                        yield self.progress_message(n)
+                        continue
+
+                    if validate_only:
+                        # validation-only mode
+                        yield self.progress_message(n)
+                        continue
+
+                    try:
+                        status = import_row.update_repo()
+                        self.complete(import_row, status)
+                        if status == ImportedItemStatus.CREATED:
+                            self.count['created_items'] += 1
+                        elif status == ImportedItemStatus.MODIFIED:
+                            self.count['updated_items'] += 1
+                        elif status == ImportedItemStatus.UNCHANGED:
+                            self.count['unchanged_items'] += 1
+                            self.count['skipped_items'] += 1
+                        else:
+                            raise RuntimeError(f'Unknown status "{status}" returned when importing "{import_row.item}"')
+                    except JobError as e:
+                        self.count['items_with_errors'] += 1
+                        logger.error(f'{import_row} import failed: {e}')
+                        self.drop_failed(import_row.item, row.line_reference, reason=str(e))
+
+                    # update the status
+                    yield self.progress_message(n)
+        finally:
+            self.flush_logs()
 
         if validate_only:
             # validate phase
@@ -280,6 +308,44 @@ class ImportRun:
             validation=self.job.validation_reports,
         )
 
+    def validate_in_parallel(
+            self,
+            rows: Iterable[Row | InvalidRow],
+            workers: int,
+    ) -> Generator[dict[str, Any], None, None]:
+        """Validate the rows in worker processes, updating the counts and the
+        invalid and failed item logs from their reports in row order. Yields a
+        progress message after each row."""
+        for n, (row, report) in enumerate(validate_rows(self.job, rows, workers), 1):
+            if isinstance(row, InvalidRow):
+                self.drop_invalid(item=None, line_reference=row.line_reference, reason=row.reason)
+                self.count['invalid_items'] += 1
+                yield self.progress_message(n)
+                continue
+
+            self.count['files'] += len(row.filenames)
+            if report.error is not None:
+                self.count['errors'] += 1
+                logger.warning(f'"{report}" caused an error, skipping')
+                self.drop_failed(item=report, line_reference=row.line_reference, reason=report.error)
+            elif report.ok:
+                self.count['valid_items'] += 1
+                logger.info(f'"{report}" is valid')
+            else:
+                self.count['invalid_items'] += 1
+                logger.warning(f'"{report}" is invalid, skipping')
+                self.drop_invalid(item=report, line_reference=row.line_reference, reason=report.reason)
+            yield self.progress_message(n)
+
+    def flush_logs(self):
+        """
+        Commit any pending entries in the completed item log and the dropped item logs.
+        """
+        self.job.completed_log.flush()
+        for log in (self._invalid_items, self._failed_items):
+            if log is not None:
+                log.flush()
+
     def drop_failed(self, item, line_reference, reason=''):
         """
         Add the item to the log of failed items for this run.
@@ -342,6 +408,10 @@ class ImportJob(Job):
     def metadata_file(self) -> Path:
         return self.dir / 'source.csv'
 
+    @property
+    def metadata_index_file(self) -> Path:
+        return self.dir / 'source.csv.index.json'
+
     @property
     def model_class(self):
         if self._model_class is None:
@@ -349,6 +419,8 @@ class ImportJob(Job):
         return self._model_class
 
     def store_metadata_file(self, input_file: IO):
+        # any saved index is for the previous version of the metadata file
+        self.metadata_index_file.unlink(missing_ok=True)
         with self.metadata_file.open(mode='w') as file:
             copyfileobj(input_file, file)
             logger.debug(f"Copied input file {getattr(input_file, 'name', '<>')} to {file.name}")
@@ -368,7 +440,8 @@ class ImportJob(Job):
             return MetadataSpreadsheet(
                 metadata_filename=self.metadata_file,
                 model_class=self.model_class,
-                file_grouping_strategy=self.config.file_grouping_strategy
+                file_grouping_strategy=self.config.file_grouping_strategy,
+                index_filename=self.metadata_index_file,
             )
         except MetadataError as e:
             raise JobError(job=self) from e
@@ -381,6 +454,7 @@ class ImportJob(Job):
             validate_only: bool = False,
             import_file: IO = None,
             publish: bool = False,
+            validation_workers: int = None,
     ) -> Generator[dict[str, Any], None, dict[str, Any]]:
         run = self.new_run()
         return run(
@@ -390,6 +464,7 @@ class ImportJob(Job):
             validate_only=validate_only,
             import_file=import_file,
             publish=publish,
+            validation_workers=validation_workers,
         )
 
     @property
@@ -457,7 +532,7 @@ class ImportRow:
     def __init__(
             self,
             job: ImportJob,
-            context: PlastronContext,
+            context: Optional[PlastronContext],
             row: Row,
             validate_only: bool = False,
             publish: bool = None,
@@ -465,7 +540,9 @@ class ImportRow:
         self.job = job
         self.row = row
         self.context = context
-        self.item = row.get_object(context.repo, read_from_repo=not validate_only)
+        # with no context, the item can only be validated
+        repo = context.repo if context is not None else None
+        self.item = row.get_object(repo, read_from_repo=not validate_only)
         if publish is not None:
             self._publish = publish
 
@@ -602,6 +679,134 @@ class ImportRow:
             return resource
 
 
+class RowValidationReport(NamedTuple):
+    """Compact, picklable report of the validation of a single row, as sent
+    back from a validation worker process. It has the same `identifier`,
+    `title`, and `uri` attributes as the row's item, for the dropped item logs."""
+    line_reference: LineReference
+    identifier: str
+    title: str
+    uri: str
+    ok: bool
+    violations: tuple[Violation, ...] = ()
+    error: Optional[str] = None
+    """Message from an error that prevented validation"""
+
+    def __str__(self):
+        return str(self.line_reference)
+
+    @property
+    def reason(self) -> str:
+        return self.error if self.error is not None else get_failure_reason(self.violations)
+
+    @classmethod
+    def for_row(cls, import_row: ImportRow) -> 'RowValidationReport':
+        item = import_row.item
+        details = {
+            'line_reference': import_row.row.line_reference,
+            'identifier': str(getattr(item, 'identifier', import_row.row.line_reference)),
+            'title': str(getattr(item, 'title', '')),
+            'uri': str(getattr(item, 'uri', '')),
+        }
+        try:
+            results = import_row.validate_item()
+        except RuntimeError as e:
+            return cls(**details, ok=False, error=str(e))
+        violations = tuple(
+            # values are sent as strings, since that is all the logs need
+            v._replace(value=str(v.value)) if v.value is not None else v
+            for v in results.violations()
+        )
+        return cls(**details, ok=results.ok, violations=violations)
+
+
+# per-process state of a validation worker, set up by _init_validation_worker()
+_worker_job: Optional[ImportJob] = None
+_worker_metadata: Optional[MetadataSpreadsheet] = None
+
+
+def _init_validation_worker(
+        job_id: str,
+        job_dir: Path,
+        ssh_private_key: Optional[str],
+        config: ImportConfig,
+        vocabularies_dir: Path,
+        local_vocabularies: dict[URIRef, str],
+):
+    global _worker_job, _worker_metadata
+    # a spawned process does not inherit any runtime changes to the locally
+    # available vocabularies, so use the same ones as the parent process
+    vocabularies.VOCABULARIES_DIR = vocabularies_dir
+    vocabularies.VOCABULARIES = local_vocabularies
+    _worker_job = ImportJob(job_id=job_id, job_dir=job_dir, ssh_private_key=ssh_private_key)
+    _worker_job.config = config
+    _worker_metadata = _worker_job.get_metadata()
+
+
+def _validate_lines(lines: list[tuple[LineReference, int, dict[str, str]]]) -> list[RowValidationReport]:
+    identifier_column = _worker_metadata.identifier_column
+    return [
+        RowValidationReport.for_row(ImportRow(
+            job=_worker_job,
+            context=None,
+            row=Row(_worker_metadata, line_reference, row_number, data, identifier_column),
+            validate_only=True,
+        ))
+        for line_reference, row_number, data in lines
+    ]
+
+
+def validate_rows(
+        job: ImportJob,
+        rows: Iterable[Row | InvalidRow],
+        workers: int = 0,
+        chunk_size: int = VALIDATION_CHUNK_SIZE,
+) -> Iterator[tuple[Row | InvalidRow, Optional[RowValidationReport]]]:
+    """Validate rows from the job's metadata spreadsheet in a pool of worker
+    processes, yielding each row with its `RowValidationReport` (or `None`, for
+    an `InvalidRow`) in the same order as the rows.
+
+    Only the line reference, row number, and data of each row are sent to the
+    workers, in chunks of `chunk_size` rows. Each worker builds and validates
+    the items without a repository connection. Only a bounded number of chunks
+    are in flight at once, so the rows are read from the spreadsheet as the
+    workers need them.
+
+    If `workers` is 0, it uses one worker process per CPU.
+
+    The workers are started with the "spawn" method, so they do not inherit
+    the threads, locks, or open connections of the calling process (e.g., a
+    STOMP daemon) as forked workers would.
+    """
+    workers = workers or os.cpu_count() or 1
+    rows = iter(rows)
+    logger.info(f'Validating rows in {workers} worker processes')
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_validation_worker,
+        initargs=(
+            job.id,
+            job.dir,
+            job.ssh_private_key,
+            job.config,
+            vocabularies.VOCABULARIES_DIR,
+            vocabularies.VOCABULARIES,
+        ),
+    ) as executor:
+        pending: deque[tuple[list[Row | InvalidRow], Future]] = deque()
+        while True:
+            while len(pending) < 2 * workers and (chunk := list(islice(rows, chunk_size))):
+                lines = [(row.line_reference, row.number, dict(row.data)) for row in chunk if isinstance(row, Row)]
+                pending.append((chunk, executor.submit(_validate_lines, lines)))
+            if not pending:
+                return
+            chunk, future = pending.popleft()
+            reports = iter(future.result())
+            for row in chunk:
+                yield row, (next(reports) if isinstance(row, Row) else None)
+
+
 def annotate_from_files(item, mime_types):
     for member in item.has_member.objects:
         # extract text from HTML files
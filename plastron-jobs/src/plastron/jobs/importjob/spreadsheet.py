@@ -1,14 +1,17 @@
 import csv
+import hashlib
+import json
 import logging
 import re
 from collections import defaultdict
 from collections.abc import Container, Sized
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field
 from itertools import chain
 from os.path import basename, splitext
 from pathlib import Path
 from typing import (
     Generic,
+    Iterable,
     Iterator,
     Mapping,
     NamedTuple,
@@ -22,13 +25,14 @@ from uuid import uuid4
 from plastron.files import FileGroup, FileSpec, parse_label, parse_usage_tag
 from plastron.rdfmapping.descriptors import DataProperty, Property
 from plastron.rdfmapping.embed import EmbeddedObject
-from plastron.rdfmapping.resources import RDFResourceBase, RDFResourceType
+from plastron.rdfmapping.graph import TrackChangesGraph
+from plastron.rdfmapping.resources import RDFResourceBase
 from plastron.repo import DataReadError, Repository, RepositoryResource
 from plastron.serializers.csv import (
     CSVSerializer,
     build_lookup_index,
-    flatten_headers,
-    unflatten,
+    get_column_plan,
+    unflatten_with_plan,
 )
 from plastron.utils import strtobool
 from rdflib import URIRef
@@ -65,7 +69,8 @@ class LineReference(NamedTuple):
 
 
 def build_fields(fieldnames, model_class) -> dict[str, list[ColumnSpec]]:
-    property_attrs = flatten_headers(model_class.HEADER_MAP)
+    plan = get_column_plan(model_class)
+    property_attrs = plan.attrs_by_label
     fields = defaultdict(list)
     # group typed and language-tagged columns by their property attribute
     for header in fieldnames:
@@ -87,7 +92,7 @@ def build_fields(fieldnames, model_class) -> dict[str, list[ColumnSpec]]:
             fields[attrs].append(ColumnSpec(
                 attrs=attrs,
                 header=header,
-                prop=get_final_prop(model_class, attrs.split('.')),
+                prop=plan.get_descriptor(attrs),
                 lang_code=lang_code,
                 datatype=None,
             ))
@@ -111,7 +116,7 @@ def build_fields(fieldnames, model_class) -> dict[str, list[ColumnSpec]]:
             fields[attrs].append(ColumnSpec(
                 attrs=attrs,
                 header=header,
-                prop=get_final_prop(model_class, attrs.split('.')),
+                prop=plan.get_descriptor(attrs),
                 lang_code=None,
                 datatype=datatype_uri,
             ))
@@ -121,7 +126,7 @@ def build_fields(fieldnames, model_class) -> dict[str, list[ColumnSpec]]:
                 raise DataReadError(f'Unrecognized header "{header}" in import file.')
             # check for a default datatype defined in the model
             attrs = property_attrs[header]
-            prop = get_final_prop(model_class, attrs.split('.'))
+            prop = plan.get_descriptor(attrs)
             if prop is not None and isinstance(prop, DataProperty):
                 datatype_uri = prop.datatype
             else:
@@ -136,14 +141,6 @@ def build_fields(fieldnames, model_class) -> dict[str, list[ColumnSpec]]:
     return fields
 
 
-def get_final_prop(model_class: Type[RDFResourceType], attrs: list[str]) -> Property:
-    next_attr_name = attrs.pop(0)
-    next_attr = getattr(model_class, next_attr_name)
-    if not attrs:
-        return next_attr
-    return get_final_prop(next_attr.object_class, attrs)
-
-
 def build_file_groups(filenames_string: str, grouping_strategy: str = 'rootname') -> dict[str, FileGroup]:
     """Parses a string containing zero or more file paths with optional
     labels into a dictionary whose values are `FileGroup` objects, and
@@ -253,6 +250,149 @@ def create_embedded_object(attr: str, item: RDFResourceBase) -> tuple[str, RDFRe
     return fragment_id, obj
 
 
+@dataclass
+class SpreadsheetIndex:
+    """Summary of a metadata CSV file, built in a single streaming pass over
+    the file, that allows the spreadsheet to be counted, subsetted, and
+    randomly accessed without reading the whole file again.
+
+    Rows are numbered starting from 1 (the first row after the header row).
+    Completely blank lines are skipped, the same as `csv.DictReader`."""
+
+    size: int
+    """Size of the file, in bytes, at the time the index was built"""
+    mtime_ns: int
+    """Modification time of the file, in nanoseconds, at the time the index was built"""
+    sha256: str
+    """Hex digest of the SHA-256 hash of the file contents"""
+    identifier_column: Optional[str]
+    """Name of the column the `identifiers` were taken from"""
+    fieldnames: list[str] = field(default_factory=list)
+    offsets: list[int] = field(default_factory=list)
+    """Byte offset of the start of each row"""
+    identifiers: list[str] = field(default_factory=list)
+    """Value of the identifier column for each row"""
+    file_count: int = 0
+    """Total number of file references in the `FILES` and `ITEM_FILES` columns"""
+
+    @property
+    def total(self) -> int:
+        return len(self.offsets)
+
+    @classmethod
+    def build(cls, filename: Path | str, identifier_column: str = None) -> 'SpreadsheetIndex':
+        path = Path(filename)
+        stat = path.stat()
+        digest = hashlib.sha256()
+        offset = 0
+
+        def lines(fh) -> Iterator[str]:
+            nonlocal offset
+            for line in fh:
+                digest.update(line)
+                offset += len(line)
+                yield line.decode()
+
+        with path.open(mode='rb') as fh:
+            reader = csv.reader(lines(fh))
+            fieldnames = next(reader, [])
+            index = cls(
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+                sha256='',
+                identifier_column=identifier_column,
+                fieldnames=fieldnames,
+            )
+            id_position = fieldnames.index(identifier_column) if identifier_column in fieldnames else None
+            file_positions = [fieldnames.index(h) for h in ('FILES', 'ITEM_FILES') if h in fieldnames]
+            while True:
+                row_offset = offset
+                try:
+                    values = next(reader)
+                except StopIteration:
+                    break
+                if not values:
+                    continue
+                index.offsets.append(row_offset)
+                index.identifiers.append(
+                    values[id_position] if id_position is not None and id_position < len(values) else ''
+                )
+                for position in file_positions:
+                    if position < len(values) and values[position].strip():
+                        index.file_count += len(values[position].split(';'))
+            # include any trailing bytes not consumed by the reader
+            for line in fh:
+                digest.update(line)
+        index.sha256 = digest.hexdigest()
+        return index
+
+    @classmethod
+    def load(cls, filename: Path | str) -> 'SpreadsheetIndex':
+        with Path(filename).open() as fh:
+            return cls(**json.load(fh))
+
+    def save(self, filename: Path | str):
+        with Path(filename).open(mode='w') as fh:
+            json.dump(asdict(self), fh)
+
+    def is_current(self, filename: Path | str, identifier_column: str = None, verify: bool = False) -> bool:
+        """Returns `True` if the index used the same identifier column, and the file
+        still has the same size and modification time as when this index was built.
+
+        If the modification time has changed (e.g., the file was copied or
+        touched), or if `verify` is `True`, the contents of the file are compared
+        instead, by their SHA-256 hash. Hashing the file is a single read, much
+        cheaper than parsing it again, and unlike the modification time it cannot
+        miss a change made within the timestamp resolution of the file system."""
+        path = Path(filename)
+        stat = path.stat()
+        if self.identifier_column != identifier_column or self.size != stat.st_size:
+            return False
+        if self.mtime_ns == stat.st_mtime_ns and not verify:
+            return True
+        digest = hashlib.sha256()
+        with path.open(mode='rb') as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b''):
+                digest.update(chunk)
+        return self.sha256 == digest.hexdigest()
+
+    @classmethod
+    def for_file(
+            cls,
+            filename: Path | str,
+            identifier_column: str = None,
+            index_filename: Path | str = None,
+            verify: bool = False,
+    ) -> 'SpreadsheetIndex':
+        """Get the index for `filename`. If `index_filename` is given and contains an
+        index that is still current (see `is_current()`, which `verify` is passed
+        to), load and return it. Otherwise, build a new index, and save it to
+        `index_filename` (if given)."""
+        if index_filename is not None and Path(index_filename).exists():
+            try:
+                index = cls.load(index_filename)
+                if index.is_current(filename, identifier_column, verify=verify):
+                    mtime_ns = Path(filename).stat().st_mtime_ns
+                    if index.mtime_ns != mtime_ns:
+                        # same contents with a new modification time; record it,
+                        # so the file does not have to be hashed again next time
+                        index.mtime_ns = mtime_ns
+                        index._save(index_filename)
+                    return index
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning(f'Unable to load spreadsheet index {index_filename}: {e}')
+        index = cls.build(filename, identifier_column)
+        if index_filename is not None:
+            index._save(index_filename)
+        return index
+
+    def _save(self, filename: Path | str):
+        try:
+            self.save(filename)
+        except OSError as e:
+            logger.warning(f'Unable to save spreadsheet index {filename}: {e}')
+
+
 class Bucket(Sized, Container, Protocol):
     pass
 
@@ -289,28 +429,33 @@ class Row(Generic[ModelType]):
     def get_object(self, repo: Repository, read_from_repo: bool = False) -> ModelType:
         """Gets an RDF resource to be imported, based on the metadata in this row.
 
-        :param repo: the repository configuration
+        :param repo: the repository configuration; if `None`, the object is
+                    built in a new, empty graph (e.g., for validating in a
+                    process that has no repository connection)
         :param read_from_repo: If true, will fetch existing object from the
                     repository.
         """
-        if self.uri is not None:
+        if repo is None:
+            graph = TrackChangesGraph()
+        elif self.uri is not None:
             # resource with the URI from the spreadsheet
             resource = repo[self.uri]
             if read_from_repo:
                 # unless we are only validating,
                 # read the object from the repo
                 resource.read()
+            graph = resource.graph
         else:
             # no URI in the CSV means we will create a new object
             logger.info(f'No URI found for {self.line_reference}; will create new resource')
             # create a new object (will create in the repo later)
-            resource = RepositoryResource(repo=repo)
+            graph = RepositoryResource(repo=repo).graph
 
         # build the lookup index to map hash URI objects
         # to their correct positional locations
         row_index = build_lookup_index(self.index_string)
-        params = unflatten(self.data, self.spreadsheet.model_class, self.spreadsheet.model_class.HEADER_MAP, row_index)
-        item: ModelType = self.spreadsheet.model_class(uri=self.uri, graph=resource.graph)
+        params = unflatten_with_plan(self.data, get_column_plan(self.spreadsheet.model_class), row_index)
+        item: ModelType = self.spreadsheet.model_class(uri=self.uri, graph=graph)
         item.set_properties(**params)
 
         return item
@@ -367,7 +512,13 @@ class MetadataSpreadsheet(Generic[ModelType]):
     Iterable sequence of rows from the metadata CSV file of an import job.
     """
 
-    def __init__(self, metadata_filename: Path | str, model_class: Type[ModelType], file_grouping_strategy: str = 'rootname'):
+    def __init__(
+            self,
+            metadata_filename: Path | str,
+            model_class: Type[ModelType],
+            file_grouping_strategy: str = 'rootname',
+            index_filename: Path | str = None,
+    ):
         self.metadata_filename = metadata_filename
         self.metadata_file = None
         self.model_class = model_class
@@ -393,18 +544,38 @@ class MetadataSpreadsheet(Generic[ModelType]):
         self.row_count = 0
         self.errors = 0
 
+        self.index: Optional[SpreadsheetIndex] = None
         if self.metadata_file.seekable():
-            # get the row count of the file, then rewind the CSV file
-            self.total = sum(1 for _ in self.csv_file)
-            self._rewind_csv_file()
+            # get the row count of the file (and the offsets of each row) from
+            # the index, which is only built if there is no current saved index
+            self.index = SpreadsheetIndex.for_file(
+                filename=metadata_filename,
+                identifier_column=self.identifier_column,
+                index_filename=index_filename,
+            )
+            self.total = self.index.total
         else:
             # file is not seekable, so we can't get a row count in advance
             self.total = None
 
-    def _rewind_csv_file(self):
-        # rewind the file and re-create the CSV reader
-        self.metadata_file.seek(0)
-        self.csv_file = csv.DictReader(self.metadata_file)
+    def get_line(self, row_number: int) -> dict[str, str]:
+        """Read a single row, by seeking directly to its position in the file.
+        Requires a seekable file."""
+        if self.index is None:
+            raise RuntimeError('Cannot seek to a row in a non-seekable file')
+        try:
+            offset = self.index.offsets[row_number - 1]
+        except IndexError:
+            raise IndexError(f'Row {row_number} not found in {self.metadata_filename}')
+        self.metadata_file.seek(offset)
+        return next(csv.DictReader(self.metadata_file, fieldnames=self.fieldnames))
+
+    def _lines(self, row_numbers: Iterable[int] = None) -> Iterator[tuple[int, dict[str, str]]]:
+        if row_numbers is None:
+            yield from enumerate(self.csv_file, 1)
+        else:
+            for row_number in row_numbers:
+                yield row_number, self.get_line(row_number)
 
     @property
     def has_binaries(self) -> bool:
@@ -448,30 +619,35 @@ class MetadataSpreadsheet(Generic[ModelType]):
         if completed is None:
             completed = []
 
+        row_numbers = None
         if percentage is not None:
-            if not self.metadata_file.seekable():
+            if self.index is None:
                 raise RuntimeError('Cannot execute a percentage load using a non-seekable file')
-            identifier_column = self.model_class.HEADER_MAP['identifier']
-            identifiers = [
-                row[identifier_column] for row in self.csv_file if row[identifier_column] not in completed
+            candidates = [
+                (row_number, identifier)
+                for row_number, identifier in enumerate(self.index.identifiers, 1)
+                if identifier not in completed
             ]
-            self._rewind_csv_file()
 
-            if len(identifiers) == 0:
+            if len(candidates) == 0:
                 logger.info('No items remaining to load')
                 self.subset_to_load = []
+                row_numbers = []
             else:
                 target_count = int(((percentage / 100) * self.total))
                 logger.info(f'Attempting to load {target_count} items ({percentage}% of {self.total})')
-                if len(identifiers) > target_count:
+                if len(candidates) > target_count:
                     # evenly space the items to load among the remaining items
                     step_size = int((100 * (1 - (len(completed) / self.total))) / percentage)
                 else:
                     # load all remaining items
                     step_size = 1
-                self.subset_to_load = identifiers[::step_size]
+                subset = candidates[::step_size]
+                self.subset_to_load = [identifier for _, identifier in subset]
+                # seek directly to just the rows in the subset
+                row_numbers = [row_number for row_number, _ in subset]
 
-        for row_number, line in enumerate(self.csv_file, 1):
+        for row_number, line in self._lines(row_numbers):
             if limit is not None and row_number > limit:
                 logger.info(f'Stopping after {limit} rows')
                 break
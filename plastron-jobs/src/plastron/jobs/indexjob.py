@@ -0,0 +1,80 @@
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Generator, Mapping, Optional
+
+from rdflib import URIRef
+
+from plastron.rdfmapping.resources import RDFResource
+from plastron.repo import Repository, RepositoryError, Tombstone
+from plastron.repo.indexing import SolrDocumentMapping, SolrIndexer, get_default_mappings, get_mapping
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IndexJob:
+    """Index repository resources directly into Solr, without sending a
+    reindexing message per resource.
+
+    Each resource (and any resources found by following the `traverse`
+    predicates) is read from the repository, matched to a content model in
+    `mappings`, converted to a Solr document, and handed to the `indexer`,
+    which sends them in batches and commits once at the end. Resources that do
+    not match any mapping are skipped.
+    """
+    repo: Repository
+    indexer: SolrIndexer
+    uris: list[str]
+    traverse: list[URIRef] = None
+    mappings: Mapping[str, SolrDocumentMapping] = field(default_factory=get_default_mappings)
+
+    def document_for(self, resource) -> Optional[dict[str, Any]]:
+        description = resource.describe(RDFResource)
+        mapping = get_mapping(description, self.mappings)
+        if mapping is None:
+            return None
+        return mapping.to_document(resource.describe(mapping.model))
+
+    def run(self) -> Generator[dict[str, Any], None, dict[str, Any]]:
+        count = Counter(total=len(self.uris), resources=0, sent=0, skipped=0, errors=0)
+        errors: dict[str, str] = {}
+        with self.indexer:
+            for n, uri in enumerate(self.uris, 1):
+                try:
+                    for resource in self.repo[uri].walk(traverse=self.traverse or []):
+                        if isinstance(resource, Tombstone):
+                            continue
+                        count['resources'] += 1
+                        document = self.document_for(resource)
+                        if document is None:
+                            logger.debug(f'No Solr mapping for {resource.url}; skipping')
+                            count['skipped'] += 1
+                            continue
+                        self.indexer.add(document)
+                        count['sent'] += 1
+                except RepositoryError as e:
+                    logger.error(f'Unable to index {uri}: {e}')
+                    count['errors'] += 1
+                    errors[uri] = str(e)
+
+                yield {
+                    'count': count,
+                    'state': 'index_in_progress',
+                    'progress': int(n / count['total'] * 100),
+                }
+
+        report = self.indexer.report
+        failures = {failure.id: failure.reason for failure in report.failures}
+        state = 'index_complete' if report.ok and not errors else 'index_incomplete'
+        return {
+            'type': state,
+            'state': state,
+            'count': {**count, 'indexed': report.indexed, 'failed': len(failures)},
+            'batches': report.batches,
+            'retries': report.retries,
+            'committed': report.committed,
+            'failures': failures,
+            'errors': errors,
+            'progress': 100,
+        }
@@ -1,9 +1,12 @@
 import collections.abc
 import csv
+import json
 import logging
+import sqlite3
+import threading
 from abc import ABC
 from pathlib import Path
-from typing import Sequence
+from typing import Any, Iterator, Optional, Sequence
 
 logger = logging.getLogger(__name__)
 
@@ -122,5 +125,395 @@ class ItemLog(AppendableSequence):
         raise IndexError(item)
 
 
+# extra files that SQLite creates alongside a database in WAL mode
+WAL_SUFFIXES = ('-wal', '-shm')
+
+
+class SQLiteItemLog(AppendableSequence):
+    """Log with the same interface and CSV file format as `ItemLog`, but
+    backed by an SQLite database (in WAL mode) that is indexed by the key
+    field. Containment checks, length, and indexing by position are answered
+    by the database, so opening an existing log does not require reading all
+    of its rows into memory.
+
+    Appended rows are buffered, and written to the database in a single
+    transaction (a "group commit") once `batch_size` rows are pending, or
+    by a timer `flush_interval` seconds after the first of them was appended,
+    whichever comes first. So even if no more rows are appended (e.g., while
+    a slow item is being processed), a row is never left uncommitted for
+    longer than `flush_interval`. Each committed
+    batch is then appended to the CSV file, which is kept as a mirror of the
+    database. The database records how many rows have been mirrored, so if
+    the process stops between the two writes, the missing CSV rows are
+    appended the next time rows are appended to the log.
+
+    The CSV file is the canonical copy of the log. The database records the
+    size and modification time of the CSV file after each write to it; if
+    they no longer match (e.g., because the CSV file has been edited, or
+    deleted), the database is rebuilt from the CSV file, so deleting the CSV
+    file resets the log. If there is a CSV file but no database (e.g., for a
+    log created by `ItemLog`), the database is populated from it in the same
+    way.
+
+    Only a log that is being appended to writes to the CSV file or the
+    database. A log that is only read from (e.g., to check whether an item
+    has been completed) never changes either file, so it can be safely
+    opened while another process is appending to the same log. If the
+    database is missing or out of date, reading uses a temporary in-memory
+    copy of the CSV file instead.
+
+    Call `flush()` or `close()` when finished appending, to commit any
+    rows that are still pending.
+    """
+    def __init__(
+            self,
+            filename: str | Path,
+            fieldnames: Sequence[str],
+            keyfield: str,
+            header: bool = True,
+            db_filename: str | Path = None,
+            batch_size: int = 100,
+            flush_interval: float = 1.0,
+    ):
+        self.filename: Path = Path(filename)
+        self.db_filename: Path = Path(db_filename or self.filename.with_name(self.filename.name + '.sqlite'))
+        self.fieldnames: Sequence[str] = fieldnames
+        self.keyfield: str = keyfield
+        self.write_header: bool = header
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._connection: Optional[sqlite3.Connection] = None
+        self._writing = False
+        self._length: Optional[int] = None
+        self._pending: list[dict[str, str]] = []
+        self._pending_keys: set[str] = set()
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+
+    def exists(self) -> bool:
+        """Returns `True` if the CSV log file exists."""
+        return self.filename.is_file()
+
+    def create(self):
+        """Create the CSV log file and an empty database. This will overwrite an
+        existing log. If `write_header` is `True`, it will also write a header row
+        to the CSV file."""
+        with self._lock:
+            self.close()
+            self._remove_db()
+            self._write_csv_header()
+            self._open_for_writing()
+
+    def _remove_db(self):
+        self.db_filename.unlink(missing_ok=True)
+        for suffix in WAL_SUFFIXES:
+            self.db_filename.with_name(self.db_filename.name + suffix).unlink(missing_ok=True)
+
+    def _write_csv_header(self):
+        with self.filename.open(mode='w') as fh:
+            writer = csv.DictWriter(fh, fieldnames=self.fieldnames)
+            if self.write_header:
+                writer.writeheader()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Connection to the database, which is opened (for reading only) the
+        first time it is needed."""
+        with self._lock:
+            if self._connection is None:
+                self._connect()
+            return self._connection
+
+    def _connect(self):
+        # open for reading; the database is only used if it is up-to-date with
+        # the CSV file, and otherwise the CSV file is read into memory
+        if self.db_filename.exists() and self.exists():
+            self._connection = self._open_db(self.db_filename)
+            if self._is_current():
+                self._length = self._count_keys()
+                return
+            self._connection.close()
+        self._connection = self._open_db(':memory:')
+        if self.exists():
+            self._import_csv()
+        self._length = self._count_keys()
+
+    def _open_for_writing(self):
+        # only the log that is being appended to writes to the database and
+        # the CSV file; this also rebuilds the database if it is out of date
+        if self._writing:
+            return
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        if self.db_filename.exists():
+            self._connection = self._open_db(self.db_filename)
+            if not self._is_current():
+                logger.info(f'{self.filename} has changed; discarding {self.db_filename}')
+                self._connection.close()
+                self._connection = None
+                self._remove_db()
+        if self._connection is None:
+            self._connection = self._open_db(self.db_filename)
+            if self.exists():
+                try:
+                    self._import_csv()
+                except ItemLogError:
+                    self._remove_db()
+                    raise
+            else:
+                self._write_csv_header()
+                self._set_mirrored(0)
+                self._set_csv_stat()
+        self._writing = True
+        self._length = self._count_keys()
+        self._sync_csv()
+
+    def _open_db(self, database: str | Path) -> sqlite3.Connection:
+        connection = sqlite3.connect(database, check_same_thread=False, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS items (seq INTEGER PRIMARY KEY, key TEXT NOT NULL, data TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS items_key ON items (key);
+            CREATE TABLE IF NOT EXISTS keys (key TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS state (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            """
+        )
+        return connection
+
+    def _count_keys(self) -> int:
+        return self._connection.execute('SELECT COUNT(*) FROM keys').fetchone()[0]
+
+    def _get_state(self, name: str) -> Optional[int]:
+        row = self._connection.execute('SELECT value FROM state WHERE name = ?', (name,)).fetchone()
+        return row[0] if row is not None else None
+
+    def _set_state(self, name: str, value: int):
+        self._connection.execute('INSERT OR REPLACE INTO state (name, value) VALUES (?, ?)', (name, value))
+
+    def _is_current(self) -> bool:
+        # the database is up-to-date if the CSV file has not changed since it was last written to
+        try:
+            stat = self.filename.stat()
+        except FileNotFoundError:
+            return False
+        return (self._get_state('csv_size'), self._get_state('csv_mtime_ns')) == (stat.st_size, stat.st_mtime_ns)
+
+    def _set_csv_stat(self):
+        stat = self.filename.stat()
+        self._set_state('csv_size', stat.st_size)
+        self._set_state('csv_mtime_ns', stat.st_mtime_ns)
+
+    def _import_csv(self):
+        logger.info(f'Loading {self.filename} into the database')
+        batch = []
+        # record the state of the CSV file before it is read, so that any
+        # changes made while it is being read are detected next time
+        stat = self.filename.stat()
+        with self.filename.open(mode='r') as fh:
+            reader = csv.DictReader(fh)
+            if not reader.fieldnames == self.fieldnames:
+                logger.warning(
+                    f'Fieldnames in {self.filename} do not match expected fieldnames; '
+                    f'expected: {self.fieldnames}; found: {reader.fieldnames}'
+                )
+            for n, row in enumerate(reader, 1):
+                if self.keyfield not in row:
+                    self._connection.close()
+                    self._connection = None
+                    raise ItemLogError(f'Key {self.keyfield!r} not found in row {n}')
+                batch.append(row)
+                if len(batch) >= 10_000:
+                    self._insert(batch, mirrored=True)
+                    batch = []
+        self._insert(batch, mirrored=True)
+        self._set_state('csv_size', stat.st_size)
+        self._set_state('csv_mtime_ns', stat.st_mtime_ns)
+
+    def _insert(self, rows: list[dict[str, str]], mirrored: bool = False):
+        """Insert `rows` in a single transaction."""
+        connection = self._connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for row in rows:
+                connection.execute(
+                    'INSERT INTO items (key, data) VALUES (?, ?)',
+                    (row[self.keyfield], json.dumps(row)),
+                )
+                connection.execute('INSERT OR IGNORE INTO keys (key) VALUES (?)', (row[self.keyfield],))
+            if mirrored:
+                self._set_mirrored(self._max_seq())
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def _max_seq(self) -> int:
+        return self._connection.execute('SELECT COALESCE(MAX(seq), 0) FROM items').fetchone()[0]
+
+    def _set_mirrored(self, seq: int):
+        self._set_state('mirrored', seq)
+
+    def _sync_csv(self):
+        """Append any rows that are in the database but not yet in the CSV file."""
+        mirrored = self._get_state('mirrored') or 0
+        query = 'SELECT seq, data FROM items WHERE seq > ? ORDER BY seq'
+        rows = self._connection.execute(query, (mirrored,)).fetchall()
+        if not rows:
+            return
+        with self.filename.open(mode='a') as fh:
+            writer = csv.DictWriter(fh, fieldnames=self.fieldnames)
+            for _, data in rows:
+                writer.writerow(json.loads(data))
+        self._connection.execute('BEGIN IMMEDIATE')
+        self._set_mirrored(rows[-1][0])
+        self._set_csv_stat()
+        self._connection.execute('COMMIT')
+
+    def _normalize(self, row: dict[str, Any]) -> dict[str, str]:
+        extra = row.keys() - set(self.fieldnames)
+        if extra:
+            raise ValueError(f'dict contains fields not in fieldnames: {", ".join(repr(k) for k in extra)}')
+        # store the values the same way they will be read back from the CSV file
+        return {name: '' if row.get(name) is None else str(row[name]) for name in self.fieldnames}
+
+    def append(self, row):
+        """Add this `row` to the log. The row is committed to the database and
+        written to the CSV file once the current batch is full, or the flush
+        interval has passed since the first pending row was appended."""
+        with self._lock:
+            self._open_for_writing()
+            normalized = self._normalize(row)
+            if normalized[self.keyfield] not in self._pending_keys and normalized[self.keyfield] not in self:
+                self._length += 1
+            self._pending.append(normalized)
+            self._pending_keys.add(normalized[self.keyfield])
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.start()
+
+    def writerow(self, row):
+        """Alias for `append`"""
+        self.append(row)
+
+    def flush(self):
+        """Commit any pending rows to the database, and then write them to the CSV file."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            self._insert(self._pending)
+            self._pending = []
+            self._pending_keys = set()
+            self._sync_csv()
+
+    def close(self):
+        """Flush any pending rows and close the database connection."""
+        with self._lock:
+            if self._connection is not None:
+                self.flush()
+                self._connection.close()
+                self._connection = None
+                self._writing = False
+                self._length = None
+
+    def remove(self):
+        """Close the log, and delete its CSV file and database."""
+        with self._lock:
+            self._pending = []
+            self._pending_keys = set()
+            self.close()
+            self._remove_db()
+            self.filename.unlink(missing_ok=True)
+
+    def export_csv(self, filename: str | Path):
+        """Write the entire log to a new CSV file, in the same format as the
+        CSV file maintained by this log."""
+        with Path(filename).open(mode='w') as fh:
+            writer = csv.DictWriter(fh, fieldnames=self.fieldnames)
+            if self.write_header:
+                writer.writeheader()
+            writer.writerows(self)
+
+    def _is_empty(self) -> bool:
+        # reading from a log that has never been written to should
+        # not create any files
+        return self._connection is None and not self.exists() and not self.db_filename.exists()
+
+    def __contains__(self, other):
+        with self._lock:
+            if other in self._pending_keys:
+                return True
+            if self._is_empty():
+                return False
+            return self.connection.execute('SELECT 1 FROM keys WHERE key = ?', (other,)).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            if self._is_empty():
+                return 0
+            _ = self.connection
+            return self._length
+
+    def _select_in_chunks(self, query: str, chunk_size: int = 1000) -> Iterator[tuple]:
+        # read the rows in chunks, instead of holding a cursor open (and the lock)
+        # while the caller consumes them; the first column must be an increasing
+        # sort key, and the query must have "?" parameters for the last value
+        # of the sort key and the chunk size
+        last = 0
+        while True:
+            with self._lock:
+                if self._is_empty():
+                    return
+                self.flush()
+                rows = self.connection.execute(query, (last, chunk_size)).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last = rows[-1][0]
+
+    def __iter__(self) -> Iterator[dict[str, str]]:
+        query = 'SELECT seq, data FROM items WHERE seq > ? ORDER BY seq LIMIT ?'
+        for _, data in self._select_in_chunks(query):
+            yield json.loads(data)
+
+    def __getitem__(self, item: int) -> dict[str, str]:
+        if not isinstance(item, int) or item < 0:
+            raise IndexError(item)
+        with self._lock:
+            if self._is_empty():
+                raise IndexError(item)
+            self.flush()
+            # rows are never deleted, so seq is always 1 greater than the position
+            row = self.connection.execute('SELECT data FROM items WHERE seq = ?', (item + 1,)).fetchone()
+        if row is None:
+            raise IndexError(item)
+        return json.loads(row[0])
+
+    def get(self, key: str, default=None) -> Optional[dict[str, str]]:
+        """Returns the most recently logged row with the given `key`, or `default`
+        if there is no such row."""
+        with self._lock:
+            if self._is_empty():
+                return default
+            self.flush()
+            row = self.connection.execute(
+                'SELECT data FROM items WHERE key = ? ORDER BY seq DESC LIMIT 1', (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else default
+
+    def keys(self) -> Iterator[str]:
+        """Iterator over the distinct keys in the log."""
+        query = 'SELECT rowid, key FROM keys WHERE rowid > ? ORDER BY rowid LIMIT ?'
+        for _, key in self._select_in_chunks(query):
+            yield key
+
+
 class ItemLogError(Exception):
     pass
@@ -1,13 +1,17 @@
 import logging
-from collections import Counter
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
 from typing import Generator, Any, Mapping
 
 from plastron.context import PlastronContext
+from plastron.handles import CachingHandleServiceClient
 from plastron.jobs import Job
+from plastron.jobs.logs import AppendableSequence, NullLog
 from plastron.repo import RepositoryError
 from plastron.repo.publish import PublishableResource
+from plastron.utils import datetimestamp
 
 logger = logging.getLogger(__name__)
 
@@ -32,8 +36,49 @@ class PublicationJob(Job):
     action: PublicationAction
     force_hidden: bool = False
     force_visible: bool = False
+    max_workers: int = 8
+    completed: AppendableSequence = None
+    """Log of the URIs that have been published or unpublished; URIs that are
+    already in it are skipped, so an interrupted job can be resumed"""
+
+    def process(self, uri: str, handle_client: CachingHandleServiceClient = None) -> tuple[bool, dict[str, str]]:
+        """Publish or unpublish a single resource. Returns a tuple of a success flag
+        and the result dictionary for that resource."""
+        try:
+            resource: PublishableResource = self.context.repo[uri:PublishableResource].read()
+
+            if self.action == PublicationAction.PUBLISH:
+                handle = resource.publish(
+                    handle_client=handle_client,
+                    public_url=self.context.get_public_url(resource),
+                    force_hidden=self.force_hidden,
+                    force_visible=self.force_visible,
+                )
+                return True, {
+                    'uri': uri,
+                    'handle': str(handle),
+                    'status': resource.publication_status,
+                }
+            elif self.action == PublicationAction.UNPUBLISH:
+                resource.unpublish(
+                    force_hidden=self.force_hidden,
+                    force_visible=self.force_visible,
+                )
+                return True, {
+                    'uri': uri,
+                    'status': resource.publication_status,
+                }
+            else:
+                logger.error(f'Unknown action: {self.action}')
+                return False, {'error': f'Unknown action: {self.action}'}
+
+        except RepositoryError as e:
+            logger.error(str(e))
+            return False, {'error': str(e)}
 
     def run(self) -> Generator[dict[str, Any], None, dict[str, Any]]:
+        if self.completed is None:
+            self.completed = NullLog()
         count = Counter(
             total=len(self.uris),
             done=0,
@@ -44,49 +89,59 @@ class PublicationJob(Job):
             'state': 'publish_in_progress',
             'progress': 0,
         }
-        for n, uri in enumerate(self.uris, 1):
-            try:
-                resource: PublishableResource = self.context.repo[uri:PublishableResource].read()
-
-                if self.action == PublicationAction.PUBLISH:
-                    handle = resource.publish(
-                        handle_client=self.context.handle_client,
-                        public_url=self.context.get_public_url(resource),
-                        force_hidden=self.force_hidden,
-                        force_visible=self.force_visible,
-                    )
-                    count['done'] += 1
-                    result = {
-                        'uri': uri,
-                        'handle': str(handle),
-                        'status': resource.publication_status,
-                    }
-                elif self.action == PublicationAction.UNPUBLISH:
-                    resource.unpublish(
-                        force_hidden=self.force_hidden,
-                        force_visible=self.force_visible,
-                    )
-                    count['done'] += 1
-                    result = {
-                        'uri': uri,
-                        'status': resource.publication_status,
-                    }
-                else:
-                    logger.error(f'Unknown action: {self.action}')
-                    count['errors'] += 1
-                    result = {'error': f'Unknown action: {self.action}'}
-
-            except RepositoryError as e:
-                logger.error(str(e))
-                result = {'error': str(e)}
+
+        def record(ok: bool, result: dict[str, str]):
+            if ok:
+                count['done'] += 1
+                self.completed.append({**result, 'timestamp': datetimestamp(digits_only=False)})
+            else:
                 count['errors'] += 1
 
-            yield {
-                'count': count,
-                'result': result,
-                'state': 'publish_in_progress',
-                'progress': int(n / count['total'] * 100)
-            }
+        # check the completed log before making any requests
+        uris = []
+        for uri in self.uris:
+            if uri in self.completed:
+                logger.info(f'Resource {uri} has already been processed; skipping')
+                count['done'] += 1
+            else:
+                uris.append(uri)
+
+        handle_client = None
+        if self.action == PublicationAction.PUBLISH:
+            # cache handle lookups for the duration of this job; the handle
+            # service has no bulk lookup, so each worker looks up its own
+            handle_client = CachingHandleServiceClient(self.context.handle_client)
+
+        uris = iter(uris)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=__name__) as executor:
+            # keep the number of queued resources bounded, and report the
+            # results in the same order as the URIs
+            pending: deque[Future] = deque()
+            try:
+                while True:
+                    while len(pending) < 2 * self.max_workers and (uri := next(uris, None)) is not None:
+                        pending.append(executor.submit(self.process, uri, handle_client))
+                    if not pending:
+                        break
+                    ok, result = pending.popleft().result()
+                    record(ok, result)
+
+                    yield {
+                        'count': count,
+                        'result': result,
+                        'state': 'publish_in_progress',
+                        'progress': int((count['done'] + count['errors']) / count['total'] * 100)
+                    }
+            except GeneratorExit:
+                # the job was closed early: drop the resources that have not
+                # started, and record the ones that were already in progress,
+                # so that a resumed job skips them
+                executor.shutdown(wait=True, cancel_futures=True)
+                for future in pending:
+                    if not future.cancelled() and future.exception() is None:
+                        record(*future.result())
+                logger.warning(f'Publication job stopped after {count["done"]} of {count["total"]} resource(s)')
+                raise
 
         state = PublicationAction.get_final_state(self.action, count)
         return {
@@ -0,0 +1,141 @@
+import logging
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Generator, Iterator, Mapping, Optional, Union
+
+from rdflib import URIRef
+
+from plastron.messaging.broker import BatchPublisher, Destination
+from plastron.messaging.messages import Message
+from plastron.rdfmapping.resources import RDFResource
+from plastron.repo import Repository, RepositoryError, RepositoryResource, Tombstone
+
+logger = logging.getLogger(__name__)
+
+
+def visit(
+        repo: Repository,
+        uri: str,
+        traverse: list[URIRef],
+) -> tuple[Optional[Union[RepositoryResource, Tombstone]], list[str]]:
+    """Read a single resource, and return it (or its tombstone) along with the
+    URIs found by following the `traverse` predicates from it."""
+    resource = repo[uri]
+    if resource.is_gone:
+        return Tombstone(resource), []
+    if not resource.exists:
+        logger.error(f'{resource.url} (or its tombstone) not found')
+        return None, []
+    resource.read()
+    subject = URIRef(resource.url)
+    return resource, [str(o) for _, p, o in resource.graph.triples((subject, None, None)) if p in traverse]
+
+
+def walk_concurrently(
+        repo: Repository,
+        uris: list[str],
+        traverse: list[URIRef] = None,
+        max_workers: int = 4,
+) -> Iterator[Union[RepositoryResource, Tombstone]]:
+    """Like `RepositoryResource.walk(include_tombstones=True)`, starting from
+    each of `uris`, but reading up to `max_workers` resources at a time.
+    Resources are yielded in the order they are read, not in tree order, and
+    each resource is visited at most once."""
+    traverse = traverse or []
+    queue = deque(uris)
+    seen = set(uris)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=__name__) as executor:
+        futures: set[Future] = set()
+        while queue or futures:
+            while queue and len(futures) < 2 * max_workers:
+                futures.add(executor.submit(visit, repo, queue.popleft(), traverse))
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                resource, children = future.result()
+                for child in children:
+                    if child not in seen:
+                        seen.add(child)
+                        queue.append(child)
+                if resource is not None:
+                    yield resource
+
+
+@dataclass
+class ReindexJob:
+    """Send a reindexing message for each resource (and any resources found by
+    following the `traverse` predicates), or an indexing delete message for
+    each tombstone.
+
+    The repository is walked by up to `max_workers` threads, while the
+    messages are sent from the calling thread through the `publisher`, which
+    groups them into STOMP transactions and paces them.
+    """
+    repo: Repository
+    publisher: BatchPublisher
+    reindexing_queue: Destination
+    indexing_queue: Destination
+    uris: list[str]
+    traverse: list[URIRef] = None
+    routing_headers: Mapping[str, str] = field(default_factory=dict)
+    username: str = 'plastron'
+    max_workers: int = 4
+
+    def message_for(self, resource: Union[RepositoryResource, Tombstone]) -> tuple[Destination, Message]:
+        if isinstance(resource, Tombstone):
+            logger.info(f'Resource {resource.url} has been removed, sending message to delete from indexes')
+            return self.indexing_queue, Message(
+                headers={
+                    'CamelFcrepoEventName': 'delete',
+                    'CamelFcrepoUri': resource.url,
+                    'CamelFcrepoPath': resource.path,
+                    'CamelFcrepoUser': self.username,
+                    **self.routing_headers,
+                },
+                persistent='true',
+            )
+        types = ','.join(resource.describe(RDFResource).rdf_type.values)
+        return self.reindexing_queue, Message(
+            headers={
+                'CamelFcrepoUri': resource.url,
+                'CamelFcrepoPath': resource.path,
+                'CamelFcrepoResourceType': types,
+                'CamelFcrepoUser': self.username,
+                **self.routing_headers,
+            },
+            persistent='true',
+        )
+
+    def run(self) -> Generator[dict[str, Any], None, dict[str, Any]]:
+        count = Counter(resources=0, deleted=0)
+        transactions = self.publisher.transactions
+        try:
+            with self.publisher:
+                for resource in walk_concurrently(self.repo, self.uris, self.traverse, self.max_workers):
+                    logger.info(f'Reindexing {resource.url}')
+                    destination, message = self.message_for(resource)
+                    self.publisher.send(destination, message)
+                    count['deleted' if isinstance(resource, Tombstone) else 'resources'] += 1
+                    if self.publisher.transactions > transactions:
+                        # report progress once per committed batch
+                        transactions = self.publisher.transactions
+                        yield {
+                            'count': {**count, 'sent': self.publisher.sent},
+                            'state': 'reindex_in_progress',
+                        }
+        except RepositoryError as e:
+            logger.error(f'Reindexing stopped: {e}')
+            return {
+                'type': 'reindex_incomplete',
+                'state': 'reindex_incomplete',
+                'count': {**count, 'sent': self.publisher.sent},
+                'transactions': self.publisher.transactions,
+                'error': str(e),
+            }
+
+        return {
+            'type': 'reindex_complete',
+            'state': 'reindex_complete',
+            'count': {**count, 'sent': self.publisher.sent},
+            'transactions': self.publisher.transactions,
+        }
@@ -1,19 +1,22 @@
 import logging
-from collections import defaultdict
-from dataclasses import dataclass
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from email.utils import parsedate_to_datetime
-from typing import Mapping, ItemsView, Type, Iterable, Any, Generator
+from typing import Mapping, ItemsView, Type, Iterable, Any, Generator, Optional
 
 from pyparsing import ParseException
 from rdflib import URIRef
+from rdflib.plugins.sparql import prepareUpdate
+from rdflib.plugins.sparql.sparql import Update
 
 from plastron.client import ClientError
 from plastron.jobs.logs import AppendableSequence, NullLog
 from plastron.namespaces import dcterms
 from plastron.rdfmapping.resources import RDFResourceBase
 from plastron.rdfmapping.validation import ValidationFailure
-from plastron.repo import RepositoryResource, Repository
-from plastron.repo.utils import context
+from plastron.repo import RepositoryResource, Repository, RepositoryError
+from plastron.repo.utils import isolated_context
 
 logger = logging.getLogger(__name__)
 
@@ -32,19 +35,38 @@ class ValidationFailed(Exception):
         self.failures = failures
 
 
+@dataclass
+class UpdatePlan:
+    """A SPARQL Update query, along with its parsed and translated algebra,
+    so that the query only has to be parsed once when it is applied to many
+    resources."""
+
+    text: str | bytes
+    """Original query text, which is sent to the repository"""
+    algebra: Update
+    """Translated query, which is applied to in-memory graphs"""
+
+    @classmethod
+    def parse(cls, sparql_update: str | bytes) -> 'UpdatePlan':
+        try:
+            return cls(text=sparql_update, algebra=prepareUpdate(sparql_update))
+        except ParseException as e:
+            raise UpdateError(str(e)) from e
+
+
 def update(
         resource: RepositoryResource,
-        sparql_update: str,
+        sparql_update: str | bytes | UpdatePlan,
         model_class: Type[RDFResourceBase] = None,
         dry_run: bool = False,
 ) -> dict[str, str]:
-    """Update a single resource using a SPARQL Update Query."""
+    """Update a single resource using a SPARQL Update Query. The query may be
+    given as a string, or as an `UpdatePlan` that was parsed in advance."""
     if model_class is not None:
-        try:
-            # Apply the update in-memory to the resource graph
-            resource.graph.update(sparql_update)
-        except ParseException as e:
-            raise UpdateError(str(e)) from e
+        if not isinstance(sparql_update, UpdatePlan):
+            sparql_update = UpdatePlan.parse(sparql_update)
+        # Apply the update in-memory to the resource graph
+        resource.graph.update(sparql_update.algebra)
 
         # Validate the updated in-memory Graph using the model
         item = resource.describe(model_class)
@@ -60,6 +82,9 @@ def update(
         logger.info(f'Would update resource {resource} {title}')
         raise DryRun
 
+    if isinstance(sparql_update, UpdatePlan):
+        sparql_update = sparql_update.text
+
     headers = {'Content-Type': 'application/sparql-update'}
     request_url = resource.description_url or resource.url
     try:
@@ -79,6 +104,18 @@ def update(
     }
 
 
+@dataclass
+class UpdateOutcome:
+    """Result of processing a single resource in an `UpdateJob`."""
+
+    url: str
+    children: list[str] = field(default_factory=list)
+    log_entry: Optional[dict[str, str]] = None
+    invalid: list[str] = field(default_factory=list)
+    error: Optional[str] = None
+    skipped: bool = False
+
+
 @dataclass
 class UpdateJob:
     repo: Repository
@@ -89,10 +126,50 @@ class UpdateJob:
     completed: AppendableSequence = None
     dry_run: bool = False
     use_transactions: bool = True
+    max_workers: int = 8
+
+    def process(self, url: str, plan: str | bytes | UpdatePlan, already_completed: bool = False) -> UpdateOutcome:
+        """Read and update a single resource, in its own transaction (if enabled).
+        If the resource has `already_completed`, it is only read to find the
+        resources to traverse to from it."""
+        outcome = UpdateOutcome(url=url, skipped=already_completed)
+        use_transactions = self.use_transactions and not already_completed
+        with isolated_context(repo=self.repo, use_transactions=use_transactions, dry_run=self.dry_run) as repo:
+            try:
+                resource = repo[url].read()
+            except RepositoryError as e:
+                logger.error(f'Unable to read {url}: {e}')
+                outcome.error = str(e)
+                return outcome
+
+            subject = URIRef(resource.url)
+            for predicate in self.traverse:
+                outcome.children.extend(str(o) for o in resource.graph.objects(subject, predicate))
+
+            if already_completed:
+                return outcome
+
+            try:
+                outcome.log_entry = update(
+                    resource=resource,
+                    sparql_update=plan,
+                    model_class=self.model_class,
+                    dry_run=self.dry_run,
+                )
+            except DryRun:
+                # TODO: dry run should be implemented in the client
+                pass
+            except ValidationFailed as e:
+                outcome.invalid = [f'{key}: {value}' for key, value in e.failures]
+            except UpdateError as e:
+                outcome.error = str(e)
+        return outcome
 
     def run(self) -> Generator[dict[str, Any], None, dict[str, Any]]:
         if self.completed is None:
             self.completed = NullLog()
+        if self.traverse is None:
+            self.traverse = []
 
         logger.debug(
             f'SPARQL Update query:\n'
@@ -103,34 +180,68 @@ class UpdateJob:
         if self.dry_run:
             logger.info('Dry run enabled, no actual updates will take place')
 
+        # the query only needs to be parsed locally if it is going to be used for validation
+        plan = UpdatePlan.parse(self.sparql_update) if self.model_class is not None else self.sparql_update
+
         stats = {
             'updated': [],
             'invalid': defaultdict(list),
             'errors': defaultdict(list)
         }
-        for uri in self.uris:
-            with context(repo=self.repo, use_transactions=self.use_transactions, dry_run=self.dry_run):
-                for resource in self.repo[uri].walk(traverse=self.traverse):
-                    if resource.url in self.completed:
-                        logger.info(f'Resource {resource.url} has already been updated; skipping')
-                        continue
-                    try:
-                        log_entry = update(
-                            resource=resource,
-                            sparql_update=self.sparql_update,
-                            model_class=self.model_class,
-                            dry_run=self.dry_run,
-                        )
-                        self.completed.append(log_entry)
-                        stats['updated'].append(resource.url)
-                    except DryRun:
-                        # TODO: dry run should be implemented in the client
-                        pass
-                    except ValidationFailed as e:
-                        stats['invalid'][resource.url].extend(f'{key}: {value}' for key, value in e.failures)
-                    except UpdateError as e:
-                        stats['errors'][resource.url].append(str(e))
-                    yield stats
+        pending: deque[str] = deque()
+        seen: set[str] = set()
+
+        def add(uris: Iterable[str]):
+            for uri in uris:
+                url = str(self.repo[uri].url)
+                if url not in seen:
+                    seen.add(url)
+                    pending.append(url)
+
+        def record(outcome: UpdateOutcome):
+            if outcome.log_entry is not None:
+                self.completed.append(outcome.log_entry)
+                stats['updated'].append(outcome.url)
+            if outcome.invalid:
+                stats['invalid'][outcome.url].extend(outcome.invalid)
+            if outcome.error is not None:
+                stats['errors'][outcome.url].append(outcome.error)
+
+        add(self.uris)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=__name__) as executor:
+            futures: dict[Future, str] = {}
+            try:
+                while pending or futures:
+                    # keep the number of queued resources bounded
+                    while pending and len(futures) < 2 * self.max_workers:
+                        url = pending.popleft()
+                        # check the completed log before making any requests
+                        already_completed = url in self.completed
+                        if already_completed:
+                            logger.info(f'Resource {url} has already been updated; skipping')
+                            if not self.traverse:
+                                continue
+                        futures[executor.submit(self.process, url, plan, already_completed)] = url
+
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        del futures[future]
+                        outcome: UpdateOutcome = future.result()
+                        add(outcome.children)
+                        if outcome.skipped:
+                            continue
+                        record(outcome)
+                        yield stats
+            except GeneratorExit:
+                # the job was closed early: drop the resources that have not
+                # started, and record the ones that were already being updated,
+                # so that a resumed job skips them
+                executor.shutdown(wait=True, cancel_futures=True)
+                for future in futures:
+                    if not future.cancelled() and future.exception() is None and not future.result().skipped:
+                        record(future.result())
+                logger.warning(f'Update stopped with {len(pending)} resource(s) not yet visited')
+                raise
 
         if len(stats['errors']) == 0 and len(stats['invalid']) == 0:
             state = 'update_complete'
@@ -7,7 +7,7 @@ import pytest
 
 from plastron.context import PlastronContext
 from plastron.jobs import JobConfigError, Jobs
-from plastron.jobs.importjob import ImportConfig, ImportJob, PublishableObjectResource
+from plastron.jobs.importjob import ImportConfig, ImportJob, PublishableObjectResource, validate_rows
 from plastron.namespaces import umdaccess
 from plastron.repo import Repository
 from plastron.repo.publish import get_publication_status
@@ -248,3 +248,50 @@ def test_import_job_validation_passes_for_job_with_files_column_and_no_files_spe
         import_file=(datadir / 'item_with_empty_item_files_column.csv').open(),
     ))
     assert result['type'] == 'validate_success'
+
+
+@pytest.fixture
+def mixed_validity_file(datadir, tmp_path):
+    # every third item is missing its required title
+    lines = (datadir / 'item.csv').read_text().splitlines()
+    header, row = lines[0], lines[1]
+    with (tmp_path / 'mixed.csv').open(mode='w') as fh:
+        print(header, file=fh)
+        for n in range(1, 13):
+            line = row.replace('test-unmarked', f'item-{n}')
+            if n % 3 == 0:
+                line = line.replace('Test Item', '')
+            print(line, file=fh)
+    return tmp_path / 'mixed.csv'
+
+
+@pytest.mark.parametrize('validation_workers', [None, 2])
+def test_import_job_validation_workers(jobs, mixed_validity_file, validation_workers):
+    mock_context = MagicMock(spec=PlastronContext, repo=MagicMock(spec=Repository))
+    import_job = jobs.create_job(ImportJob, config=ImportConfig(job_id='parallel', model='Item'))
+    run = import_job.new_run()
+    result = JobRunner().run(run(
+        context=mock_context,
+        validate_only=True,
+        import_file=mixed_validity_file.open(),
+        validation_workers=validation_workers,
+    ))
+    assert result['type'] == 'validate_failed'
+    assert result['count']['valid_items'] == 8
+    assert result['count']['invalid_items'] == 4
+    # the invalid items are logged in row order, with the same reasons either way
+    assert [entry['id'] for entry in run.invalid_items] == ['item-3', 'item-6', 'item-9', 'item-12']
+    assert all(entry['reason'].startswith('Validation failures: title ') for entry in run.invalid_items)
+
+
+def test_validate_rows_preserves_order(jobs, mixed_validity_file):
+    import_job = jobs.create_job(ImportJob, config=ImportConfig(job_id='ordered', model='Item'))
+    import_job.store_metadata_file(mixed_validity_file.open())
+    rows = import_job.get_metadata().rows()
+    results = list(validate_rows(import_job, rows, workers=3, chunk_size=1))
+    assert [report.identifier for _, report in results] == [f'item-{n}' for n in range(1, 13)]
+    assert [str(row.line_reference) for row, _ in results] == [str(report) for _, report in results]
+    assert [report.ok for _, report in results] == [n % 3 != 0 for n in range(1, 13)]
+    assert all(v.rule == 'required' for _, report in results for v in report.violations)
+    # reports are compact enough to send between processes
+    assert all(isinstance(v.value, (str, type(None))) for _, report in results for v in report.violations)
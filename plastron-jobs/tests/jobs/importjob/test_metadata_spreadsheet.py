@@ -1,7 +1,9 @@
+import hashlib
+import os
 from unittest.mock import MagicMock
 
 import pytest
-from plastron.jobs.importjob.spreadsheet import InvalidRow
+from plastron.jobs.importjob.spreadsheet import InvalidRow, SpreadsheetIndex
 from rdflib import Literal
 
 from plastron.jobs.importjob import MetadataSpreadsheet
@@ -57,3 +59,96 @@ def test_file_group_errors(filename, expected_reason, datadir):
     assert isinstance(row, InvalidRow)
     assert row.reason == expected_reason
     assert metadata.errors == 1
+
+
+@pytest.fixture
+def multiline_csv(tmp_path):
+    path = tmp_path / 'multiline.csv'
+    path.write_text(
+        'Identifier,Title,Description,FILES\n'
+        'foo-1,Foo 1,"first line\nsecond line",foo-1.tif;foo-1.jpg\n'
+        '\n'
+        'foo-2,Foo 2,plain,\n'
+        'foo-3,"Foo, 3","a ""quoted"" value",foo-3.tif\n'
+        'foo-4,Foo 4,,\n'
+    )
+    return path
+
+
+def test_spreadsheet_index(multiline_csv):
+    index = SpreadsheetIndex.build(multiline_csv, identifier_column='Identifier')
+    assert index.fieldnames == ['Identifier', 'Title', 'Description', 'FILES']
+    assert index.total == 4
+    assert index.identifiers == ['foo-1', 'foo-2', 'foo-3', 'foo-4']
+    assert index.file_count == 3
+    assert index.is_current(multiline_csv, 'Identifier')
+    assert not index.is_current(multiline_csv, 'Other')
+
+
+def test_get_line_seeks_to_row(multiline_csv):
+    metadata = MetadataSpreadsheet(multiline_csv, Item)
+    assert metadata.total == 4
+    assert metadata.get_line(1)['Description'] == 'first line\nsecond line'
+    assert metadata.get_line(3)['Title'] == 'Foo, 3'
+    assert metadata.get_line(3)['Description'] == 'a "quoted" value'
+    assert metadata.get_line(2)['Identifier'] == 'foo-2'
+    with pytest.raises(IndexError):
+        metadata.get_line(5)
+
+
+def test_index_is_saved_and_reused(multiline_csv, tmp_path, monkeypatch):
+    index_file = tmp_path / 'multiline.csv.index.json'
+    MetadataSpreadsheet(multiline_csv, Item, index_filename=index_file)
+    assert index_file.exists()
+
+    build = MagicMock(side_effect=AssertionError('index should not be rebuilt'))
+    monkeypatch.setattr(SpreadsheetIndex, 'build', build)
+    metadata = MetadataSpreadsheet(multiline_csv, Item, index_filename=index_file)
+    assert metadata.total == 4
+
+
+def test_stale_index_is_rebuilt(multiline_csv, tmp_path):
+    index_file = tmp_path / 'multiline.csv.index.json'
+    MetadataSpreadsheet(multiline_csv, Item, index_filename=index_file)
+    with multiline_csv.open(mode='a') as fh:
+        fh.write('foo-5,Foo 5,,\n')
+    metadata = MetadataSpreadsheet(multiline_csv, Item, index_filename=index_file)
+    assert metadata.total == 5
+    assert SpreadsheetIndex.load(index_file).total == 5
+
+
+def test_index_is_not_hashed_when_unchanged(multiline_csv, monkeypatch):
+    index = SpreadsheetIndex.build(multiline_csv, identifier_column='Identifier')
+    monkeypatch.setattr(hashlib, 'sha256', MagicMock(side_effect=AssertionError('file should not be hashed')))
+    assert index.is_current(multiline_csv, 'Identifier')
+
+
+def test_index_verifies_change_with_same_size_and_mtime(multiline_csv):
+    index = SpreadsheetIndex.build(multiline_csv, identifier_column='Identifier')
+    stat = multiline_csv.stat()
+    multiline_csv.write_text(multiline_csv.read_text().replace('Foo 4', 'Bar 4'))
+    os.utime(multiline_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    # not detected from the size and modification time, only by an explicit check
+    assert index.is_current(multiline_csv, 'Identifier')
+    assert not index.is_current(multiline_csv, 'Identifier', verify=True)
+
+
+def test_index_with_new_mtime_is_reused(multiline_csv, tmp_path, monkeypatch):
+    index_file = tmp_path / 'multiline.csv.index.json'
+    SpreadsheetIndex.for_file(multiline_csv, 'Identifier', index_filename=index_file)
+    stat = multiline_csv.stat()
+    os.utime(multiline_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    monkeypatch.setattr(SpreadsheetIndex, 'build', MagicMock(side_effect=AssertionError('index should not be rebuilt')))
+    index = SpreadsheetIndex.for_file(multiline_csv, 'Identifier', index_filename=index_file)
+    # the new modification time is saved, so the file is not hashed next time
+    assert index.mtime_ns == multiline_csv.stat().st_mtime_ns
+    assert SpreadsheetIndex.load(index_file).mtime_ns == index.mtime_ns
+
+
+def test_percentage_rows(multiline_csv):
+    metadata = MetadataSpreadsheet(multiline_csv, Item)
+    rows = list(metadata.rows(percentage=50))
+    assert metadata.subset_to_load == ['foo-1', 'foo-3']
+    assert [row.identifier for row in rows] == ['foo-1', 'foo-3']
+    assert [row.number for row in rows] == [1, 3]
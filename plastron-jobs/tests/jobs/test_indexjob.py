@@ -0,0 +1,104 @@
+from unittest.mock import MagicMock
+
+import pytest
+from requests import Session
+
+from plastron.client import Client, Endpoint
+from plastron.jobs.indexjob import IndexJob
+from plastron.namespaces import pcdm
+from plastron.repo import Repository
+from plastron.repo.indexing import SolrIndexer
+
+BASE_URL = 'http://localhost:8080/fcrepo/rest'
+RDF_TYPE = '<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>'
+DCTERMS_TITLE = '<http://purl.org/dc/terms/title>'
+PCDM_HAS_MEMBER = f'<{pcdm.hasMember}>'
+
+TYPES = {
+    'item': ['http://vocab.lib.umd.edu/model#Item', 'http://pcdm.org/models#Object'],
+    'page': ['http://purl.org/spar/fabio/Page', 'http://pcdm.org/models#Object'],
+    'other': ['http://www.w3.org/ns/ldp#Container'],
+}
+
+
+class MockResponse:
+    def __init__(self, status_code: int, text: str = ''):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.reason = None
+        self.text = text
+        self.headers = {'Content-Type': 'application/n-triples'}
+        self.links = {}
+
+    def json(self):
+        return {}
+
+
+class MockFedora:
+    """Stand-in for a Fedora repository with typed resources."""
+    def __init__(self, resources: dict[str, tuple[str, list[str]]]):
+        self.resources = resources
+
+    def request(self, method, url, **kwargs):
+        path = url.removeprefix(BASE_URL)
+        if path not in self.resources:
+            return MockResponse(404)
+        kind, members = self.resources[path]
+        subject = f'<{BASE_URL}{path}>'
+        triples = [f'{subject} {RDF_TYPE} <{rdf_type}> .' for rdf_type in TYPES[kind]]
+        triples.append(f'{subject} {DCTERMS_TITLE} "Title of {path}" .')
+        triples.extend(f'{subject} {PCDM_HAS_MEMBER} <{BASE_URL}{member}> .' for member in members)
+        return MockResponse(200, '\n'.join(triples))
+
+
+@pytest.fixture
+def repo():
+    fedora = MockFedora({
+        '/item': ('item', ['/item/p1', '/item/p2']),
+        '/item/p1': ('page', []),
+        '/item/p2': ('page', []),
+        '/other': ('other', []),
+    })
+    session = MagicMock(spec=Session)
+    session.request.side_effect = fedora.request
+    return Repository(client=Client(endpoint=Endpoint(BASE_URL), session=session))
+
+
+@pytest.fixture
+def solr_session():
+    session = MagicMock(spec=Session)
+    session.post.return_value = MockResponse(200)
+    return session
+
+
+def test_index_job(repo, solr_session):
+    indexer = SolrIndexer('http://localhost:8983/solr/fedora4', batch_size=2, session=solr_session)
+    job = IndexJob(
+        repo=repo,
+        indexer=indexer,
+        uris=[f'{BASE_URL}/item', f'{BASE_URL}/other', f'{BASE_URL}/missing'],
+        traverse=[pcdm.hasMember],
+    )
+    statuses = []
+    generator = job.run()
+    try:
+        while True:
+            statuses.append(next(generator))
+    except StopIteration as e:
+        result = e.value
+
+    assert [status['progress'] for status in statuses] == [33, 66, 100]
+    assert result['type'] == 'index_complete'
+    assert result['count']['resources'] == 4
+    assert result['count']['sent'] == 3
+    assert result['count']['skipped'] == 1
+    assert result['count']['indexed'] == 3
+    assert result['batches'] == 2
+    assert result['committed']
+
+    batches = [call.kwargs['json'] for call in solr_session.post.call_args_list]
+    assert batches[-1] == {'commit': {}}
+    documents = {doc['id']: doc for batch in batches[:-1] for doc in batch}
+    assert documents[f'{BASE_URL}/item']['content_model_name__str'] == 'Item'
+    assert documents[f'{BASE_URL}/item/p1']['content_model_name__str'] == 'Page'
+    assert documents[f'{BASE_URL}/item/p1']['title__txt'] == ['Title of /item/p1']
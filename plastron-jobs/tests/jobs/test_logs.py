@@ -1,7 +1,9 @@
+import csv
+import sqlite3
+
 import pytest
 
-from plastron.jobs import ItemLog
-from plastron.jobs.logs import AppendableSequence, NullLog, ItemLogError
+from plastron.jobs.logs import AppendableSequence, NullLog, ItemLog, ItemLogError, SQLiteItemLog
 
 
 @pytest.fixture
@@ -81,3 +83,201 @@ def test_item_log_bad_keyfield(datadir):
             fieldnames=['id', 'title'],
             keyfield='nope',
         )
+
+
+@pytest.fixture
+def sqlite_item_log(datadir):
+    return SQLiteItemLog(
+        filename=(datadir / 'item_log.csv'),
+        fieldnames=['id', 'title'],
+        keyfield='id',
+    )
+
+
+def test_sqlite_item_log_imports_existing_csv(sqlite_item_log):
+    assert not sqlite_item_log.db_filename.exists()
+    assert 'foo' in sqlite_item_log
+    # reading does not create the database
+    assert not sqlite_item_log.db_filename.exists()
+    assert len(sqlite_item_log) == 1
+    assert list(sqlite_item_log) == [{'id': 'foo', 'title': 'The Adventures of Foo'}]
+    assert sqlite_item_log[0] == {'id': 'foo', 'title': 'The Adventures of Foo'}
+    with pytest.raises(IndexError):
+        _ = sqlite_item_log[1]
+    sqlite_item_log.append({'id': 'bar', 'title': 'The Bar Strikes Back'})
+    sqlite_item_log.close()
+    assert sqlite_item_log.db_filename.exists()
+
+
+def test_sqlite_item_log_bad_keyfield(datadir):
+    log = SQLiteItemLog(filename=(datadir / 'item_log.csv'), fieldnames=['id', 'title'], keyfield='nope')
+    with pytest.raises(ItemLogError):
+        _ = len(log)
+    with pytest.raises(ItemLogError):
+        log.append({'nope': 'bar', 'title': 'Bar'})
+    assert not log.db_filename.exists()
+
+
+def test_sqlite_item_log_new_log_is_not_created_by_reading(datadir):
+    log = SQLiteItemLog(filename=(datadir / 'new_log.csv'), fieldnames=['id', 'title'], keyfield='id')
+    assert len(log) == 0
+    assert 'foo' not in log
+    assert list(log) == []
+    assert not log.exists()
+    assert not log.db_filename.exists()
+
+
+def test_sqlite_item_log_batches_appends(datadir):
+    log = SQLiteItemLog(
+        filename=(datadir / 'new_log.csv'),
+        fieldnames=['id', 'title'],
+        keyfield='id',
+        batch_size=3,
+        flush_interval=60,
+    )
+    log.append({'id': 'a', 'title': 'A'})
+    log.append({'id': 'b', 'title': None})
+    # pending rows are visible, but not yet written to the CSV file
+    assert 'a' in log
+    assert len(log) == 2
+    assert log.filename.read_text() == 'id,title\n'
+
+    log.append({'id': 'c', 'title': 'C'})
+    assert log.filename.read_text() == 'id,title\na,A\nb,\nc,C\n'
+
+    log.append({'id': 'a', 'title': 'A again'})
+    assert len(log) == 3
+    log.close()
+    assert log.filename.read_text() == 'id,title\na,A\nb,\nc,C\na,A again\n'
+    assert log.get('a') == {'id': 'a', 'title': 'A again'}
+
+
+def test_sqlite_item_log_reopen(datadir):
+    filename = datadir / 'new_log.csv'
+    log = SQLiteItemLog(filename=filename, fieldnames=['id', 'title'], keyfield='id')
+    for n in range(250):
+        log.append({'id': f'item-{n}', 'title': f'Item {n}'})
+    log.close()
+
+    reopened = SQLiteItemLog(filename=filename, fieldnames=['id', 'title'], keyfield='id')
+    assert len(reopened) == 250
+    assert 'item-249' in reopened
+    assert reopened[100] == {'id': 'item-100', 'title': 'Item 100'}
+    assert list(reopened.keys())[:2] == ['item-0', 'item-1']
+    with filename.open() as fh:
+        assert list(csv.DictReader(fh)) == list(reopened)
+
+
+def test_sqlite_item_log_restores_missing_csv_rows(datadir):
+    filename = datadir / 'new_log.csv'
+    log = SQLiteItemLog(filename=filename, fieldnames=['id', 'title'], keyfield='id')
+    log.append({'id': 'a', 'title': 'A'})
+    log.close()
+    # simulate a crash after the database commit, but before the CSV write
+    with sqlite3.connect(log.db_filename) as connection:
+        connection.execute('INSERT INTO items (key, data) VALUES (?, ?)', ('b', '{"id": "b", "title": "B"}'))
+        connection.execute("INSERT INTO keys (key) VALUES ('b')")
+    connection.close()
+    reopened = SQLiteItemLog(filename=filename, fieldnames=['id', 'title'], keyfield='id')
+    assert len(reopened) == 2
+    # the missing rows are written by the next process to append to the log
+    assert filename.read_text() == 'id,title\na,A\n'
+    reopened.append({'id': 'c', 'title': 'C'})
+    reopened.close()
+    assert filename.read_text() == 'id,title\na,A\nb,B\nc,C\n'
+
+
+def test_sqlite_item_log_reading_does_not_write(datadir):
+    filename = datadir / 'new_log.csv'
+    writer = SQLiteItemLog(filename=filename, fieldnames=['id', 'title'], keyfield='id', batch_size=1)
+    writer.append({'id': 'a', 'title': 'A'})
+    # rows committed to the database, but not yet mirrored to the CSV file
+    with sqlite3.connect(writer.db_filename) as connection:
+        connection.execute('INSERT INTO items (key, data) VALUES (?, ?)', ('b', '{"id": "b", "title": "B"}'))
+        connection.execute("INSERT INTO keys (key) VALUES ('b')")
+    connection.close()
+    csv_contents = filename.read_text()
+    db_contents = writer.db_filename.read_bytes()
+
+    reader = SQLiteItemLog(filename=filename, fieldnames=['id', 'title'], keyfield='id')
+    assert len(reader) == 2
+    assert 'b' in reader
+    assert list(reader.keys()) == ['a', 'b']
+    reader.close()
+    assert filename.read_text() == csv_contents
+    assert writer.db_filename.read_bytes() == db_contents
+    writer.close()
+
+
+def test_sqlite_item_log_reads_edited_csv(datadir):
+    filename = datadir / 'new_log.csv'
+    log = SQLiteItemLog(filename=filename, fieldnames=['id', 'title'], keyfield='id')
+    log.append({'id': 'a', 'title': 'A'})
+    log.close()
+    filename.write_text('id,title\nb,B\n')
+
+    # a reader uses the edited file, without changing the database
+    reader = SQLiteItemLog(filename=filename, fieldnames=['id', 'title'], keyfield='id')
+    assert 'a' not in reader
+    assert list(reader) == [{'id': 'b', 'title': 'B'}]
+    reader.close()
+
+    # a writer rebuilds the database from the edited file
+    writer = SQLiteItemLog(filename=filename, fieldnames=['id', 'title'], keyfield='id')
+    writer.append({'id': 'c', 'title': 'C'})
+    writer.close()
+    assert filename.read_text() == 'id,title\nb,B\nc,C\n'
+    assert list(writer.keys()) == ['b', 'c']
+
+
+def test_sqlite_item_log_export_csv(sqlite_item_log, tmp_path):
+    sqlite_item_log.append({'id': 'bar', 'title': 'The Bar Strikes Back'})
+    export_file = tmp_path / 'export.csv'
+    sqlite_item_log.export_csv(export_file)
+    assert export_file.read_text() == 'id,title\nfoo,The Adventures of Foo\nbar,The Bar Strikes Back\n'
+
+
+def test_sqlite_item_log_extra_fields(sqlite_item_log):
+    with pytest.raises(ValueError):
+        sqlite_item_log.append({'id': 'bar', 'author': 'Baz'})
+
+
+def test_sqlite_item_log_flushes_on_timer(datadir):
+    log = SQLiteItemLog(
+        filename=(datadir / 'new_log.csv'),
+        fieldnames=['id', 'title'],
+        keyfield='id',
+        batch_size=100,
+        flush_interval=0.1,
+    )
+    log.append({'id': 'a', 'title': 'A'})
+    timer = log._timer
+    assert log.filename.read_text() == 'id,title\n'
+    # the row is committed without any further appends
+    timer.join()
+    assert log.filename.read_text() == 'id,title\na,A\n'
+    log.close()
+
+
+def test_sqlite_item_log_reset_by_deleting_csv(datadir):
+    filename = datadir / 'new_log.csv'
+    log = SQLiteItemLog(filename=filename, fieldnames=['id', 'title'], keyfield='id')
+    log.append({'id': 'a', 'title': 'A'})
+    log.close()
+    filename.unlink()
+
+    reopened = SQLiteItemLog(filename=filename, fieldnames=['id', 'title'], keyfield='id')
+    assert 'a' not in reopened
+    assert len(reopened) == 0
+    reopened.append({'id': 'b', 'title': 'B'})
+    reopened.close()
+    assert filename.read_text() == 'id,title\nb,B\n'
+
+
+def test_sqlite_item_log_remove(datadir):
+    log = SQLiteItemLog(filename=(datadir / 'new_log.csv'), fieldnames=['id', 'title'], keyfield='id')
+    log.append({'id': 'a', 'title': 'A'})
+    log.remove()
+    assert not log.exists()
+    assert not log.db_filename.exists()
+    assert len(log) == 0
@@ -1,10 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
 
 from plastron.context import PlastronContext
-from plastron.handles import HandleInfo
+from plastron.handles import HandleInfo, HandleServiceClient
 from plastron.jobs.publicationjob import PublicationJob, PublicationAction
 from plastron.repo import Repository, RepositoryError
 from plastron.repo.publish import PublishableResource
@@ -74,3 +75,107 @@ def test_publication_job(action, with_errors, expected_status, expected_done, ex
     assert result['count']['total'] == 2
     assert result['count']['done'] == expected_done
     assert result['count']['errors'] == expected_errors
+
+
+def test_publication_job_caches_handles():
+    uris = [f'http://fcrepo-local:8080/fcrepo/rest/{n}' for n in range(10)]
+    resources = {}
+
+    def get_resource(key):
+        uri = key.start if isinstance(key, slice) else key
+        if uri not in resources:
+            resource = MagicMock(spec=PublishableResource, url=uri)
+            resource.read.return_value = resource
+            # look up the handle more than once, as publishing does
+            resource.publish.side_effect = lambda handle_client, **_kwargs: [
+                handle_client.find_handle(resource.url) for _ in range(2)
+            ][-1]
+            resources[uri] = resource
+        return resources[uri]
+
+    mock_repo = MagicMock(spec=Repository)
+    mock_repo.__getitem__.side_effect = get_resource
+    mock_handle_client = MagicMock(spec=HandleServiceClient, default_repo='fcrepo')
+    mock_handle_client.find_handle.return_value = HandleInfo(exists=True, prefix='1903.1', suffix='123')
+    mock_context = MagicMock(spec=PlastronContext, repo=mock_repo, handle_client=mock_handle_client)
+
+    job = PublicationJob(context=mock_context, action=PublicationAction.PUBLISH, uris=uris, max_workers=4)
+    result = JobRunner(job).run()
+
+    assert result['type'] == 'publish_complete'
+    assert result['count']['done'] == 10
+    # each handle is looked up once, and then served from the cache
+    assert mock_handle_client.find_handle.call_count == 10
+
+
+def test_publication_job_bounds_queued_resources():
+    uris = [f'http://fcrepo-local:8080/fcrepo/rest/{n}' for n in range(20)]
+
+    def get_resource(uri):
+        resource = MagicMock(spec=PublishableResource, url=uri, publication_status=uri)
+        resource.read.return_value = resource
+        return resource
+
+    mock_repo = MagicMock(spec=Repository)
+    mock_repo.__getitem__.side_effect = lambda key: get_resource(key.start)
+    mock_context = MagicMock(spec=PlastronContext, repo=mock_repo)
+
+    job = PublicationJob(context=mock_context, action=PublicationAction.UNPUBLISH, uris=uris, max_workers=2)
+    with patch.object(ThreadPoolExecutor, 'submit', autospec=True, side_effect=ThreadPoolExecutor.submit) as submit:
+        statuses = job.run()
+        next(statuses)
+        first = next(statuses)
+        # at most twice as many resources as workers are queued at once
+        assert submit.call_count == 4
+        results = [first['result']] + [status['result'] for status in statuses]
+
+    # results are reported in the same order as the URIs
+    assert [result['uri'] for result in results] == uris
+
+
+def test_publication_job_resumes_from_completed_log():
+    uris = [f'http://fcrepo-local:8080/fcrepo/rest/{n}' for n in range(20)]
+
+    def get_resource(uri):
+        resource = MagicMock(spec=PublishableResource, url=uri, publication_status='Unpublished')
+        resource.read.return_value = resource
+        return resource
+
+    mock_repo = MagicMock(spec=Repository)
+    mock_repo.__getitem__.side_effect = lambda key: get_resource(key.start)
+    mock_context = MagicMock(spec=PlastronContext, repo=mock_repo)
+
+    class CompletedLog(list):
+        def __contains__(self, uri):
+            return any(row['uri'] == uri for row in self)
+
+    completed = CompletedLog()
+    job = PublicationJob(
+        context=mock_context,
+        action=PublicationAction.UNPUBLISH,
+        uris=uris,
+        max_workers=2,
+        completed=completed,
+    )
+    statuses = job.run()
+    next(statuses)
+    next(statuses)
+    statuses.close()
+    # the resources that were already in progress are recorded as well
+    assert 1 <= len(completed) < 20
+    processed = len(completed)
+    assert mock_repo.__getitem__.call_count == processed
+
+    job = PublicationJob(
+        context=mock_context,
+        action=PublicationAction.UNPUBLISH,
+        uris=uris,
+        max_workers=2,
+        completed=completed,
+    )
+    result = JobRunner(job).run()
+    assert result['type'] == 'unpublish_complete'
+    assert result['count']['done'] == 20
+    # the completed resources were not read again
+    assert mock_repo.__getitem__.call_count == 20
+    assert sorted(row['uri'] for row in completed) == sorted(uris)
@@ -0,0 +1,116 @@
+from unittest.mock import MagicMock
+
+import pytest
+from requests import Session
+
+from plastron.client import Client, Endpoint
+from plastron.jobs.reindexjob import ReindexJob, walk_concurrently
+from plastron.messaging.broker import BatchPublisher, Broker, ServerTuple
+from plastron.namespaces import pcdm
+from plastron.repo import Repository, Tombstone
+
+BASE_URL = 'http://localhost:8080/fcrepo/rest'
+RDF_TYPE = '<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>'
+PCDM_HAS_MEMBER = f'<{pcdm.hasMember}>'
+
+
+class MockResponse:
+    def __init__(self, status_code: int, text: str = ''):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.reason = None
+        self.text = text
+        self.headers = {'Content-Type': 'application/n-triples'}
+        self.links = {}
+
+
+class MockFedora:
+    """Stand-in for a Fedora repository where each resource lists its members.
+    Resources mapped to `None` have been deleted, and respond with 410 Gone."""
+    def __init__(self, resources: dict[str, list[str] | None]):
+        self.resources = resources
+
+    def request(self, method, url, **kwargs):
+        path = url.removeprefix(BASE_URL)
+        if path not in self.resources:
+            return MockResponse(404)
+        members = self.resources[path]
+        if members is None:
+            return MockResponse(410)
+        subject = f'<{BASE_URL}{path}>'
+        triples = [f'{subject} {RDF_TYPE} <http://pcdm.org/models#Object> .']
+        triples.extend(f'{subject} {PCDM_HAS_MEMBER} <{BASE_URL}{member}> .' for member in members)
+        return MockResponse(200, '\n'.join(triples))
+
+
+@pytest.fixture
+def repo():
+    fedora = MockFedora({
+        '/a': ['/a/1', '/a/2', '/a/3'],
+        '/a/1': ['/a/1/x'],
+        '/a/1/x': [],
+        '/a/2': [],
+        # members that are shared or cyclic are only visited once
+        '/a/3': ['/a/1', '/a'],
+        '/b': ['/b/gone'],
+        '/b/gone': None,
+    })
+    session = MagicMock(spec=Session)
+    session.request.side_effect = fedora.request
+    return Repository(client=Client(endpoint=Endpoint(BASE_URL), session=session))
+
+
+@pytest.fixture
+def broker():
+    broker = Broker(
+        server=ServerTuple('localhost', 61613),
+        message_store_dir='/tmp',
+        destinations={'REINDEXING': '/queue/reindex', 'INDEXING': '/queue/index'},
+    )
+    broker.connection = MagicMock()
+    broker.connection.begin.side_effect = (f'tx-{n}' for n in range(100))
+    return broker
+
+
+def test_walk_concurrently(repo):
+    resources = list(walk_concurrently(repo, [f'{BASE_URL}/a', f'{BASE_URL}/b'], [pcdm.hasMember], max_workers=3))
+    urls = sorted(str(r.url) for r in resources)
+    assert urls == sorted(
+        f'{BASE_URL}{path}' for path in ['/a', '/a/1', '/a/1/x', '/a/2', '/a/3', '/b', '/b/gone']
+    )
+    assert [str(r.url) for r in resources if isinstance(r, Tombstone)] == [f'{BASE_URL}/b/gone']
+
+
+def test_reindex_job(repo, broker):
+    job = ReindexJob(
+        repo=repo,
+        publisher=BatchPublisher(broker, batch_size=3),
+        reindexing_queue=broker.destination('reindexing'),
+        indexing_queue=broker.destination('indexing'),
+        uris=[f'{BASE_URL}/a', f'{BASE_URL}/b'],
+        traverse=[pcdm.hasMember],
+        routing_headers={'PlastronIndex': 'solr'},
+        max_workers=2,
+    )
+    statuses = []
+    generator = job.run()
+    try:
+        while True:
+            statuses.append(next(generator))
+    except StopIteration as e:
+        result = e.value
+
+    assert result['type'] == 'reindex_complete'
+    assert result['count'] == {'resources': 6, 'deleted': 1, 'sent': 7}
+    assert result['transactions'] == 3
+    # one status for each full batch
+    assert len(statuses) == 2
+
+    sends = broker.connection.send.call_args_list
+    assert [call.kwargs['transaction'] for call in sends] == ['tx-0'] * 3 + ['tx-1'] * 3 + ['tx-2']
+    deletes = [call.kwargs for call in sends if call.kwargs['destination'] == '/queue/index']
+    assert len(deletes) == 1
+    assert deletes[0]['headers']['CamelFcrepoEventName'] == 'delete'
+    assert deletes[0]['headers']['CamelFcrepoUri'] == f'{BASE_URL}/b/gone'
+    assert all(call.kwargs['headers']['PlastronIndex'] == 'solr' for call in sends)
+    broker.connection.commit.assert_called_with('tx-2')
@@ -0,0 +1,225 @@
+import threading
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+
+import pytest
+from requests import Session
+
+from plastron.client import Client, Endpoint
+from plastron.jobs.logs import NullLog
+from plastron.jobs.updatejob import UpdateError, UpdateJob, UpdatePlan
+from plastron.models.umd import Item
+from plastron.repo import Repository, ldp
+
+BASE_URL = 'http://localhost:8080/fcrepo/rest'
+DCTERMS_TITLE = '<http://purl.org/dc/terms/title>'
+LDP_CONTAINS = '<http://www.w3.org/ns/ldp#contains>'
+SPARQL_UPDATE = '''
+PREFIX dcterms: <http://purl.org/dc/terms/>
+DELETE { ?s dcterms:title ?t } INSERT { ?s dcterms:title "New Title" } WHERE { ?s dcterms:title ?t }
+'''
+
+
+class MockResponse:
+    def __init__(self, status_code: int, text: str = ''):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.reason = None
+        self.text = text
+        self.headers = {'Content-Type': 'application/n-triples', 'date': 'Mon, 19 Oct 2026 12:00:00 GMT'}
+        self.links = {}
+
+
+class MockFedora:
+    """Minimal stand-in for a Fedora repository containing a tree of titled containers."""
+    def __init__(self, tree: dict[str, list[str]]):
+        self.tree = tree
+        self.requests = []
+        self.patched = []
+        self.lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        path = url.removeprefix(BASE_URL)
+        with self.lock:
+            self.requests.append((method, path))
+        if path not in self.tree:
+            return MockResponse(404)
+        if method == 'PATCH':
+            with self.lock:
+                self.patched.append((path, kwargs['data']))
+            return MockResponse(204)
+        triples = [f'<{BASE_URL}{path}> {DCTERMS_TITLE} "Old Title" .']
+        triples.extend(f'<{BASE_URL}{path}> {LDP_CONTAINS} <{BASE_URL}{child}> .' for child in self.tree[path])
+        return MockResponse(200, '\n'.join(triples))
+
+
+@pytest.fixture
+def fedora():
+    return MockFedora({
+        '/a': ['/a/b', '/a/c'],
+        '/a/b': ['/a/b/d'],
+        '/a/c': [],
+        '/a/b/d': [],
+        '/e': [],
+    })
+
+
+@pytest.fixture
+def repo(fedora):
+    session = MagicMock(spec=Session)
+    session.request.side_effect = fedora.request
+    return Repository(client=Client(endpoint=Endpoint(BASE_URL), session=session))
+
+
+class CompletedLog(NullLog):
+    def __init__(self, *uris: str):
+        self.rows = [{'uri': uri} for uri in uris]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, item):
+        return any(row['uri'] == item for row in self.rows)
+
+    def append(self, value):
+        self.rows.append(value)
+
+
+def run(job: UpdateJob):
+    statuses = []
+    generator = job.run()
+    while True:
+        try:
+            statuses.append(next(generator))
+        except StopIteration as e:
+            return statuses, e.value
+
+
+def test_update_plan_parse_error():
+    with pytest.raises(UpdateError):
+        UpdatePlan.parse('NOT SPARQL')
+
+
+def test_update_job_traverses_in_parallel(repo, fedora):
+    completed = CompletedLog()
+    job = UpdateJob(
+        repo=repo,
+        uris=[f'{BASE_URL}/a', f'{BASE_URL}/e'],
+        sparql_update=SPARQL_UPDATE,
+        model_class=None,
+        traverse=[ldp.contains],
+        completed=completed,
+        use_transactions=False,
+        max_workers=3,
+    )
+    statuses, result = run(job)
+    assert result['type'] == 'update_complete'
+    assert len(statuses) == 5
+    assert sorted(path for path, _ in fedora.patched) == ['/a', '/a/b', '/a/b/d', '/a/c', '/e']
+    assert all(data == SPARQL_UPDATE for _, data in fedora.patched)
+    assert sorted(result['stats']['updated']) == sorted(f'{BASE_URL}{path}' for path in fedora.tree)
+    assert len(completed) == 5
+
+
+def test_update_job_checks_completed_log_before_reading(repo, fedora):
+    completed = CompletedLog(f'{BASE_URL}/a')
+    job = UpdateJob(
+        repo=repo,
+        uris=[f'{BASE_URL}/a', f'{BASE_URL}/e'],
+        sparql_update=SPARQL_UPDATE,
+        model_class=None,
+        completed=completed,
+        use_transactions=False,
+    )
+    _, result = run(job)
+    assert result['stats']['updated'] == [f'{BASE_URL}/e']
+    assert not any(path == '/a' for _, path in fedora.requests)
+
+
+def test_update_job_reads_completed_resources_to_traverse(repo, fedora):
+    job = UpdateJob(
+        repo=repo,
+        uris=[f'{BASE_URL}/a'],
+        sparql_update=SPARQL_UPDATE,
+        model_class=None,
+        traverse=[ldp.contains],
+        completed=CompletedLog(f'{BASE_URL}/a'),
+        use_transactions=False,
+    )
+    _, result = run(job)
+    assert sorted(path for path, _ in fedora.patched) == ['/a/b', '/a/b/d', '/a/c']
+
+
+def test_update_job_close_records_in_flight_resources():
+    fedora = MockFedora({f'/r{n}': [] for n in range(20)})
+    session = MagicMock(spec=Session)
+    session.request.side_effect = fedora.request
+    completed = CompletedLog()
+    job = UpdateJob(
+        repo=Repository(client=Client(endpoint=Endpoint(BASE_URL), session=session)),
+        uris=[f'{BASE_URL}/r{n}' for n in range(20)],
+        sparql_update=SPARQL_UPDATE,
+        model_class=None,
+        completed=completed,
+        use_transactions=False,
+        max_workers=2,
+    )
+    statuses = job.run()
+    next(statuses)
+    statuses.close()
+    # resources that had not started were dropped, and every resource that
+    # was updated is in the completed log, so a resumed job will skip it
+    assert len(fedora.patched) < 20
+    assert sorted(row['uri'] for row in completed.rows) == sorted(f'{BASE_URL}{path}' for path, _ in fedora.patched)
+
+
+def test_update_job_parses_once(repo, fedora, monkeypatch):
+    prepare = MagicMock(wraps=UpdatePlan.parse)
+    monkeypatch.setattr(UpdatePlan, 'parse', prepare)
+    job = UpdateJob(
+        repo=repo,
+        uris=[f'{BASE_URL}/a'],
+        sparql_update=SPARQL_UPDATE,
+        model_class=Item,
+        traverse=[ldp.contains],
+        use_transactions=False,
+    )
+    _, result = run(job)
+    prepare.assert_called_once()
+    # the items are missing required fields
+    assert result['type'] == 'update_incomplete'
+    assert len(result['stats']['invalid']) == 4
+    assert fedora.patched == []
+
+
+def test_update_job_not_found(repo, fedora):
+    job = UpdateJob(
+        repo=repo,
+        uris=[f'{BASE_URL}/missing'],
+        sparql_update=SPARQL_UPDATE,
+        model_class=None,
+        use_transactions=False,
+    )
+    _, result = run(job)
+    assert result['type'] == 'update_incomplete'
+    assert f'{BASE_URL}/missing' in result['stats']['errors']
+
+
+def test_update_job_transaction_per_resource(repo, fedora, monkeypatch):
+    contexts = []
+
+    @contextmanager
+    def mock_isolated_context(repo, use_transactions=True, dry_run=False):
+        contexts.append(use_transactions)
+        yield repo
+
+    monkeypatch.setattr('plastron.jobs.updatejob.isolated_context', mock_isolated_context)
+    job = UpdateJob(
+        repo=repo,
+        uris=[f'{BASE_URL}/a'],
+        sparql_update=SPARQL_UPDATE,
+        model_class=None,
+        traverse=[ldp.contains],
+    )
+    run(job)
+    assert contexts == [True, True, True, True]
@@ -90,6 +90,19 @@ class Broker:
     def ack(self, *args):
         self.connection.ack(*args)
 
+    def nack(self, *args):
+        self.connection.nack(*args)
+
+    def begin(self) -> str:
+        """Begin a STOMP transaction, and return its identifier."""
+        return self.connection.begin()
+
+    def commit(self, transaction: str):
+        self.connection.commit(transaction)
+
+    def abort(self, transaction: str):
+        self.connection.abort(transaction)
+
     def destination(self, name: str) -> 'Destination':
         return self.destinations[name.upper()]
 
@@ -112,12 +125,84 @@ class Destination:
     def __str__(self):
         return self.name
 
-    def send(self, message: Message):
+    def send(self, message: Message, transaction: str = None):
         logger.debug(f'Sending message to {self.name}')
         logger.debug(f'Message headers: {message.headers}')
-        self.broker.connection.send(destination=self.name, headers=message.headers, body=message.body)
+        kwargs = {'transaction': transaction} if transaction is not None else {}
+        self.broker.connection.send(destination=self.name, headers=message.headers, body=message.body, **kwargs)
 
     def subscribe(self, id: str, ack: str = 'auto', headers: dict = None, **kwargs):
         self.broker.connection.subscribe(destination=self.name, id=id, ack=ack, headers=headers, **kwargs)
         logger.info(f"Subscribed to {self.name}")
         logger.debug(f"id={id} ack={ack} headers={headers} {kwargs}")
+
+    def unsubscribe(self, id: str, **kwargs):
+        self.broker.connection.unsubscribe(id=id, **kwargs)
+        logger.info(f"Unsubscribed from {self.name}")
+
+
+class BatchPublisher:
+    """Sends messages inside STOMP transactions of up to `batch_size`
+    messages each, so the broker can accept a batch at a time instead of a
+    frame at a time. An optional `rate_limiter` (any object with a `wait()`
+    method that blocks until the next send is allowed, such as
+    `plastron.utils.RateLimiter`) paces the sends, so that the consumers of
+    the messages are not flooded.
+
+    Used as a context manager, the last partial batch is committed when the
+    block exits normally, and aborted if it exits with an exception.
+
+    ```pycon
+    >>> with BatchPublisher(broker, batch_size=100, rate_limiter=RateLimiter(rate=50)) as publisher:
+    ...     for message in messages:
+    ...         publisher.send(broker.destination('reindexing'), message)
+    ```
+    """
+    def __init__(self, broker: Broker, batch_size: int = 100, rate_limiter=None):
+        self.broker = broker
+        self.batch_size = batch_size
+        self.rate_limiter = rate_limiter
+        self.transaction: Optional[str] = None
+        self.pending = 0
+        self.sent = 0
+        self.transactions = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    def send(self, destination: Destination, message: Message):
+        if self.rate_limiter is not None:
+            self.rate_limiter.wait()
+        if self.transaction is None:
+            self.transaction = self.broker.begin()
+        destination.send(message, transaction=self.transaction)
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.commit()
+
+    def commit(self):
+        """Commit the current transaction, if there is one."""
+        if self.transaction is None:
+            return
+        self.broker.commit(self.transaction)
+        logger.debug(f'Committed {self.pending} message(s) in transaction {self.transaction}')
+        self.sent += self.pending
+        self.transactions += 1
+        self.transaction = None
+        self.pending = 0
+
+    def abort(self):
+        """Abort the current transaction, if there is one; none of its
+        messages are delivered."""
+        if self.transaction is None:
+            return
+        self.broker.abort(self.transaction)
+        logger.warning(f'Aborted transaction {self.transaction} with {self.pending} message(s)')
+        self.transaction = None
+        self.pending = 0
@@ -1,6 +1,11 @@
 import json
 import logging
 import os
+import sqlite3
+import threading
+from pathlib import Path
+from time import time
+from typing import Iterator, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -37,21 +42,16 @@ class Message:
 
     @classmethod
     def read(cls, filename):
-        headers = {}
-        body = ''
-        in_body = False
         with open(filename, 'r') as fh:
-            for line in fh:
-                if in_body:
-                    body += line
-                else:
-                    if line.rstrip() == '':
-                        in_body = True
-                        continue
-                    else:
-                        (key, value) = line.split(':', 1)
-                        headers[key] = value.strip()
-        return cls(headers=headers, body=body)
+            lines = fh.read().splitlines(keepends=True)
+        headers = {}
+        for n, line in enumerate(lines):
+            if line.rstrip() == '':
+                # everything after the first blank line is the body
+                return cls(headers=headers, body=''.join(lines[n + 1:]))
+            (key, value) = line.split(':', 1)
+            headers[key] = value.strip()
+        return cls(headers=headers, body='')
 
     def __init__(self, message_id=None, persistent=None, headers=None, body=''):
         if headers is not None:
@@ -114,6 +114,7 @@ class PlastronErrorMessage(PlastronMessage):
 class PlastronCommandMessage(PlastronMessage):
     command = MessageHeader('PlastronCommand')
     status_url = MessageHeader('PlastronStatusURL')
+    priority = MessageHeader('PlastronJobPriority')
 
     def __init__(self, command: str = None, status_url: str = None, args: dict = None, **kwargs):
         super().__init__(**kwargs)
@@ -169,3 +170,204 @@ class MessageBox:
                 return filename
         else:
             raise StopIteration
+
+
+class SQLiteMessageBox:
+    """Durable message store backed by an SQLite database in WAL mode. Several
+    boxes (e.g., an inbox and an outbox) may share one database file; each is
+    identified by its `name`.
+
+    Messages are kept in the order they were added. Each message is in one of
+    three states:
+
+    * **pending**: waiting to be processed
+    * **claimed**: being processed; `claim()` moves a pending message to this
+      state and increments its attempt counter, in a single atomic update, so
+      a message is never handed to two workers
+    * **failed**: given up on after too many attempts, and kept for inspection
+
+    `remove()` acknowledges a message by deleting it, and `release()` returns
+    a claimed message to the pending state. Since claims do not survive the
+    process that made them, opening a box releases any claims left over from
+    a previous run, ready for `pending()` to replay them.
+
+    If `import_dir` is given and contains messages written by `MessageBox`,
+    they are added to the database (oldest first, keyed by their `key_header`
+    header) and their files removed.
+
+    ```pycon
+    >>> inbox = SQLiteMessageBox('messages.sqlite', 'inbox', PlastronCommandMessage)
+    >>> inbox.add(message.id, message)
+    True
+    >>> inbox.claim(message.id)
+    True
+    >>> inbox.remove(message.id)
+    ```
+    """
+    def __init__(
+            self,
+            filename: str | Path,
+            name: str,
+            message_class=None,
+            import_dir: str | Path = None,
+            key_header: str = 'message-id',
+    ):
+        self.filename = Path(filename)
+        self.name = name
+        self.key_header = key_header
+        self.message_class = message_class or Message
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.filename, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        # wait for other connections to the same file (e.g., the outbox) to finish writing
+        self._connection.execute('PRAGMA busy_timeout=5000')
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS messages (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                box TEXT NOT NULL,
+                key TEXT NOT NULL,
+                headers TEXT NOT NULL,
+                body TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                added REAL NOT NULL,
+                updated REAL NOT NULL,
+                UNIQUE (box, key)
+            );
+            CREATE INDEX IF NOT EXISTS messages_box_state_seq ON messages (box, state, seq);
+            """
+        )
+        released = self._execute(
+            "UPDATE messages SET state = 'pending', updated = ? WHERE box = ? AND state = 'claimed'",
+            (time(), self.name),
+        ).rowcount
+        if released:
+            logger.info(f'Released {released} claimed message(s) in {self.name} from a previous run')
+        if import_dir is not None:
+            self._import_files(Path(import_dir))
+
+    def _execute(self, sql: str, parameters=()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._connection.execute(sql, parameters)
+
+    def _import_files(self, directory: Path):
+        if not directory.is_dir():
+            return
+        files = sorted((f for f in directory.iterdir() if f.is_file()), key=lambda f: f.stat().st_mtime)
+        for file in files:
+            message = self.message_class.read(file)
+            self.add(message.headers.get(self.key_header, file.name), message)
+            file.unlink()
+        if files:
+            logger.info(f'Imported {len(files)} message(s) into {self.name} from {directory}')
+
+    def add(self, message_id: str, message: Message) -> bool:
+        """Store a message as pending. Returns `False` (and leaves the stored
+        message unchanged) if there is already a message with this ID."""
+        now = time()
+        cursor = self._execute(
+            'INSERT INTO messages (box, key, headers, body, added, updated) VALUES (?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (box, key) DO NOTHING',
+            (self.name, message_id, json.dumps(message.headers), message.body, now, now),
+        )
+        return cursor.rowcount == 1
+
+    def remove(self, message_id: str):
+        """Acknowledge a message by removing it from the box."""
+        self._execute('DELETE FROM messages WHERE box = ? AND key = ?', (self.name, message_id))
+
+    def claim(self, message_id: str) -> bool:
+        """Mark a pending message as claimed, and count the attempt. Returns
+        `False` if the message is not pending (e.g., it is already claimed)."""
+        cursor = self._execute(
+            "UPDATE messages SET state = 'claimed', attempts = attempts + 1, updated = ? "
+            "WHERE box = ? AND key = ? AND state = 'pending'",
+            (time(), self.name, message_id),
+        )
+        return cursor.rowcount == 1
+
+    def release(self, message_id: str):
+        """Return a claimed message to the pending state."""
+        self._execute(
+            "UPDATE messages SET state = 'pending', updated = ? WHERE box = ? AND key = ? AND state = 'claimed'",
+            (time(), self.name, message_id),
+        )
+
+    def requeue(self, message_id: str, message: Message = None):
+        """Return a message to the pending state without counting the attempt
+        that was made, e.g., because it was interrupted by a shutdown. If a
+        `message` is given, it replaces the stored one (for example, to record
+        a checkpoint in its headers)."""
+        now = time()
+        if message is not None:
+            self._execute(
+                "UPDATE messages SET state = 'pending', attempts = MAX(attempts - 1, 0), headers = ?, body = ?, "
+                "updated = ? WHERE box = ? AND key = ? AND state = 'claimed'",
+                (json.dumps(message.headers), message.body, now, self.name, message_id),
+            )
+        else:
+            self._execute(
+                "UPDATE messages SET state = 'pending', attempts = MAX(attempts - 1, 0), updated = ? "
+                "WHERE box = ? AND key = ? AND state = 'claimed'",
+                (now, self.name, message_id),
+            )
+
+    def fail(self, message_id: str):
+        """Mark a message as failed, so it will not be replayed."""
+        self._execute(
+            "UPDATE messages SET state = 'failed', updated = ? WHERE box = ? AND key = ?",
+            (time(), self.name, message_id),
+        )
+
+    def attempts(self, message_id: str) -> int:
+        """Number of times the message has been claimed."""
+        row = self._execute(
+            'SELECT attempts FROM messages WHERE box = ? AND key = ?', (self.name, message_id)
+        ).fetchone()
+        return row[0] if row is not None else 0
+
+    def get(self, message_id: str) -> Optional[Message]:
+        row = self._execute(
+            'SELECT headers, body FROM messages WHERE box = ? AND key = ?', (self.name, message_id)
+        ).fetchone()
+        return self._to_message(row) if row is not None else None
+
+    def _to_message(self, row) -> Message:
+        headers, body = row
+        return self.message_class(headers=json.loads(headers), body=body)
+
+    def _select(self, states: tuple[str, ...], batch_size: int = 100) -> Iterator[Message]:
+        # page through the box by sequence number, so that a long replay does not
+        # load every message at once or hold a read transaction open
+        last_seq = 0
+        placeholders = ','.join('?' for _ in states)
+        while True:
+            rows = self._execute(
+                f'SELECT seq, headers, body FROM messages WHERE box = ? AND state IN ({placeholders}) AND seq > ? '
+                'ORDER BY seq LIMIT ?',
+                (self.name, *states, last_seq, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            for seq, headers, body in rows:
+                last_seq = seq
+                yield self._to_message((headers, body))
+
+    def pending(self) -> Iterator[Message]:
+        """Iterate over the pending messages, in the order they were added."""
+        return self._select(('pending',))
+
+    def __iter__(self) -> Iterator[Message]:
+        """Iterate over the pending and claimed messages, in the order they were added."""
+        return self._select(('pending', 'claimed'))
+
+    def __len__(self) -> int:
+        return self._execute(
+            "SELECT COUNT(*) FROM messages WHERE box = ? AND state != 'failed'", (self.name,)
+        ).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
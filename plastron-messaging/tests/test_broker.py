@@ -0,0 +1,48 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from plastron.messaging.broker import BatchPublisher, Broker, ServerTuple
+from plastron.messaging.messages import Message
+
+
+@pytest.fixture
+def broker():
+    broker = Broker(
+        server=ServerTuple('localhost', 61613),
+        message_store_dir='/tmp',
+        destinations={'REINDEXING': '/queue/reindex'},
+    )
+    broker.connection = MagicMock()
+    broker.connection.begin.side_effect = (f'tx-{n}' for n in range(100))
+    return broker
+
+
+def sent_transactions(broker) -> list[str]:
+    return [call.kwargs['transaction'] for call in broker.connection.send.call_args_list]
+
+
+def test_batch_publisher(broker):
+    limiter = MagicMock()
+    with BatchPublisher(broker, batch_size=2, rate_limiter=limiter) as publisher:
+        for n in range(5):
+            publisher.send(broker.destination('reindexing'), Message(headers={'n': str(n)}))
+
+    assert sent_transactions(broker) == ['tx-0', 'tx-0', 'tx-1', 'tx-1', 'tx-2']
+    assert [call.args[0] for call in broker.connection.commit.call_args_list] == ['tx-0', 'tx-1', 'tx-2']
+    assert publisher.sent == 5
+    assert publisher.transactions == 3
+    assert limiter.wait.call_count == 5
+    broker.connection.abort.assert_not_called()
+
+
+def test_batch_publisher_aborts_on_error(broker):
+    with pytest.raises(RuntimeError):
+        with BatchPublisher(broker, batch_size=2) as publisher:
+            for n in range(3):
+                publisher.send(broker.destination('reindexing'), Message(headers={'n': str(n)}))
+            raise RuntimeError('walk failed')
+
+    broker.connection.commit.assert_called_once_with('tx-0')
+    broker.connection.abort.assert_called_once_with('tx-1')
+    assert publisher.sent == 2
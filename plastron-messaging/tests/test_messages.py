@@ -1,5 +1,9 @@
-from plastron.messaging.messages import PlastronCommandMessage, PlastronErrorMessage, PlastronMessage, \
-    PlastronResponseMessage
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from plastron.messaging.messages import MessageBox, PlastronCommandMessage, PlastronErrorMessage, PlastronMessage, \
+    PlastronResponseMessage, SQLiteMessageBox
 
 
 def test_plastron_message_no_body():
@@ -99,3 +103,106 @@ def test_plastron_command_message_with_args():
     assert msg.headers['PlastronArg-size'] == 38
     assert msg.headers['PlastronArg-color'] == 'blue'
     assert msg.headers['persistent'] == 'true'
+
+
+@pytest.fixture
+def message_store(tmp_path):
+    return tmp_path / 'messages.sqlite'
+
+
+def command_message(n: int) -> PlastronCommandMessage:
+    return PlastronCommandMessage(message_id=f'msg-{n}', job_id=f'job-{n}', command='echo', body=f'body {n}')
+
+
+def test_message_read(tmp_path):
+    filename = tmp_path / 'message'
+    filename.write_text('message-id:foo\nPlastronJobId: 1\n\nline one\n\nline three\n')
+    msg = PlastronMessage.read(filename)
+    assert msg.id == 'foo'
+    assert msg.job_id == '1'
+    assert msg.body == 'line one\n\nline three\n'
+
+
+def test_sqlite_message_box_order(message_store):
+    inbox = SQLiteMessageBox(message_store, 'inbox', PlastronCommandMessage)
+    for n in (3, 1, 2):
+        assert inbox.add(f'msg-{n}', command_message(n))
+    assert len(inbox) == 3
+    messages = list(inbox.pending())
+    assert [m.id for m in messages] == ['msg-3', 'msg-1', 'msg-2']
+    assert all(isinstance(m, PlastronCommandMessage) for m in messages)
+    assert messages[0].body == 'body 3'
+    assert messages[0].command == 'echo'
+
+
+def test_sqlite_message_box_duplicate_add(message_store):
+    inbox = SQLiteMessageBox(message_store, 'inbox', PlastronCommandMessage)
+    assert inbox.add('msg-1', command_message(1))
+    assert not inbox.add('msg-1', command_message(2))
+    assert inbox.get('msg-1').body == 'body 1'
+    assert len(inbox) == 1
+
+
+def test_sqlite_message_box_claim_and_ack(message_store):
+    inbox = SQLiteMessageBox(message_store, 'inbox', PlastronCommandMessage)
+    inbox.add('msg-1', command_message(1))
+    assert inbox.claim('msg-1')
+    # cannot claim twice
+    assert not inbox.claim('msg-1')
+    assert inbox.attempts('msg-1') == 1
+    assert list(inbox.pending()) == []
+    assert [m.id for m in inbox] == ['msg-1']
+
+    inbox.release('msg-1')
+    assert inbox.claim('msg-1')
+    assert inbox.attempts('msg-1') == 2
+
+    inbox.remove('msg-1')
+    assert len(inbox) == 0
+    assert inbox.get('msg-1') is None
+
+
+def test_sqlite_message_box_concurrent_claims(message_store):
+    inbox = SQLiteMessageBox(message_store, 'inbox', PlastronCommandMessage)
+    for n in range(50):
+        inbox.add(f'msg-{n}', command_message(n))
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(inbox.claim, [f'msg-{n % 50}' for n in range(400)]))
+    assert results.count(True) == 50
+
+
+def test_sqlite_message_box_replay_after_restart(message_store):
+    inbox = SQLiteMessageBox(message_store, 'inbox', PlastronCommandMessage)
+    for n in range(3):
+        inbox.add(f'msg-{n}', command_message(n))
+    inbox.claim('msg-0')
+    inbox.claim('msg-1')
+    inbox.remove('msg-1')
+    inbox.fail('msg-2')
+    inbox.close()
+
+    inbox = SQLiteMessageBox(message_store, 'inbox', PlastronCommandMessage)
+    # the unfinished claim is released; the failed message is not replayed
+    assert [m.id for m in inbox.pending()] == ['msg-0']
+    assert inbox.attempts('msg-0') == 1
+
+
+def test_sqlite_message_boxes_share_a_file(message_store):
+    inbox = SQLiteMessageBox(message_store, 'inbox', PlastronCommandMessage)
+    outbox = SQLiteMessageBox(message_store, 'outbox', PlastronResponseMessage, key_header='PlastronJobId')
+    inbox.add('1', command_message(1))
+    outbox.add('1', PlastronResponseMessage(job_id='1', state='Done'))
+    assert len(inbox) == 1
+    assert len(outbox) == 1
+    inbox.remove('1')
+    assert len(outbox) == 1
+
+
+def test_sqlite_message_box_imports_files(tmp_path, message_store):
+    old_inbox = tmp_path / 'inbox'
+    box = MessageBox(old_inbox, PlastronCommandMessage)
+    box.add('msg-1', command_message(1))
+
+    inbox = SQLiteMessageBox(message_store, 'inbox', PlastronCommandMessage, import_dir=old_inbox)
+    assert [m.id for m in inbox.pending()] == ['msg-1']
+    assert list(old_inbox.iterdir()) == []
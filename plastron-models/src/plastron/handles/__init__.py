@@ -1,7 +1,8 @@
 import dataclasses
 import logging
+import threading
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Optional
 
 from requests import Session
 from requests_jwtauth import HTTPBearerAuth
@@ -118,6 +119,81 @@ class HandleServiceClient:
         return updated_handle_info
 
 
+class CachingHandleServiceClient:
+    """Wrapper around a `HandleServiceClient` that caches handle lookups in memory,
+    keyed by repository URL (the handle's `repo_id`). The handles that are found,
+    created, or updated through this client are also indexed by their handle string,
+    so that `get_info()` can be answered from the same cache.
+
+    The cache is never invalidated, so a caching client should only be kept for the
+    duration of a single batch of work, such as a publication job. It is safe to use
+    from multiple threads.
+
+    ```pycon
+    >>> handle_client = CachingHandleServiceClient(context.handle_client)
+    >>> handle_client.find_handle(uri)
+    ```
+    """
+
+    def __init__(self, client: HandleServiceClient):
+        self.client = client
+        self._by_repo_id: dict[tuple[str, str], HandleInfo] = {}
+        self._by_handle: dict[tuple[str, str], HandleInfo] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def default_prefix(self) -> str:
+        return self.client.default_prefix
+
+    @property
+    def default_repo(self) -> str:
+        return self.client.default_repo
+
+    def _remember(self, handle_info: HandleInfo, repo_id: str = None, repo: str = None) -> HandleInfo:
+        with self._lock:
+            key = (repo or handle_info.repo or self.default_repo, repo_id or handle_info.repo_id)
+            self._by_repo_id[key] = handle_info
+            if handle_info.exists:
+                self._by_handle[(handle_info.prefix, handle_info.suffix)] = handle_info
+        return handle_info
+
+    def _cached(self, cache: dict, key: tuple[str, str]) -> Optional[HandleInfo]:
+        with self._lock:
+            handle_info = cache.get(key)
+            if handle_info is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return handle_info
+
+    def get_info(self, prefix: str, suffix: str) -> HandleInfo:
+        handle_info = self._cached(self._by_handle, (prefix, suffix))
+        if handle_info is None:
+            handle_info = self._remember(self.client.get_info(prefix, suffix))
+        return handle_info
+
+    def find_handle(self, repo_id: str, repo: str = None) -> HandleInfo:
+        handle_info = self._cached(self._by_repo_id, (repo or self.default_repo, repo_id))
+        if handle_info is None:
+            # remember negative results as well, so that a missing handle is only looked up once
+            handle_info = self._remember(self.client.find_handle(repo_id=repo_id, repo=repo), repo_id, repo)
+        return handle_info
+
+    def create_handle(self, repo_id: str, url: str, prefix: str = None, repo: str = None) -> HandleInfo:
+        handle_info = self.client.create_handle(repo_id=repo_id, url=url, prefix=prefix, repo=repo)
+        return self._remember(handle_info, repo_id, repo)
+
+    def update_handle(self, handle_info: HandleInfo, **fields) -> HandleInfo:
+        updated_handle_info = self.client.update_handle(handle_info, **fields)
+        if handle_info.repo_id != updated_handle_info.repo_id:
+            # the old repo_id no longer resolves to this handle
+            with self._lock:
+                self._by_repo_id.pop((handle_info.repo or self.default_repo, handle_info.repo_id), None)
+        return self._remember(updated_handle_info)
+
+
 class HandleError(Exception):
     pass
 
@@ -1,6 +1,9 @@
-from typing import Type, Dict
+from collections import defaultdict
+from functools import lru_cache
+from threading import Lock
+from typing import Dict, Iterable, Optional, Sequence, Type
 
-from importlib_metadata import entry_points
+from importlib_metadata import EntryPoint, entry_points
 from rdflib import URIRef
 
 from plastron.rdfmapping.resources import RDFResourceBase, RDFResource
@@ -25,24 +28,119 @@ class ContentModeledResource(RDFResourceBase):
     HEADER_MAP: Dict = None
 
 
+class ModelRegistry:
+    """Lookup tables for the content model plugins, from model name, RDF type,
+    or set of RDF types to model class.
+
+    Classes are loaded from the plugins when first needed, and the RDF type
+    tables are built once, the first time a lookup by type is made. When more
+    than one model has a given RDF type, the models named in `precedence` come
+    first, in that order, followed by the rest in plugin order.
+
+    ```pycon
+    >>> registry = ModelRegistry(CONTENT_MODEL_CLASSES, precedence=['Item'])
+    >>> registry.from_uri(pcdm.Object)
+    <class 'plastron.models.umd.Item'>
+    ```
+    """
+    def __init__(self, plugins: Iterable[EntryPoint], precedence: Sequence[str] = ()):
+        self.plugins = {plugin.name: plugin for plugin in plugins}
+        self.precedence = list(precedence)
+        self._classes: dict[str, Type[ContentModeledResource]] = {}
+        self._by_type: Optional[dict[URIRef, list[Type[ContentModeledResource]]]] = None
+        self._by_types: Optional[dict[frozenset[URIRef], Type[ContentModeledResource]]] = None
+        self._types: dict[Type[ContentModeledResource], tuple[frozenset[URIRef], int]] = {}
+        self._untyped: list[Type[ContentModeledResource]] = []
+        self._lock = Lock()
+
+    def from_name(self, model_name: str) -> Type[ContentModeledResource]:
+        if model_name not in self._classes:
+            try:
+                self._classes[model_name] = self.plugins[model_name].load()
+            except KeyError as e:
+                raise ModelClassNotFoundError(model_name) from e
+        return self._classes[model_name]
+
+    def _build(self):
+        def rank(name: str) -> int:
+            if name in self.precedence:
+                return self.precedence.index(name)
+            return len(self.precedence) + plugin_names.index(name)
+
+        with self._lock:
+            if self._by_type is not None:
+                return
+            plugin_names = list(self.plugins)
+            by_type = defaultdict(list)
+            by_types = {}
+            for n, name in enumerate(sorted(plugin_names, key=rank)):
+                cls = self.from_name(name)
+                rdf_types = frozenset(cls.default_values.get('rdf_type', ()))
+                self._types[cls] = (rdf_types, n)
+                if not rdf_types:
+                    self._untyped.append(cls)
+                for rdf_type in rdf_types:
+                    by_type[rdf_type].append(cls)
+                by_types.setdefault(rdf_types, cls)
+            # set these last, since their presence means the tables are complete
+            self._by_types = by_types
+            self._by_type = dict(by_type)
+
+    @property
+    def by_type(self) -> dict[URIRef, list[Type[ContentModeledResource]]]:
+        """Models that have each RDF type, in order of precedence."""
+        if self._by_type is None:
+            self._build()
+        return self._by_type
+
+    @property
+    def by_types(self) -> dict[frozenset[URIRef], Type[ContentModeledResource]]:
+        """Model with each exact set of RDF types."""
+        if self._by_type is None:
+            self._build()
+        return self._by_types
+
+    def from_uri(self, rdf_type: URIRef) -> Type[ContentModeledResource]:
+        """The model with the highest precedence that has `rdf_type`."""
+        try:
+            return self.by_type[rdf_type][0]
+        except KeyError:
+            raise ModelClassNotFoundError(str(rdf_type))
+
+    def guess(self, rdf_types: Iterable[URIRef]) -> Type[ContentModeledResource]:
+        """The model whose RDF types are all in `rdf_types`. If there is more
+        than one, the one with the most types wins; if there is still a tie,
+        the one with the highest precedence wins."""
+        rdf_types = frozenset(rdf_types)
+        if rdf_types in self.by_types:
+            return self.by_types[rdf_types]
+        candidates = {
+            cls
+            for rdf_type in rdf_types
+            for cls in self.by_type.get(rdf_type, ())
+            if self._types[cls][0] <= rdf_types
+        }
+        if candidates:
+            return min(candidates, key=lambda cls: (-len(self._types[cls][0]), self._types[cls][1]))
+        if self._untyped:
+            return self._untyped[0]
+        raise ModelClassError()
+
+
+@lru_cache(maxsize=None)
+def get_registry() -> ModelRegistry:
+    """The registry of the installed content model plugins, built once per
+    process."""
+    return ModelRegistry(CONTENT_MODEL_CLASSES)
+
+
 def get_model_from_name(model_name: str) -> Type[ContentModeledResource]:
-    try:
-        return CONTENT_MODEL_CLASSES[model_name].load()
-    except KeyError as e:
-        raise ModelClassNotFoundError(model_name) from e
+    return get_registry().from_name(model_name)
 
 
 def get_model_from_uri(rdf_type: URIRef) -> Type[ContentModeledResource]:
-    for plugin in CONTENT_MODEL_CLASSES:
-        cls = plugin.load()
-        if rdf_type in cls.default_values.get('rdf_type', set()):
-            return cls
-    raise ModelClassNotFoundError(str(rdf_type))
+    return get_registry().from_uri(rdf_type)
 
 
 def guess_model(resource: RDFResource) -> Type[ContentModeledResource]:
-    for plugin in CONTENT_MODEL_CLASSES:
-        cls = plugin.load()
-        if cls.default_values.get('rdf_type', set()) <= set(resource.rdf_type.values):
-            return cls
-    raise ModelClassError()
+    return get_registry().guess(resource.rdf_type.values)
@@ -1,8 +1,10 @@
 import csv
+import json
 import re
 from collections import defaultdict
 from collections.abc import Iterable, Mapping
 from contextlib import contextmanager
+from functools import lru_cache
 from itertools import zip_longest
 from pathlib import Path
 from typing import TextIO, TypeVar, IO, NamedTuple
@@ -14,7 +16,7 @@ from plastron.files import FileSpec
 from plastron.models import ContentModeledResource
 from plastron.models.fedora import FedoraResource
 from plastron.namespaces import umdaccess
-from plastron.rdfmapping.descriptors import DataProperty, ObjectProperty
+from plastron.rdfmapping.descriptors import OBJECT_CLASSES, DataProperty, ObjectProperty, Property
 from plastron.rdfmapping.embed import EmbeddedObject
 from plastron.rdfmapping.properties import RDFDataProperty, RDFObjectProperty
 from plastron.rdfmapping.resources import RDFResource, RDFResourceBase
@@ -39,12 +41,19 @@ def split_escaped(string: str, separator: str = '|') -> list[str]:
     """  # noqa: W605
     if string is None or string == '':
         return []
+    values = get_separator_pattern(separator).split(string)
+    # remove the escape character
+    return [ESCAPED_CHARACTER.sub(r'\1', v) if '\\' in v else v for v in values]
+
+
+ESCAPED_CHARACTER = re.compile(r'\\(.)')
+
+
+@lru_cache
+def get_separator_pattern(separator: str) -> re.Pattern:
     # uses a negative look-behind to only split on separator characters
     # that are NOT preceded by an escape character (the backslash)
-    pattern = re.compile(r'(?<!\\)' + re.escape(separator))
-    values = pattern.split(string)
-    # remove the escape character
-    return [re.sub(r'\\(.)', r'\1', v) for v in values]
+    return re.compile(r'(?<!\\)' + re.escape(separator))
 
 
 def join_values(values: list[list[str] | str]) -> str:
@@ -194,16 +203,24 @@ def flatten(
     """Convert an RDF description to a dictionary with `ColumnHeader` keys and list values, and a
     lookup index list for embedded objects. RDF attributes of the description object are mapped to
     the header keys by the `header_map`."""
+    return flatten_with_plan(description, get_column_plan(type(description), header_map))
+
+
+def flatten_with_plan(description: RDFResourceBase, plan: 'ColumnPlan') -> ColumnsDict:
+    """Same as `flatten()`, but uses an already compiled `ColumnPlan`."""
     columns = ColumnsDict()
-    for attr, header in header_map.items():
+    for attr, header in plan.header_map.items():
         if isinstance(header, dict):
             # treat this as an embedded ObjectProperty
             base_prop = getattr(description, attr)
             assert isinstance(base_prop, RDFObjectProperty), f'"{attr}" must be an object property'
+            embedded_plan = None
             for n, obj in enumerate(base_prop.objects):
+                if embedded_plan is None:
+                    embedded_plan = plan.embedded_plan(attr)
                 # add this embedded object to the index for this row
                 columns.index.append([f'{attr}[{n}]=#{URLObject(obj.uri).fragment}'])
-                embedded_columns = flatten(obj, header)
+                embedded_columns = flatten_with_plan(obj, embedded_plan)
                 for k, v in embedded_columns.items():
                     if k not in columns:
                         columns[k] = []
@@ -213,7 +230,7 @@ def flatten(
                     # proper ";" separator between parallel objects
                     columns[k].append(v)
         else:
-            columns[ColumnHeader(label=header)] = flatten_basic_property(description, attr)
+            columns[plan.column_header(header)] = flatten_basic_property(description, attr)
 
     return columns
 
@@ -251,7 +268,11 @@ def get_column_headers(headers: Iterable[str], base_header: str) -> list[ColumnH
     ]
 
 
-def get_embedded_params(row: Mapping[str, str], header_labels: Iterable[str]) -> list[dict[str, str]]:
+def get_embedded_params(
+    row: Mapping[str, str],
+    header_labels: Iterable[str],
+    column_headers: Mapping[str, list[ColumnHeader]] = None,
+) -> list[dict[str, str]]:
     """From a data row and a set of header labels, construct a list of parameter
     dictionaries for one or more parallel embedded objects.
 
@@ -279,10 +300,15 @@ def get_embedded_params(row: Mapping[str, str], header_labels: Iterable[str]) ->
     ```
 
     Which is suitable for passing to `unflatten()` for building the embedded objects themselves.
+
+    If `column_headers` (a mapping of header label to the list of matching `ColumnHeader`
+    objects in `row`) is given, it is used instead of searching the row's keys for each label.
     """
+    if column_headers is None:
+        column_headers = {header: get_column_headers(row.keys(), header) for header in header_labels}
     params = defaultdict(list)
     for header in header_labels:
-        for column_header in get_column_headers(row.keys(), header):
+        for column_header in column_headers[header]:
             params[str(column_header)].extend(row[str(column_header)].split(';'))
 
     sub_rows = list(zip_longest(*params.values()))
@@ -298,22 +324,34 @@ def unflatten(
     """Transform a mapping of column headers to values (such as would be returned by a
     `csv.DictReader`) into a dictionary of parameters that can be passed to the constructor
     of an RDF description class to create an RDF description object."""
+    return unflatten_with_plan(row_data, get_column_plan(resource_class, header_map), index)
+
+
+def unflatten_with_plan(
+    row_data: Mapping[str, str],
+    plan: 'ColumnPlan',
+    index: Mapping[str, Mapping[int, str]] = None,
+) -> dict[str, list[Literal | URIRef | EmbeddedObject]]:
+    """Same as `unflatten()`, but uses an already compiled `ColumnPlan`."""
     if index is None:
         index = {}
     params = defaultdict(list)
-    for attr, header in header_map.items():
-        descriptor = getattr(resource_class, attr)
+    column_headers = plan.column_headers(row_data.keys())
+    for attr, header in plan.header_map.items():
+        descriptor = plan.descriptors[attr]
         if isinstance(header, dict):
-            for n, sub_row in enumerate(get_embedded_params(row_data, header_labels=header.values())):
-                embedded_params = unflatten(sub_row, descriptor.object_class, header, index)
+            embedded_plan = plan.embedded_plan(attr)
+            sub_rows = get_embedded_params(row_data, header_labels=header.values(), column_headers=column_headers)
+            for n, sub_row in enumerate(sub_rows):
+                embedded_params = unflatten_with_plan(sub_row, embedded_plan, index)
                 if any(embedded_params.values()):
                     params[attr].append(EmbeddedObject(
-                        cls=descriptor.object_class,
+                        cls=embedded_plan.resource_class,
                         fragment_id=index.get(attr, {}).get(n, None),
                         **embedded_params,
                     ))
         else:
-            for column_header in get_column_headers(row_data.keys(), header):
+            for column_header in column_headers[header]:
                 values = filter(not_empty, split_escaped(row_data.get(str(column_header)), separator='|'))
                 if isinstance(descriptor, ObjectProperty):
                     params[attr].extend(URIRef(v) for v in values)
@@ -322,6 +360,92 @@ def unflatten(
     return params
 
 
+class ColumnPlan:
+    """Compiled mapping between the columns of a CSV file and the properties
+    of a content model, as defined by a header map. Looking up the descriptor
+    for each attribute, and matching the actual column headers of a file to
+    the header labels (including language-specific variants such as
+    "Title [de]"), is done once per plan (and once per distinct set of
+    column headers), instead of once per row.
+
+    Use `get_column_plan()` to get the cached plan for a model class."""
+
+    def __init__(self, resource_class: type[RDFResourceBase], header_map: Mapping[str, str | dict]):
+        self.resource_class = resource_class
+        self.header_map = header_map
+        self.descriptors: dict[str, Property] = {attr: getattr(resource_class, attr) for attr in header_map}
+        """Mapping of attribute name to property descriptor"""
+        self.attrs_by_label: dict[str, str] = flatten_headers(header_map)
+        """Mapping of header label to dotted attribute path (e.g., `"subject.label"`)"""
+        self.labels: list[str] = [header for header in header_map.values() if not isinstance(header, dict)]
+        for header in header_map.values():
+            if isinstance(header, dict):
+                self.labels.extend(h for h in header.values() if not isinstance(h, dict))
+        self._column_header_objects = {label: ColumnHeader(label=label) for label in self.labels}
+        self._embedded_plans: dict[str, ColumnPlan] = {}
+        self._column_headers: dict[tuple[str, ...], dict[str, list[ColumnHeader]]] = {}
+
+    def column_header(self, label: str) -> ColumnHeader:
+        """Return the (shared) `ColumnHeader` object with no language for `label`."""
+        try:
+            return self._column_header_objects[label]
+        except KeyError:
+            return ColumnHeader(label=label)
+
+    def embedded_plan(self, attr: str) -> 'ColumnPlan':
+        """Return the plan for the embedded object property `attr`."""
+        if attr not in self._embedded_plans:
+            object_class = self.descriptors[attr].object_class
+            if isinstance(object_class, str):
+                object_class = OBJECT_CLASSES[object_class]
+            self._embedded_plans[attr] = ColumnPlan(object_class, self.header_map[attr])
+        return self._embedded_plans[attr]
+
+    def get_descriptor(self, attrs: str) -> Property:
+        """Return the descriptor of the final property in the dotted attribute
+        path `attrs` (e.g., `"subject.label"`)."""
+        first, _, rest = attrs.partition('.')
+        if rest:
+            return self.embedded_plan(first).get_descriptor(rest)
+        return self.descriptors[first]
+
+    def column_headers(self, fieldnames: Iterable[str]) -> dict[str, list[ColumnHeader]]:
+        """Return a mapping of each header label in this plan to the list of
+        `ColumnHeader` objects in `fieldnames` that match it. The result is
+        cached for each distinct sequence of field names."""
+        key = tuple(fieldnames)
+        try:
+            return self._column_headers[key]
+        except KeyError:
+            pass
+        if len(self._column_headers) >= 64:
+            self._column_headers.clear()
+        headers = self._column_headers[key] = {label: get_column_headers(key, label) for label in self.labels}
+        return headers
+
+
+_column_plans: dict[type, ColumnPlan] = {}
+
+
+def get_column_plan(resource_class: type[RDFResourceBase], header_map: Mapping[str, str | dict] = None) -> ColumnPlan:
+    """Return a `ColumnPlan` for `resource_class` and `header_map`. If `header_map` is `None`,
+    uses the `HEADER_MAP` of `resource_class`.
+
+    Plans for a model class's own `HEADER_MAP` are built once and cached. Any other header map
+    gets a new plan on each call."""
+    if header_map is None:
+        header_map = resource_class.HEADER_MAP
+    if header_map is not getattr(resource_class, 'HEADER_MAP', None):
+        return ColumnPlan(resource_class, header_map)
+    plan = _column_plans.get(resource_class)
+    if plan is None or plan.header_map is not header_map:
+        plan = _column_plans[resource_class] = ColumnPlan(resource_class, header_map)
+    return plan
+
+
+LANGUAGE_PREFIX = re.compile(r'^\[@(\w+)]')
+
+
 def get_literal(column_header: ColumnHeader, descriptor: DataProperty, input_value: str) -> Literal:
     """Given a `ColumnHeader`, a data property descriptor, and a string input value,
     return an RDF `Literal` with the appropriate value, language, and datatype.
@@ -336,7 +460,7 @@ def get_literal(column_header: ColumnHeader, descriptor: DataProperty, input_val
     "[@ja]イヌ"
     ```
     """
-    m = re.match(r'^\[@(\w+)]', input_value)
+    m = LANGUAGE_PREFIX.match(input_value)
     if m:
         language = m[1]
         value = input_value[len(language) + 3:]
@@ -378,7 +502,7 @@ def ensure_binary_mode(file: IO):
 class Sheet:
     def __init__(self, model: type[ContentModeledResource]):
         self.model_class = model
-        self.headers = list(flatten_headers(self.header_map).keys()) + CSVSerializer.SYSTEM_HEADERS
+        self.headers = list(get_column_plan(model).attrs_by_label.keys()) + CSVSerializer.SYSTEM_HEADERS
         self.extra_headers = defaultdict(set)
         self.rows = []
 
@@ -386,12 +510,29 @@ class Sheet:
     def header_map(self) -> dict[str, str | dict[str, str]]:
         return self.model_class.HEADER_MAP
 
-    def write_csv_file(self, file: TextIO):
-        # sort and add the new headers that have language names or datatypes
+    def add_extra_header(self, label: str, header: str):
+        """Record a header (such as one with a language name or datatype) that
+        is not part of the model's declared column plan, and should be placed
+        after the column with the given `label`."""
+        self.extra_headers[label].add(header)
+
+    def add_row(self, row: dict[str, str]):
+        self.rows.append(row)
+
+    def get_headers(self) -> list[str]:
+        """Return the declared headers, with any extra headers inserted, in
+        sorted order, after the header they are variants of."""
+        headers = list(self.headers)
         for header, new_headers in self.extra_headers.items():
-            header_index = self.headers.index(header)
+            header_index = headers.index(header)
             for i, new_header in enumerate(sorted(new_headers), start=1):
-                self.headers.insert(header_index + i, new_header)
+                headers.insert(header_index + i, new_header)
+        return headers
+
+    def write_csv_file(self, file: TextIO):
+        # sort and add the new headers that have language names or datatypes
+        self.headers = self.get_headers()
+        self.extra_headers.clear()
 
         # write the CSV file;
         # file must be opened in text mode, otherwise csv complains
@@ -403,6 +544,88 @@ class Sheet:
                 csv_writer.writerow(row)
 
 
+class StreamingSheet(Sheet):
+    """Sheet that writes its rows to `filename` as they are added, instead of
+    holding them all in memory until the end.
+
+    The header row is taken from the model's `HEADER_MAP`, so it is known in
+    advance except for extra headers with language names or datatypes. To
+    accommodate these, the first `buffer_size` rows are held back, and the
+    header row is written (including any extra headers seen so far) once the
+    buffer is full.
+
+    If an extra header first appears after that point, the rest of the rows
+    are written, keyed by column, to a spool file next to `filename` instead.
+    When the sheet is closed, the CSV file is then written once more with the
+    complete header row, followed by the rows from the spool file. However
+    many extra headers appear late, the CSV file is only rewritten once."""
+
+    def __init__(self, model: type[ContentModeledResource], filename: Path, buffer_size: int = 100):
+        super().__init__(model)
+        self.filename = filename
+        self.buffer_size = buffer_size
+        self._fh = None
+        self._writer = None
+        self._spool = None
+
+    @property
+    def spool_filename(self) -> Path:
+        return self.filename.with_name(self.filename.name + '.rows.jsonl')
+
+    def add_extra_header(self, label: str, header: str):
+        super().add_extra_header(label, header)
+        if self._writer is not None and self._spool is None and header not in self._writer.fieldnames:
+            self._spool = self.spool_filename.open(mode='w')
+
+    def add_row(self, row: dict[str, str]):
+        if self._spool is not None:
+            self._spool.write(json.dumps(row) + '\n')
+        elif self._writer is not None:
+            self._writer.writerow(row)
+        else:
+            self.rows.append(row)
+            if len(self.rows) >= self.buffer_size:
+                self.flush()
+
+    def flush(self):
+        """Write the header row, if it has not already been written, and any
+        buffered rows."""
+        if self._writer is None:
+            self._open(self.filename.open(mode='w', newline=''))
+        for row in self.rows:
+            self.add_row(row)
+        self.rows.clear()
+
+    def close(self):
+        self.flush()
+        self._fh.close()
+        if self._spool is not None:
+            self._spool.close()
+            self._rewrite()
+        self._fh = None
+        self._writer = None
+        self._spool = None
+
+    def _open(self, fh: TextIO):
+        self._fh = fh
+        self._writer = csv.DictWriter(self._fh, self.get_headers(), extrasaction='ignore')
+        self._writer.writeheader()
+
+    def _rewrite(self):
+        temp_filename = self.filename.with_suffix('.tmp')
+        self.filename.replace(temp_filename)
+        self._open(self.filename.open(mode='w', newline=''))
+        with temp_filename.open(mode='r', newline='') as in_file:
+            for row in csv.DictReader(in_file):
+                self._writer.writerow(row)
+        with self.spool_filename.open(mode='r') as in_file:
+            for line in in_file:
+                self._writer.writerow(json.loads(line))
+        self._fh.close()
+        temp_filename.unlink()
+        self.spool_filename.unlink()
+
+
 T = TypeVar('T', ContentModeledResource, RDFResource)
 
 
@@ -413,10 +636,18 @@ class CSVSerializer:
         'URI', 'PUBLIC URI', 'CREATED', 'MODIFIED', 'INDEX', 'FILES', 'ITEM_FILES', 'PUBLISH', 'HIDDEN'
     ]
 
-    def __init__(self, directory: str | Path = None):
+    def __init__(self, directory: str | Path = None, streaming: bool = False, buffer_size: int = 100):
         self.directory = Path(directory) if directory is not None else Path.cwd()
         """Destination directory for the CSV file(s)"""
 
+        self.streaming = streaming
+        """If `True`, write rows to the CSV file(s) as they are serialized,
+        instead of accumulating them until `finish()` is called"""
+
+        self.buffer_size = buffer_size
+        """In streaming mode, the number of rows to buffer before writing the
+        header row; see `StreamingSheet`"""
+
         self.sheets = {}
         """Internal accumulator of row data"""
 
@@ -440,7 +671,8 @@ class CSVSerializer:
         """
         Serializes the given resource as a CSV row using the `flatten()` function. The resulting row is
         added to an internal accumulator. The CSV file or files themselves are not actually written until
-        the `finish()` method is called.
+        the `finish()` method is called, unless the serializer is in streaming mode, in which case the
+        row is written as soon as the header row for its content model is known.
 
         Parameters:
         - files: Iterable of tuples (page_label, file_resource (BinaryResource), function_tag) for page member files
@@ -454,13 +686,20 @@ class CSVSerializer:
         resource_class = type(resource)
 
         if resource_class not in self.sheets:
-            self.sheets[resource_class] = Sheet(model=resource_class)
+            if self.streaming:
+                self.sheets[resource_class] = StreamingSheet(
+                    model=resource_class,
+                    filename=self.directory / self.get_filename(resource_class),
+                    buffer_size=self.buffer_size,
+                )
+            else:
+                self.sheets[resource_class] = Sheet(model=resource_class)
         sheet = self.sheets[resource_class]
 
-        columns = flatten(resource, resource_class.HEADER_MAP)
+        columns = flatten_with_plan(resource, get_column_plan(resource_class))
         for header in columns.keys():
             if header.language is not None:
-                sheet.extra_headers[header.label].add(str(header))
+                sheet.add_extra_header(header.label, str(header))
 
         row = {str(k): join_values(v) for k, v in columns.items()}
         row['URI'] = str(resource.uri)
@@ -478,10 +717,14 @@ class CSVSerializer:
         row['PUBLISH'] = str(umdaccess.Published in resource.rdf_type.values)
         row['HIDDEN'] = str(umdaccess.Hidden in resource.rdf_type.values)
 
-        sheet.rows.append(row)
+        sheet.add_row(row)
 
         return row
 
+    @staticmethod
+    def get_filename(resource_class: type) -> str:
+        return resource_class.__name__ + '_metadata.csv'
+
     LANGUAGE_NAMES = {
         'ja': 'Japanese',
         'ja-latn': 'Japanese (Romanized)'
@@ -505,8 +748,11 @@ class CSVSerializer:
             raise EmptyItemListError()
 
         for resource_class, sheet in self.sheets.items():
-            metadata_filename = resource_class.__name__ + '_metadata.csv'
-            with (self.directory / metadata_filename).open(mode='w') as metadata_file:
+            if isinstance(sheet, StreamingSheet):
+                # rows have already been written; just write any remaining buffered rows
+                sheet.close()
+                continue
+            with (self.directory / self.get_filename(resource_class)).open(mode='w') as metadata_file:
                 # write a CSV file for this model
                 sheet.write_csv_file(metadata_file)
 
@@ -1,9 +1,118 @@
 import re
+from functools import lru_cache, update_wrapper
+from typing import Any, Callable, NamedTuple
 
 from edtf_validate.valid_edtf import is_valid as is_valid_edtf
 from iso639.language import Language, LanguageNotFoundError
+from rdflib import Literal
 
+DEFAULT_CACHE_SIZE = 4096
 
+
+class RuleCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class _CacheKey:
+    """Wraps a value so that it is cached by its lexical form, datatype, and
+    language, while still passing the original value to the rule."""
+    __slots__ = ('value', 'key')
+
+    def __init__(self, value: Any):
+        self.value = value
+        if isinstance(value, Literal):
+            self.key = (str(value), value.datatype, value.language)
+        else:
+            self.key = (str(value), None, None)
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        return isinstance(other, _CacheKey) and self.key == other.key
+
+
+class PureRule:
+    """A validation rule whose result depends only on the value's lexical
+    form, datatype, and language, so that results can be memoized in a
+    bounded LRU cache. Create these with the `pure` decorator."""
+    def __init__(self, func: Callable[[Any], bool], maxsize: int = DEFAULT_CACHE_SIZE):
+        update_wrapper(self, func)
+        self.func = func
+        self.pure = True
+        self._cached = lru_cache(maxsize=maxsize)(lambda key: func(key.value))
+
+    def __call__(self, value: Any) -> bool:
+        try:
+            key = _CacheKey(value)
+            hash(key)
+        except TypeError:
+            # e.g., a datatype or value that is not hashable
+            return self.func(value)
+        return self._cached(key)
+
+    def cache_info(self) -> RuleCacheInfo:
+        return RuleCacheInfo(*self._cached.cache_info())
+
+    def cache_clear(self):
+        self._cached.cache_clear()
+
+
+PURE_RULES: list[PureRule] = []
+
+
+def pure(func: Callable[[Any], bool] = None, *, maxsize: int = DEFAULT_CACHE_SIZE):
+    """Decorator that marks a validation rule as pure (i.e., its result only
+    depends on the value it is given), and memoizes it. It can be used with or
+    without arguments, or to wrap an existing function:
+
+    ```python
+    @pure
+    def is_roman_numeral(value):
+        \"\"\"a Roman numeral\"\"\"
+        return bool(re.match(r'^[IVXLCDM]+$', str(value)))
+
+    @pure(maxsize=100)
+    def is_known_code(value):
+        ...
+
+    code = DataProperty(dcterms.identifier, validate=pure(is_known_code))
+    ```
+    """
+    def decorator(f: Callable[[Any], bool]) -> PureRule:
+        rule = PureRule(f, maxsize=maxsize)
+        PURE_RULES.append(rule)
+        return rule
+
+    if func is None:
+        return decorator
+    return decorator(func)
+
+
+def is_pure(rule: Callable) -> bool:
+    return getattr(rule, 'pure', False)
+
+
+def get_cache_stats() -> dict[str, RuleCacheInfo]:
+    """Cache statistics for each pure rule, keyed by the rule's qualified name.
+
+    ```pycon
+    >>> get_cache_stats()['plastron.validation.rules.is_edtf_formatted']
+    RuleCacheInfo(hits=31992, misses=8, maxsize=4096, currsize=8)
+    ```
+    """
+    return {f'{rule.__module__}.{rule.__qualname__}': rule.cache_info() for rule in PURE_RULES}
+
+
+def clear_caches():
+    for rule in PURE_RULES:
+        rule.cache_clear()
+
+
+@pure
 def is_edtf_formatted(value):
     """an EDTF-formatted date"""
     # Allow blank values
@@ -12,6 +121,7 @@ def is_edtf_formatted(value):
     return is_valid_edtf(str(value))
 
 
+@pure
 def is_valid_iso639_code(value):
     """a valid ISO-639 language code"""
     try:
@@ -0,0 +1,32 @@
+from plastron.models.authorities import Subject
+from plastron.models.umd import Item
+from plastron.rdfmapping.descriptors import DataProperty
+from plastron.serializers.csv import ColumnHeader, get_column_plan
+
+
+def test_plan_is_cached_per_model():
+    assert get_column_plan(Item) is get_column_plan(Item)
+    assert get_column_plan(Item, Item.HEADER_MAP) is get_column_plan(Item)
+
+
+def test_plan_for_other_header_map_is_not_cached(header_map):
+    assert get_column_plan(Item, header_map) is not get_column_plan(Item, header_map)
+
+
+def test_plan_get_descriptor():
+    plan = get_column_plan(Item)
+    assert plan.get_descriptor('title') is Item.title
+    descriptor = plan.get_descriptor('subject.label')
+    assert isinstance(descriptor, DataProperty)
+    assert descriptor is Subject.label
+
+
+def test_plan_column_headers(header_map):
+    plan = get_column_plan(Item, header_map)
+    fieldnames = ['Title', 'Title [de]', 'Subject', 'Subject URI', 'URI']
+    headers = plan.column_headers(fieldnames)
+    assert headers['Title'] == [ColumnHeader('Title'), ColumnHeader('Title', 'de')]
+    assert headers['Subject'] == [ColumnHeader('Subject')]
+    assert headers['Subject URI'] == [ColumnHeader('Subject URI')]
+    # the same field names give the same (cached) result
+    assert plan.column_headers(fieldnames) is headers
@@ -1,3 +1,6 @@
+import csv
+from unittest.mock import patch
+
 import pytest
 from rdflib import URIRef, Literal
 
@@ -10,7 +13,7 @@ from plastron.rdfmapping.descriptors import DataProperty
 from plastron.rdfmapping.embed import embedded, EmbeddedObject
 from plastron.rdfmapping.resources import RDFResource
 from plastron.serializers import CSVSerializer
-from plastron.serializers.csv import unflatten
+from plastron.serializers.csv import StreamingSheet, unflatten
 
 
 @pytest.mark.parametrize(
@@ -126,3 +129,66 @@ def test_multilanguage_round_trip_two_objects():
     assert isinstance(locations[1], EmbeddedObject)
     assert locations[1].cls is Place
     assert locations[1].kwargs == {'label': [Literal('Deutschland', lang='de')]}
+
+
+def read_csv(path):
+    with path.open() as file:
+        return list(csv.DictReader(file))
+
+
+def test_streaming_writes_rows_before_finish(tmp_path):
+    serializer = CSVSerializer(directory=tmp_path, streaming=True, buffer_size=2)
+    for n in range(3):
+        serializer.write(SimpleModel(title=Literal(f'Item {n}')))
+    csv_file = tmp_path / 'SimpleModel_metadata.csv'
+    # the buffer has been flushed, so the header and first rows are already on disk
+    assert csv_file.exists()
+    serializer.finish()
+    rows = read_csv(csv_file)
+    assert [row['Title'] for row in rows] == ['Item 0', 'Item 1', 'Item 2']
+
+
+def test_streaming_matches_non_streaming(tmp_path):
+    buffered_dir = tmp_path / 'buffered'
+    streaming_dir = tmp_path / 'streaming'
+    buffered_dir.mkdir()
+    streaming_dir.mkdir()
+    serializers = [CSVSerializer(directory=buffered_dir), CSVSerializer(directory=streaming_dir, streaming=True)]
+    for serializer in serializers:
+        serializer.write(SimpleModel(uri='http://example.com/1', title=Literal('Foo'), description=Literal('Bar')))
+        serializer.write(SimpleModel(uri='http://example.com/2', title=Literal('Baz')))
+        serializer.finish()
+    assert read_csv(buffered_dir / 'SimpleModel_metadata.csv') == read_csv(streaming_dir / 'SimpleModel_metadata.csv')
+
+
+def test_streaming_late_extra_header(tmp_path):
+    serializer = CSVSerializer(directory=tmp_path, streaming=True, buffer_size=1)
+    serializer.write(SimpleModel(title=Literal('Foo')))
+    sheet = serializer.sheets[SimpleModel]
+    # simulate a language-specific column that is first seen after the header has been written
+    sheet.add_extra_header('Title', 'Title [de]')
+    sheet.add_row({'Title [de]': 'Der Prozeß', 'URI': 'http://example.com/2'})
+    serializer.finish()
+    with (tmp_path / 'SimpleModel_metadata.csv').open() as file:
+        reader = csv.DictReader(file)
+        assert reader.fieldnames[:3] == ['Title', 'Title [de]', 'Description']
+        rows = list(reader)
+    assert rows[0]['Title'] == 'Foo'
+    assert rows[0]['Title [de]'] == ''
+    assert rows[1]['Title [de]'] == 'Der Prozeß'
+
+
+def test_streaming_late_extra_headers_rewrite_once(tmp_path):
+    serializer = CSVSerializer(directory=tmp_path, streaming=True, buffer_size=1)
+    serializer.write(SimpleModel(title=Literal('Foo')))
+    sheet = serializer.sheets[SimpleModel]
+    with patch.object(StreamingSheet, '_rewrite', autospec=True, side_effect=StreamingSheet._rewrite) as rewrite:
+        for n, lang in enumerate(['de', 'fr', 'ja']):
+            sheet.add_extra_header('Title', f'Title [{lang}]')
+            sheet.add_row({f'Title [{lang}]': f'Title {n}', 'URI': f'http://example.com/{n}'})
+        serializer.finish()
+    assert rewrite.call_count == 1
+    assert not sheet.spool_filename.exists()
+    rows = read_csv(tmp_path / 'SimpleModel_metadata.csv')
+    assert [row['URI'] for row in rows[1:]] == ['http://example.com/0', 'http://example.com/1', 'http://example.com/2']
+    assert [row['Title [fr]'] for row in rows] == ['', '', 'Title 1', '']
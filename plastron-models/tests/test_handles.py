@@ -1,10 +1,18 @@
 from http import HTTPStatus
 import json
+from unittest.mock import MagicMock
+
 import httpretty
 import pytest
 from rdflib import Literal
 
-from plastron.handles import HandleBearingResource, HandleServerError, HandleServiceClient, HandleInfo
+from plastron.handles import (
+    CachingHandleServiceClient,
+    HandleBearingResource,
+    HandleInfo,
+    HandleServerError,
+    HandleServiceClient,
+)
 from plastron.namespaces import umdtype
 
 
@@ -121,3 +129,41 @@ def test_update_handle_error(handle, handle_client):
     )
     with pytest.raises(HandleServerError):
         handle_client.update_handle(handle_info=handle, url='http://example.com/new-url')
+
+
+@pytest.fixture
+def mock_handle_client():
+    client = MagicMock(spec=HandleServiceClient, default_repo='fcrepo', default_prefix='1903.1')
+
+    def find_handle(repo_id, repo=None):
+        if repo_id.endswith('/missing'):
+            return HandleInfo(exists=False)
+        suffix = repo_id.rsplit('/', 1)[-1]
+        return HandleInfo(exists=True, prefix='1903.1', suffix=suffix, repo='fcrepo', repo_id=repo_id)
+
+    client.find_handle.side_effect = find_handle
+    return client
+
+
+def test_caching_client_find_handle(mock_handle_client):
+    handle_client = CachingHandleServiceClient(mock_handle_client)
+    first = handle_client.find_handle('http://example.com/123')
+    second = handle_client.find_handle('http://example.com/123')
+    assert first is second
+    mock_handle_client.find_handle.assert_called_once()
+    assert handle_client.hits == 1
+    assert handle_client.misses == 1
+    # handles found by repo_id are also available by handle
+    assert handle_client.get_info('1903.1', '123') is first
+    mock_handle_client.get_info.assert_not_called()
+
+
+def test_caching_client_create_handle_replaces_negative_result(mock_handle_client):
+    mock_handle_client.create_handle.return_value = HandleInfo(
+        exists=True, prefix='1903.1', suffix='456', repo='fcrepo', repo_id='http://example.com/missing'
+    )
+    handle_client = CachingHandleServiceClient(mock_handle_client)
+    assert not handle_client.find_handle('http://example.com/missing').exists
+    handle_client.create_handle(repo_id='http://example.com/missing', url='http://example.com/public')
+    assert handle_client.find_handle('http://example.com/missing').suffix == '456'
+    mock_handle_client.find_handle.assert_called_once()
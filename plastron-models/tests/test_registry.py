@@ -0,0 +1,69 @@
+from unittest.mock import MagicMock
+
+import pytest
+from rdflib import URIRef
+
+from plastron.models import (
+    CONTENT_MODEL_CLASSES,
+    ModelClassError,
+    ModelClassNotFoundError,
+    ModelRegistry,
+    get_model_from_uri,
+    get_registry,
+    guess_model,
+)
+from plastron.models.letter import Letter
+from plastron.models.newspaper import Issue
+from plastron.models.page import Page
+from plastron.models.umd import Item
+from plastron.namespaces import bibo, fabio, pcdm, umd
+from plastron.rdfmapping.resources import RDFResource
+
+
+def test_registry_is_built_once():
+    assert get_registry() is get_registry()
+
+
+def test_from_uri():
+    assert get_model_from_uri(umd.Item) is Item
+    assert get_model_from_uri(bibo.Letter) is Letter
+    with pytest.raises(ModelClassNotFoundError):
+        get_model_from_uri(URIRef('http://example.com/NotAType'))
+
+
+def test_precedence_for_shared_types():
+    assert ModelRegistry(CONTENT_MODEL_CLASSES, precedence=['Item']).from_uri(pcdm.Object) is Item
+    assert ModelRegistry(CONTENT_MODEL_CLASSES, precedence=['Page', 'Item']).from_uri(pcdm.Object) is Page
+    assert ModelRegistry(CONTENT_MODEL_CLASSES, precedence=['Page', 'Item']).by_type[pcdm.Object][:2] == [Page, Item]
+
+
+@pytest.mark.parametrize(
+    ('rdf_types', 'expected_model'),
+    [
+        ([pcdm.Object, umd.Item], Item),
+        ([pcdm.Object, fabio.Page], Page),
+        # extra types are ignored
+        ([pcdm.Object, umd.Item, URIRef('http://example.com/Extra')], Item),
+        # the model with the most matching types wins
+        ([pcdm.Object, umd.Item, bibo.Issue, umd.Newspaper], Issue),
+    ]
+)
+def test_guess_model(rdf_types, expected_model):
+    assert guess_model(RDFResource(rdf_type=rdf_types)) is expected_model
+
+
+def test_guess_model_no_match():
+    with pytest.raises(ModelClassError):
+        guess_model(RDFResource(rdf_type=[pcdm.Object]))
+
+
+def test_plugins_loaded_once():
+    plugin = MagicMock()
+    plugin.name = 'Item'
+    plugin.load.return_value = Item
+    registry = ModelRegistry([plugin])
+    for _ in range(3):
+        assert registry.from_name('Item') is Item
+        assert registry.from_uri(umd.Item) is Item
+        assert registry.guess([pcdm.Object, umd.Item]) is Item
+    plugin.load.assert_called_once()
@@ -10,7 +10,16 @@ from rdflib import URIRef, Literal
 from plastron.namespaces import rdfs
 from plastron.rdfmapping.descriptors import DataProperty
 from plastron.rdfmapping.resources import RDFResourceBase
-from plastron.validation.rules import is_edtf_formatted, is_handle, is_valid_iso639_code, is_iso_8601_date
+from plastron.validation.rules import (
+    clear_caches,
+    get_cache_stats,
+    is_edtf_formatted,
+    is_handle,
+    is_iso_8601_date,
+    is_pure,
+    is_valid_iso639_code,
+    pure,
+)
 from plastron.validation.vocabularies import get_vocabulary_graph, Vocabulary
 
 
@@ -161,3 +170,51 @@ def test_remote_vocab_308_redirect(shared_datadir):
     )
     vocab = Vocabulary('http://vocab.lib.umd.edu/form')
     assert URIRef('http://vocab.lib.umd.edu/form#slides_photographs') in vocab
+
+
+def test_pure_rule_is_memoized():
+    calls = []
+
+    @pure(maxsize=2)
+    def is_short(value):
+        """a short value"""
+        calls.append(value)
+        return len(str(value)) < 5
+
+    assert is_pure(is_short)
+    assert is_short.__doc__ == 'a short value'
+    assert is_short(Literal('abc'))
+    assert is_short(Literal('abc'))
+    assert not is_short(Literal('abcdef'))
+    assert len(calls) == 2
+    assert is_short.cache_info() == (1, 2, 2, 2)
+
+    # the datatype is part of the cache key
+    is_short(Literal('abc', datatype=URIRef('http://example.com/type')))
+    assert len(calls) == 3
+    # bounded by maxsize
+    assert is_short.cache_info().currsize == 2
+
+
+def test_builtin_rules_are_pure():
+    assert is_pure(is_edtf_formatted)
+    assert is_pure(is_valid_iso639_code)
+    assert not is_pure(is_handle)
+
+    clear_caches()
+    for _ in range(10):
+        assert is_edtf_formatted(Literal('2023-06'))
+        assert not is_valid_iso639_code(Literal('not-a-language'))
+    stats = get_cache_stats()
+    assert stats['plastron.validation.rules.is_edtf_formatted'].hits == 9
+    assert stats['plastron.validation.rules.is_edtf_formatted'].misses == 1
+    assert stats['plastron.validation.rules.is_valid_iso639_code'].hits == 9
+
+
+def test_pure_rule_failure_message():
+    class SimpleResource(RDFResourceBase):
+        date = DataProperty(rdfs.label, validate=is_edtf_formatted)
+
+    result = SimpleResource(date=Literal('not a date')).date.is_valid
+    assert not result
+    assert 'is not an EDTF-formatted date' in str(result)
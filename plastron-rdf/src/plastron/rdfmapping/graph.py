@@ -1,8 +1,11 @@
 import pathlib
-from typing import Optional, IO, TextIO, BinaryIO, Any
+from collections import defaultdict
+from typing import Optional, IO, TextIO, BinaryIO, Any, Iterable, Mapping
 
 from rdflib import Graph, URIRef
 from rdflib.parser import InputSource
+from rdflib.query import UpdateProcessor
+from rdflib.plugins.sparql.sparql import Update
 from rdflib.term import Node
 
 
@@ -31,12 +34,111 @@ def new_triple(old_uri: URIRef, new_uri: URIRef, s: Node, p: Node, o: Node) -> t
     return new_s, new_p, new_o
 
 
+def get_uri_nodes(graph: Graph) -> set[URIRef]:
+    """The distinct URIRefs used in any position in `graph`."""
+    return {node for triple in graph for node in triple if isinstance(node, URIRef)}
+
+
+def rewrite_nodes(graph: Graph, mapping: Mapping[Node, Node]) -> int:
+    """Replace each node that is a key in `mapping` with its value, in any
+    position. The triples that use those nodes are found through the graph's
+    subject, predicate, and object indexes, so only the affected triples are
+    removed and re-added. Returns the number of triples rewritten.
+
+    `graph` is updated in place."""
+    affected = set()
+    for node in mapping:
+        affected.update(graph.triples((node, None, None)))
+        affected.update(graph.triples((None, node, None)))
+        affected.update(graph.triples((None, None, node)))
+    # remove all the old triples first, so that one rewritten triple cannot
+    # collide with another triple that is yet to be rewritten
+    for triple in affected:
+        graph.remove(triple)
+    for s, p, o in affected:
+        graph.add((mapping.get(s, s), mapping.get(p, p), mapping.get(o, o)))
+    return len(affected)
+
+
+def get_base_uri(node: URIRef) -> str:
+    """The URI of `node` without any fragment identifier."""
+    return str(node).partition('#')[0]
+
+
 class TrackChangesGraph(Graph):
     """An RDF graph that tracks inserts and deletes."""
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.original = Graph()
         """Original graph"""
+        self.version = 0
+        """Counter that goes up every time a triple is added to or removed from this graph"""
+        self._nodes_by_base: Optional[defaultdict[str, set[URIRef]]] = None
+        self._versions: dict[tuple[Node, Node], int] = {}
+        self._bulk_version = 0
+
+    def get_version(self, subject: Node, predicate: Node) -> int:
+        """The `version` of this graph when a triple with the given subject and
+        predicate was last added or removed. If it has not changed since, the
+        objects of that subject and predicate are the same as they were.
+
+        ```pycon
+        >>> v = graph.get_version(uri, dcterms.title)
+        >>> graph.add((uri, dcterms.identifier, Literal('foo')))
+        >>> graph.get_version(uri, dcterms.title) == v
+        True
+        >>> graph.add((uri, dcterms.title, Literal('Foo')))
+        >>> graph.get_version(uri, dcterms.title) == v
+        False
+        ```
+
+        Changes to the graph that do not go through `add()`, `addN()`,
+        `remove()`, `parse()`, or `update()` (e.g., writing to its store through another graph object)
+        are not counted."""
+        return max(self._versions.get((subject, predicate), 0), self._bulk_version)
+
+    def _changed(self, subject: Optional[Node], predicate: Optional[Node]):
+        self.version += 1
+        if subject is None or predicate is None:
+            # a pattern that may match any subject or predicate
+            self._bulk_version = self.version
+        else:
+            self._versions[(subject, predicate)] = self.version
+
+    @property
+    def nodes_by_base(self) -> defaultdict[str, set[URIRef]]:
+        """Index of the URIRefs in this graph, keyed by their URI without a
+        fragment identifier. It is built the first time it is needed, and then
+        kept up to date as triples are added. Nodes are not removed from it
+        when their triples are removed, so it may contain nodes that are no
+        longer in the graph."""
+        if self._nodes_by_base is None:
+            self._nodes_by_base = defaultdict(set)
+            for node in get_uri_nodes(self):
+                self._nodes_by_base[get_base_uri(node)].add(node)
+        return self._nodes_by_base
+
+    def _index_nodes(self, triple: tuple[Node, Node, Node]):
+        if self._nodes_by_base is not None:
+            for node in triple:
+                if isinstance(node, URIRef):
+                    self._nodes_by_base[get_base_uri(node)].add(node)
+
+    def add(self, triple: tuple[Node, Node, Node]) -> 'TrackChangesGraph':
+        self._index_nodes(triple)
+        self._changed(triple[0], triple[1])
+        return super().add(triple)
+
+    def addN(self, quads: Iterable[tuple[Node, Node, Node, Any]]) -> 'TrackChangesGraph':  # noqa: N802
+        quads = list(quads)
+        for s, p, o, _ in quads:
+            self._index_nodes((s, p, o))
+            self._changed(s, p)
+        return super().addN(quads)
+
+    def remove(self, triple: tuple[Optional[Node], Optional[Node], Optional[Node]]) -> 'TrackChangesGraph':
+        self._changed(triple[0], triple[1])
+        return super().remove(triple)
 
     def parse(
         self,
@@ -52,20 +154,68 @@ class TrackChangesGraph(Graph):
     ) -> 'TrackChangesGraph':
         """Parses the graph normally, and then saves a copy of the original."""
         super().parse(source, publicID, format, location, file, data, **args)
+        # some parsers write directly to the store, so rebuild the index when
+        # next needed, and treat every subject and predicate as changed
+        self._nodes_by_base = None
+        self._changed(None, None)
         self.original = Graph()
         copy_triples(self, self.original)
         return self
 
+    def update(
+        self,
+        update_object: Update | str,
+        processor: str | UpdateProcessor = 'sparql',
+        initNs: Optional[Mapping[str, Any]] = None,  # noqa: N803
+        initBindings: Optional[Mapping[str, Node]] = None,  # noqa: N803
+        use_store_provided: bool = True,
+        **kwargs: Any,
+    ) -> None:
+        """Runs a SPARQL Update normally. The update may write directly to the
+        store, so afterward every subject and predicate is treated as changed,
+        and the index of nodes is rebuilt when next needed."""
+        try:
+            super().update(update_object, processor, initNs, initBindings, use_store_provided, **kwargs)
+        finally:
+            self._nodes_by_base = None
+            self._changed(None, None)
+
     def change_uri(self, old_uri: URIRef, new_uri: URIRef):
         """Change occurrences of ``old_uri`` to ``new_uri`` in this graph.
         This includes URIRefs that contain a fragment identifier following
         the ``old_uri``.
 
+        The affected nodes are looked up in `nodes_by_base`, and only the
+        triples that use them are rewritten; see `rewrite_nodes()`.
+
+        This object is updated in place."""
+        rewrite_nodes(self, {
+            node: URIRef(new_uri + node[len(old_uri):])
+            for node in self.nodes_by_base.get(get_base_uri(old_uri), ())
+            if node == old_uri or node.startswith(old_uri + '#')
+        })
+
+    def remap_prefix(self, old_prefix: str, new_prefix: str) -> int:
+        """Change every URIRef in this graph that begins with ``old_prefix``
+        to begin with ``new_prefix`` instead, in a single pass. Use this to
+        move many resources (e.g., all the pages and annotations under a
+        common path) at once, instead of calling `change_uri()` for each.
+
+        Returns the number of triples rewritten.
+
+        ```pycon
+        >>> graph.remap_prefix('http://localhost:8080/rest/tx:123/', 'http://localhost:8080/rest/')
+        3
+        ```
+
         This object is updated in place."""
-        for s, p, o in self:
-            new_s, new_p, new_o = new_triple(old_uri, new_uri, s, p, o)
-            self.remove((s, p, o))
-            self.add((new_s, new_p, new_o))
+        return rewrite_nodes(self, {
+            node: URIRef(new_prefix + node[len(old_prefix):])
+            for base, nodes in self.nodes_by_base.items()
+            # the prefix may end in the middle of a URI, or in its fragment identifier
+            if base.startswith(old_prefix) or old_prefix.startswith(base)
+            for node in nodes if node.startswith(old_prefix)
+        })
 
     @property
     def inserts(self) -> Graph:
@@ -28,24 +28,40 @@ class RDFProperty:
         self.repeatable = repeatable
         self.values_from = values_from
         self._validate = validate
+        self._cache = None
 
     @property
     def uri(self) -> URIRef:
         """URI of the predicate"""
         return self.predicate
 
+    def _get_values(self) -> tuple:
+        """The values of this property, read from the graph and cached until
+        the graph's version for this subject and predicate changes (see
+        `plastron.rdfmapping.graph.TrackChangesGraph.get_version()`). Graphs
+        without versions are read every time."""
+        graph = self.resource.graph
+        subject = self.resource.uri
+        get_version = getattr(graph, 'get_version', None)
+        if get_version is None:
+            return tuple(self.filter_values(graph.objects(subject, self.predicate)))
+        version = get_version(subject, self.predicate)
+        cache = self._cache
+        if cache is None or cache[0] is not graph or cache[1] != subject or cache[2] != version:
+            values = tuple(self.filter_values(graph.objects(subject, self.predicate)))
+            cache = self._cache = (graph, subject, version, values)
+        return cache[3]
+
     @property
-    def values(self) -> Iterable:
+    def values(self) -> Iterator:
         """Values of this property"""
-        return self.resource.graph.objects(self.resource.uri, self.predicate)
+        return iter(self._get_values())
 
     @property
     def value(self):
         """The first value of this property, or `None` if `values` is empty."""
-        try:
-            return next(iter(self.values))
-        except StopIteration:
-            return None
+        values = self._get_values()
+        return values[0] if values else None
 
     def __iter__(self):
         return self.values
@@ -54,7 +70,7 @@ class RDFProperty:
         return ' '.join(iter(self))
 
     def __len__(self):
-        return len(list(self.values))
+        return len(self._get_values())
 
     def clear(self):
         """Remove all values from this property."""
@@ -92,6 +108,11 @@ class RDFProperty:
         for value in values:
             self.add(value)
 
+    def filter_values(self, values: Iterable) -> list:
+        """Of the given objects of this property's predicate, the ones that are
+        values of this property. Subclasses narrow this down (e.g., by type)."""
+        return list(values)
+
     @property
     def is_valid(self) -> ValidationResult:
         """Checks the validity of this property.
@@ -108,17 +129,28 @@ class RDFProperty:
         Otherwise, returns a
         `plastron.rdfmapping.validation.ValidationFailure` object.
         """
-        if self.required and len(self) == 0:
-            return ValidationFailure(self, 'is required')
-        if not self.repeatable and len(self) > 1:
-            return ValidationFailure(self, 'is not repeatable')
-        if self.values_from is not None and any(v not in self.values_from for v in self.values):
-            return ValidationFailure(self, f'is not from {self.values_from}')
+        return self.check(list(self.values))
+
+    def check(self, values: list) -> ValidationResult:
+        """Runs the checks described in `is_valid` against a list of values that
+        has already been read from the graph."""
+        if self.required and len(values) == 0:
+            return ValidationFailure(self, 'is required', rule='required')
+        if not self.repeatable and len(values) > 1:
+            return ValidationFailure(self, 'is not repeatable', rule='repeatable')
+        if self.values_from is not None:
+            for v in values:
+                if v not in self.values_from:
+                    return ValidationFailure(self, f'is not from {self.values_from}', rule='values_from', value=v)
         if self._validate is not None:
-            if all(self._validate(v) for v in self.values):
-                return ValidationSuccess(self)
-            else:
-                return ValidationFailure(self, f'is not {self._validate.__doc__}')
+            for v in values:
+                if not self._validate(v):
+                    return ValidationFailure(
+                        self,
+                        f'is not {self._validate.__doc__}',
+                        rule=getattr(self._validate, '__name__', 'validate'),
+                        value=v,
+                    )
         return ValidationSuccess(self)
 
 
@@ -144,9 +176,11 @@ class RDFDataProperty(RDFProperty):
             raise TypeError(f'Cannot add a non-Literal value {value} to data property {self.attr_name}')
         super().add(value)
 
-    @property
-    def values(self) -> Iterator[Literal]:
-        return filter(lambda v: isinstance(v, Literal) and v.datatype == self.datatype, super().values)
+    def _is_value(self, value) -> bool:
+        return isinstance(value, Literal) and value.datatype == self.datatype
+
+    def filter_values(self, values: Iterable) -> list[Literal]:
+        return [v for v in values if self._is_value(v)]
 
     @property
     def languages(self) -> Iterator[str]:
@@ -163,21 +197,27 @@ class RDFDataProperty(RDFProperty):
         Even if this property is not marked as repeatable, more than one value
         is allowed so long as each value has a different language tag.
         """
-        is_valid_result = super().is_valid
+        return super().is_valid
+
+    def check(self, values: list[Literal]) -> ValidationResult:
+        is_valid_result = super().check(values)
         if not is_valid_result:
             # exception to the superclass rule: if repeatable is False but the only difference
             # in the values is their language, it should be valid
-            if not self.repeatable and len(self) > 1:
-                if len(set(self.languages)) != len(self):
-                    return ValidationFailure(self, 'is not repeatable')
+            if not self.repeatable and len(values) > 1:
+                if len(set(v.language for v in values)) != len(values):
+                    return ValidationFailure(self, 'is not repeatable', rule='repeatable')
             else:
                 return is_valid_result
         # all values must be literals
-        if not all(isinstance(v, Literal) for v in self.values):
-            return ValidationFailure(self, 'all values must be Literals')
+        for v in values:
+            if not isinstance(v, Literal):
+                return ValidationFailure(self, 'all values must be Literals', rule='literal', value=v)
         # if required, all values must be non-blank
-        if self.required and any(v.strip() == '' for v in self.values):
-            return ValidationFailure(self, 'all values must be non-blank')
+        if self.required:
+            for v in values:
+                if v.strip() == '':
+                    return ValidationFailure(self, 'all values must be non-blank', rule='non_blank', value=v)
         return ValidationSuccess(self)
 
 
@@ -252,12 +292,16 @@ class RDFObjectProperty(RDFProperty):
         Performs all the validity checks from `RDFProperty.is_valid()`, plus
         requires that all values are either URIRefs or RDF blank nodes.
         """
-        is_valid_result = super().is_valid
+        return super().is_valid
+
+    def check(self, values: list) -> ValidationResult:
+        is_valid_result = super().check(values)
         if not is_valid_result:
             return is_valid_result
         # all values must be URIRefs
-        if not all(isinstance(v, URIRef) or isinstance(v, BNode) for v in self.values):
-            return ValidationFailure(self, 'all values must be URIs or BNodes')
+        for v in values:
+            if not isinstance(v, (URIRef, BNode)):
+                return ValidationFailure(self, 'all values must be URIs or BNodes', rule='node', value=v)
         return ValidationSuccess(self)
 
 
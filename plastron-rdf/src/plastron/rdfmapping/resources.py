@@ -8,7 +8,7 @@ from rdflib import Graph, URIRef
 from plastron.rdfmapping.descriptors import ObjectProperty, Property, DataProperty, OBJECT_CLASSES
 from plastron.rdfmapping.graph import TrackChangesGraph, copy_triples
 from plastron.rdfmapping.properties import RDFProperty
-from plastron.rdfmapping.validation import ValidationResultsDict
+from plastron.rdfmapping.validation import ValidationResultsDict, get_validation_plan
 
 
 def is_iterable(value: Any) -> bool:
@@ -139,17 +139,13 @@ class RDFResourceBase:
 
     @property
     def is_valid(self) -> bool:
-        if not all(p.is_valid for p in self.rdf_properties()):
-            return False
-        if not all(test(self) for test in self.validators):
-            return False
-        return True
+        return all(self.validate().values())
 
     def validate(self) -> ValidationResultsDict:
-        results = ValidationResultsDict({name: getattr(self, name).is_valid for name in self.rdf_property_names})
-        for test in self.validators:
-            results['_' + test.__name__] = test(self)
-        return results
+        """Check each property, and run each of the class's validators. The
+        checks are planned once per class (see
+        `plastron.rdfmapping.validation.ValidationPlan`)."""
+        return get_validation_plan(type(self)).run(self)
 
     def redescribe(self, model: Type['RDFResourceType']) -> 'RDFResourceType':
         return model(uri=self.uri, graph=self.graph)
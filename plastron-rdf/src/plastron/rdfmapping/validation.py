@@ -1,10 +1,22 @@
-from typing import Optional, ItemsView
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Callable, ItemsView, NamedTuple, Optional
 
 
 class ValidationResult:
-    def __init__(self, prop: Optional[object] = None, message: Optional[str] = ''):
+    def __init__(
+            self,
+            prop: Optional[object] = None,
+            message: Optional[str] = '',
+            rule: Optional[str] = None,
+            value: Any = None,
+    ):
         self.prop = prop
         self.message = message
+        self.rule = rule
+        """Name of the check that failed (e.g., `required` or `is_edtf_formatted`)"""
+        self.value = value
+        """The value that failed the check, for checks of individual values"""
 
     def __str__(self):
         return self.message
@@ -23,6 +35,13 @@ class ValidationSuccess(ValidationResult):
         return True
 
 
+class Violation(NamedTuple):
+    property: str
+    rule: Optional[str]
+    value: Any
+    message: str
+
+
 class ValidationResultsDict(dict):
     @property
     def ok(self):
@@ -33,3 +52,40 @@ class ValidationResultsDict(dict):
 
     def successes(self) -> ItemsView[str, ValidationSuccess]:
         return {k: v for k, v in self.items() if isinstance(v, ValidationSuccess)}.items()
+
+    def violations(self) -> list[Violation]:
+        """The failures, as (property, rule, value, message) tuples."""
+        return [Violation(name, result.rule, result.value, str(result)) for name, result in self.failures()]
+
+
+class ValidationPlan:
+    """Validation steps for a resource class, worked out once per class.
+
+    Running the plan reads all the values of the resource's subject from its
+    graph in a single pass, groups them by predicate, and hands each property
+    its values, instead of each check of each property querying the graph
+    again.
+    """
+    def __init__(self, resource_class: type):
+        # sorted, so that the results are in a stable order
+        self.steps: list[tuple[str, Any]] = [
+            (name, getattr(resource_class, name).predicate) for name in sorted(resource_class.rdf_property_names)
+        ]
+        self.validators: list[Callable[[Any], bool]] = list(resource_class.validators)
+
+    def run(self, resource) -> ValidationResultsDict:
+        values_by_predicate = defaultdict(list)
+        for p, o in resource.graph.predicate_objects(resource.uri):
+            values_by_predicate[p].append(o)
+        results = ValidationResultsDict()
+        for name, predicate in self.steps:
+            prop = getattr(resource, name)
+            results[name] = prop.check(prop.filter_values(values_by_predicate.get(predicate, ())))
+        for test in self.validators:
+            results['_' + test.__name__] = test(resource)
+        return results
+
+
+@lru_cache(maxsize=None)
+def get_validation_plan(resource_class: type) -> ValidationPlan:
+    return ValidationPlan(resource_class)
@@ -0,0 +1,108 @@
+from unittest.mock import patch
+
+import pytest
+from rdflib import Graph, Literal, URIRef
+
+from plastron.rdfmapping.graph import TrackChangesGraph, rewrite_nodes
+
+EX = 'http://example.com/'
+title = URIRef(EX + 'title')
+has_part = URIRef(EX + 'hasPart')
+
+
+@pytest.fixture
+def graph() -> TrackChangesGraph:
+    graph = TrackChangesGraph()
+    for n in range(3):
+        page = URIRef(f'{EX}rest/page{n}')
+        graph.add((page, title, Literal(f'Page {n}')))
+        graph.add((page, has_part, URIRef(f'{page}#anno')))
+        graph.add((URIRef(f'{page}#anno'), title, Literal(f'Annotation {n}')))
+    graph.add((URIRef(EX + 'elsewhere'), has_part, URIRef(EX + 'rest/page1#anno')))
+    return graph
+
+
+def test_change_uri(graph):
+    graph.change_uri(URIRef(EX + 'rest/page1'), URIRef(EX + 'fcrepo/page1'))
+    assert len(graph) == 10
+    assert (URIRef(EX + 'fcrepo/page1'), title, Literal('Page 1')) in graph
+    assert (URIRef(EX + 'fcrepo/page1'), has_part, URIRef(EX + 'fcrepo/page1#anno')) in graph
+    assert (URIRef(EX + 'fcrepo/page1#anno'), title, Literal('Annotation 1')) in graph
+    assert (URIRef(EX + 'elsewhere'), has_part, URIRef(EX + 'fcrepo/page1#anno')) in graph
+    # URIs that only share a prefix are not changed
+    assert (URIRef(EX + 'rest/page0'), title, Literal('Page 0')) in graph
+    assert (URIRef(EX + 'rest/page2#anno'), title, Literal('Annotation 2')) in graph
+
+
+def test_change_uri_only_rewrites_affected_triples(graph):
+    with patch.object(TrackChangesGraph, 'remove', wraps=graph.remove) as remove:
+        graph.change_uri(URIRef(EX + 'rest/page1'), URIRef(EX + 'fcrepo/page1'))
+    assert remove.call_count == 4
+
+
+def test_change_uri_after_adding_triples(graph):
+    graph.change_uri(URIRef(EX + 'rest/page0'), URIRef(EX + 'fcrepo/page0'))
+    # the index of nodes is kept up to date as triples are added
+    graph.add((URIRef(EX + 'rest/page2#other'), title, Literal('Other')))
+    graph += [(URIRef(EX + 'rest/page2#more'), title, Literal('More'))]
+    graph.change_uri(URIRef(EX + 'rest/page2'), URIRef(EX + 'fcrepo/page2'))
+    assert (URIRef(EX + 'fcrepo/page2#other'), title, Literal('Other')) in graph
+    assert (URIRef(EX + 'fcrepo/page2#more'), title, Literal('More')) in graph
+
+
+def test_change_uri_after_parsing(graph):
+    graph.change_uri(URIRef(EX + 'rest/page0'), URIRef(EX + 'fcrepo/page0'))
+    graph.parse(data='{"@id": "http://example.com/rest/page2#ld", "http://example.com/title": "LD"}', format='json-ld')
+    graph.change_uri(URIRef(EX + 'rest/page2'), URIRef(EX + 'fcrepo/page2'))
+    assert (URIRef(EX + 'fcrepo/page2#ld'), title, Literal('LD')) in graph
+
+
+def test_change_uri_from_empty_uri():
+    graph = TrackChangesGraph()
+    graph.add((URIRef(''), has_part, URIRef('#part')))
+    graph.change_uri(URIRef(''), URIRef(EX + 'rest/new'))
+    assert set(graph) == {(URIRef(EX + 'rest/new'), has_part, URIRef(EX + 'rest/new#part'))}
+
+
+def test_remap_prefix(graph):
+    assert graph.remap_prefix(EX + 'rest/', EX + 'fcrepo/') == 10
+    assert not any(str(node).startswith(EX + 'rest/') for triple in graph for node in triple)
+    assert len(graph) == 10
+    assert (URIRef(EX + 'elsewhere'), has_part, URIRef(EX + 'fcrepo/page1#anno')) in graph
+
+
+def test_remap_prefix_within_fragment(graph):
+    assert graph.remap_prefix(EX + 'rest/page1#an', EX + 'rest/page1#x-an') == 3
+    assert (URIRef(EX + 'rest/page1#x-anno'), title, Literal('Annotation 1')) in graph
+
+
+def test_rewrite_nodes_swaps_nodes():
+    a, b = URIRef(EX + 'a'), URIRef(EX + 'b')
+    graph = Graph()
+    graph.add((a, has_part, b))
+    graph.add((b, has_part, a))
+    assert rewrite_nodes(graph, {a: b, b: a}) == 2
+    assert set(graph) == {(b, has_part, a), (a, has_part, b)}
+
+
+def test_get_version(graph):
+    page = URIRef(EX + 'rest/page0')
+    version = graph.get_version(page, title)
+    graph.add((page, has_part, URIRef(EX + 'rest/page0#other')))
+    assert graph.get_version(page, title) == version
+    graph.add((page, title, Literal('New title')))
+    assert graph.get_version(page, title) > version
+    version = graph.get_version(page, title)
+    # a pattern could match any predicate
+    graph.remove((page, None, None))
+    assert graph.get_version(page, title) > version
+
+
+def test_update_changes_version(graph):
+    page = URIRef(EX + 'rest/page0')
+    version = graph.get_version(page, title)
+    # an update that the store runs itself does not go through add() or remove()
+    with patch.object(graph.store, 'update', create=True) as update:
+        graph.update('INSERT DATA { <http://example.com/rest/page0> <http://example.com/title> "New title" }')
+    update.assert_called_once()
+    assert graph.get_version(page, title) > version
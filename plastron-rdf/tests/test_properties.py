@@ -1,7 +1,9 @@
 from copy import deepcopy, copy
+from unittest.mock import patch
 
-from rdflib import Literal
+from rdflib import Literal, URIRef
 
+from plastron.rdfmapping.graph import TrackChangesGraph
 from plastron.rdfmapping.resources import RDFResource
 
 
@@ -43,3 +45,64 @@ def test_property_preserves_value():
     value = Literal('foo')
     resource.label = value
     assert resource.label.value is value
+
+
+def test_values_are_cached_until_changed():
+    resource = RDFResource(label=[Literal('foo'), Literal('bar')])
+    with patch.object(TrackChangesGraph, 'objects', wraps=resource.graph.objects) as objects:
+        for _ in range(3):
+            assert len(resource.label) == 2
+            assert resource.label
+            assert resource.label.value in {Literal('foo'), Literal('bar')}
+            assert set(resource.label) == {Literal('foo'), Literal('bar')}
+        assert objects.call_count == 1
+
+        # changes to other properties do not invalidate the cache
+        resource.rdf_type.add(URIRef('http://example.com/Thing'))
+        assert len(resource.label) == 2
+        assert objects.call_count == 1
+
+        resource.label.add(Literal('baz'))
+        assert len(resource.label) == 3
+        assert objects.call_count == 2
+
+
+def test_cached_values_see_changes_through_graph():
+    resource = RDFResource(label=Literal('foo'))
+    assert resource.label.value == Literal('foo')
+
+    # changes made through another resource object, or directly to the graph
+    other = RDFResource(uri=resource.uri, graph=resource.graph)
+    other.label = Literal('bar')
+    assert resource.label.value == Literal('bar')
+    resource.graph.remove((resource.uri, None, None))
+    assert len(resource.label) == 0
+    resource.graph.parse(data=f'<{resource.uri}> <http://www.w3.org/2000/01/rdf-schema#label> "baz" .', format='nt')
+    assert set(resource.label) == {Literal('baz')}
+
+
+def test_cached_values_follow_uri_changes():
+    resource = RDFResource(uri='http://example.com/old', label=Literal('foo'))
+    assert resource.label.value == Literal('foo')
+    resource.uri = URIRef('http://example.com/new')
+    assert resource.label.value == Literal('foo')
+    # a different resource object on the old URI sees no values
+    assert len(RDFResource(uri='http://example.com/old', graph=resource.graph).label) == 0
+
+
+def test_clear_while_cached():
+    resource = RDFResource(label=[Literal('foo'), Literal('bar')])
+    assert len(resource.label) == 2
+    resource.label.clear()
+    assert len(resource.label) == 0
+    assert not resource.label
+    assert resource.label.value is None
+
+
+def test_cached_values_see_sparql_updates():
+    resource = RDFResource(uri='http://example.com/foo', label=Literal('Foo'))
+    assert resource.label.value == Literal('Foo')
+    resource.graph.update(
+        'DELETE { ?s ?p "Foo" } INSERT { ?s ?p "Baz" } WHERE { ?s ?p "Foo" }'
+    )
+    assert resource.label.value == Literal('Baz')
@@ -1,5 +1,10 @@
+from unittest.mock import patch
+
+from plastron.rdfmapping.decorators import validate
+from plastron.rdfmapping.descriptors import DataProperty, ObjectProperty
 from plastron.rdfmapping.resources import RDFResource
-from rdflib import URIRef
+from plastron.rdfmapping.validation import get_validation_plan
+from rdflib import Literal, URIRef
 
 
 def test_add_properties():
@@ -51,3 +56,49 @@ def test_set_properties_list():
         URIRef('http://purl.org/dc/dcmitype/Text'),
         URIRef('http://purl.org/dc/dcmitype/Image'),
     }
+
+
+def is_upper(value):
+    """an uppercase string"""
+    return str(value).isupper()
+
+
+@validate(lambda obj: len(obj.code) + len(obj.label) > 0)
+class Coded(RDFResource):
+    code = DataProperty(URIRef('http://example.com/code'), required=True, repeatable=True, validate=is_upper)
+    alias = DataProperty(URIRef('http://example.com/alias'))
+    seeAlso = ObjectProperty(URIRef('http://www.w3.org/2000/01/rdf-schema#seeAlso'))
+
+
+def test_validate_structured_results():
+    resource = Coded(
+        code=[Literal('ABC'), Literal('def')],
+        alias=[Literal('a', lang='en'), Literal('b', lang='fr')],
+        seeAlso=Literal('not a URI'),
+    )
+    results = resource.validate()
+    assert not results.ok
+    assert not resource.is_valid
+    violations = {v.property: v for v in results.violations()}
+    assert set(violations) == {'code', 'seeAlso'}
+    assert violations['code'].rule == 'is_upper'
+    assert violations['code'].value == Literal('def')
+    assert violations['code'].message == 'is not an uppercase string'
+    assert violations['seeAlso'].rule == 'node'
+    assert violations['seeAlso'].value == Literal('not a URI')
+    # non-repeatable values that differ by language are allowed
+    assert results['alias']
+    assert results['_<lambda>']
+
+
+def test_validate_reads_graph_once():
+    class Plain(RDFResource):
+        code = DataProperty(URIRef('http://example.com/code'), required=True, validate=is_upper)
+
+    resource = Plain(code=Literal('ABC'))
+    assert get_validation_plan(Plain) is get_validation_plan(Plain)
+    with patch.object(resource.graph, 'objects', wraps=resource.graph.objects) as objects:
+        results = resource.validate()
+    assert results.ok
+    assert results['code'].rule is None
+    objects.assert_not_called()
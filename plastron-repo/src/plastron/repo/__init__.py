@@ -301,6 +301,24 @@ class Tombstone:
     def path(self) -> Optional[str]:
         return self._resource.path
 
+    @property
+    def tombstone_url(self) -> Optional[str]:
+        if self.url is None:
+            return None
+        return f'{self.url}/fcr:tombstone'
+
+    def purge(self):
+        """Permanently remove this tombstone, so that a new resource may be
+        created at the same URL."""
+        try:
+            response = self._resource.client.delete(self.tombstone_url)
+        except ClientError as e:
+            raise RepositoryError(f'Unable to purge tombstone for {self.url}: {e}') from e
+        if response.ok or response.status_code == HTTPStatus.NOT_FOUND:
+            logger.info(f'Purged tombstone for {self.url}')
+        else:
+            raise RepositoryError(f'Unable to purge tombstone for {self.url}: {response}', response=response)
+
 
 class ContainerResource(RepositoryResource):
     """An [LDP Container](https://www.w3.org/TR/ldp/#ldpc) resource."""
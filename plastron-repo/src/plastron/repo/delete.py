@@ -0,0 +1,170 @@
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from itertools import islice
+from time import monotonic
+from typing import Any, Generator, Iterable, Iterator, Optional
+
+from rdflib import URIRef
+
+from plastron.client import ClientError
+from plastron.repo import Repository, RepositoryError, RepositoryResource, Tombstone
+
+logger = logging.getLogger(__name__)
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    """Yield successive lists of at most `size` items from `iterable`."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def is_missing(error: RepositoryError) -> bool:
+    """Returns `True` if `error` was caused by a 404 Not Found or 410 Gone response."""
+    response = error.response
+    if response is None and isinstance(error.__cause__, ClientError):
+        response = error.__cause__.response
+    return response is not None and response.status_code in (HTTPStatus.NOT_FOUND, HTTPStatus.GONE)
+
+
+class DeleteEngine:
+    """Deletes resources, and optionally the resources reachable from them by
+    traversing a list of predicates, from a repository.
+
+    The engine works in two phases:
+
+    1. **Collection:** Starting from the given URIs, the subtree is read
+       breadth-first. All resources at the same depth are read concurrently.
+    2. **Deletion:** Starting from the deepest level and working towards the
+       starting URIs, resources are deleted in concurrent batches, so that
+       children are always deleted before their parents. If `purge_tombstones`
+       is `True`, the tombstone left behind by each deleted resource is also
+       removed.
+
+    Progress is reported by the `run()` generator, which yields a status
+    dictionary after each batch of deletions."""
+
+    def __init__(
+            self,
+            repo: Repository,
+            traverse: list[URIRef] = None,
+            max_workers: int = 8,
+            batch_size: int = 100,
+            purge_tombstones: bool = False,
+            dry_run: bool = False,
+    ):
+        self.repo = repo
+        self.traverse = traverse or []
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.purge_tombstones = purge_tombstones
+        self.dry_run = dry_run
+
+    def _read(self, uri: str) -> Optional[RepositoryResource]:
+        try:
+            return self.repo[uri].read()
+        except RepositoryError as e:
+            if is_missing(e):
+                # not a problem to try and delete something that is not there
+                logger.info(f'Resource {uri} does not exist; skipping')
+                return None
+            raise
+
+    def collect(self, uris: Iterable[str], executor: ThreadPoolExecutor) -> list[list[RepositoryResource]]:
+        """Read the resources at `uris`, and any resources reachable from them
+        via the `traverse` predicates. Returns a list of levels, where each
+        level is the list of resources first found at that depth. A resource
+        that is reachable by more than one path is only included once."""
+        levels = []
+        seen = set()
+        current = []
+        for uri in uris:
+            url = str(self.repo[uri].url)
+            if url not in seen:
+                seen.add(url)
+                current.append(url)
+
+        while current:
+            level = [resource for resource in executor.map(self._read, current) if resource is not None]
+            levels.append(level)
+            current = []
+            for resource in level:
+                subject = URIRef(resource.url)
+                for predicate in self.traverse:
+                    for child in resource.graph.objects(subject, predicate):
+                        if str(child) not in seen:
+                            seen.add(str(child))
+                            current.append(str(child))
+        return levels
+
+    def _delete(self, resource: RepositoryResource) -> Optional[RepositoryError]:
+        try:
+            resource.delete()
+            if self.purge_tombstones:
+                Tombstone(resource).purge()
+        except RepositoryError as e:
+            if is_missing(e):
+                logger.info(f'Resource {resource.url} does not exist; skipping')
+                return None
+            logger.error(str(e))
+            return e
+        return None
+
+    def run(self, uris: Iterable[str]) -> Generator[dict[str, Any], None, dict[str, Any]]:
+        """Collect and delete the resources. Yields a status dictionary after
+        each batch, with the following keys:
+
+        * `count`: a `Counter` with keys `total`, `deleted`, and `errors`
+        * `deleted`: list of the resources deleted in this batch
+        * `progress`: percentage of resources processed
+        * `rate`: overall throughput, in resources per second
+        * `state`: `"delete_in_progress"`
+
+        If any deletion in a level fails, the deletion stops before moving up
+        to the next level (so that no parent is deleted after a failure to
+        delete one of its children), and the first error is raised as a
+        `RepositoryError`. Returns a final status dictionary."""
+        start = monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=__name__) as executor:
+            levels = self.collect(uris, executor)
+            count = Counter(
+                total=sum(len(level) for level in levels),
+                deleted=0,
+                errors=0,
+            )
+            logger.info(f'Found {count["total"]} resource(s) in {monotonic() - start:.2f}s')
+
+            for level in reversed(levels):
+                errors = []
+                for batch in batched(level, self.batch_size):
+                    if self.dry_run:
+                        for resource in batch:
+                            logger.info(f'Would delete resource {resource.url}')
+                        deleted = batch
+                    else:
+                        results = list(executor.map(self._delete, batch))
+                        deleted = [resource for resource, error in zip(batch, results) if error is None]
+                        errors.extend(error for error in results if error is not None)
+                    count['deleted'] += len(deleted)
+                    count['errors'] += len(batch) - len(deleted)
+                    done = count['deleted'] + count['errors']
+                    elapsed = monotonic() - start
+                    yield {
+                        'count': count,
+                        'deleted': deleted,
+                        'progress': int(done / count['total'] * 100),
+                        'rate': done / elapsed if elapsed else 0.0,
+                        'state': 'delete_in_progress',
+                    }
+                if errors:
+                    raise errors[0]
+
+        elapsed = monotonic() - start
+        return {
+            'count': count,
+            'elapsed': elapsed,
+            'rate': count['deleted'] / elapsed if elapsed else 0.0,
+            'state': 'delete_complete',
+        }
@@ -0,0 +1,466 @@
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import islice
+from time import sleep
+from typing import Any, Callable, Iterable, Iterator, Mapping, Optional, Sequence, Type
+
+import pysolr
+import requests
+
+from plastron.models import ContentModeledResource
+from plastron.rdfmapping.properties import RDFObjectProperty
+from plastron.rdfmapping.resources import RDFResourceBase
+
+logger = logging.getLogger(__name__)
+
+FieldSource = str | Callable[[RDFResourceBase], Iterable[Any]]
+"""Either a dotted attribute path (e.g., `"title"` or `"creator.label"`), or a
+function that takes a resource and returns the values for the field."""
+
+
+def get_values(resource: RDFResourceBase, path: str) -> list[str]:
+    """Follow a dotted attribute path from `resource`, and return the string
+    values found at the end of it. Intermediate steps must be object properties
+    with an object class (e.g., embedded agents or subjects).
+
+    ```pycon
+    >>> get_values(item, 'creator.label')
+    ['Jim Henson', 'Frank Oz']
+    ```
+    """
+    name, _, rest = path.partition('.')
+    prop = getattr(resource, name)
+    if not rest:
+        return [str(value) for value in prop.values]
+    if not isinstance(prop, RDFObjectProperty):
+        raise IndexingError(f'Cannot traverse through {name}; it is not an object property')
+    return [value for obj in prop.objects for value in get_values(obj, rest)]
+
+
+@dataclass
+class SolrDocumentMapping:
+    """Declarative mapping from a content model to a Solr document. Each key of
+    `fields` is a Solr field name, and each value is where to get its values
+    from (see `FieldSource`). Fields without any values are left out of the
+    document.
+
+    ```pycon
+    >>> mapping = SolrDocumentMapping(
+    ...     model=Page,
+    ...     fields={'title__txt': 'title', 'page_number__str': 'number'},
+    ... )
+    >>> mapping.to_document(page)
+    {'id': 'http://localhost:8080/fcrepo/rest/foo/p1', 'content_model_name__str': 'Page', 'title__txt': ['Page 1'],
+    'page_number__str': ['1']}
+    ```
+    """
+    model: Type[ContentModeledResource]
+    fields: Mapping[str, FieldSource]
+
+    def to_document(self, resource: RDFResourceBase) -> dict[str, Any]:
+        document = {
+            'id': str(resource.uri),
+            'content_model_name__str': self.model.model_name,
+        }
+        for name, source in self.fields.items():
+            if callable(source):
+                values = [str(value) for value in source(resource)]
+            else:
+                values = get_values(resource, source)
+            if values:
+                document[name] = values
+        return document
+
+
+def get_default_mappings() -> dict[str, SolrDocumentMapping]:
+    """Mappings for the Item, Issue, and Page content models, keyed by model name."""
+    # imported here so that the content models are only loaded when needed
+    from plastron.models.newspaper import Issue
+    from plastron.models.page import Page
+    from plastron.models.umd import Item
+
+    mappings = [
+        SolrDocumentMapping(
+            model=Item,
+            fields={
+                'title__txt': 'title',
+                'alternate_title__txt': 'alternate_title',
+                'identifier__str': 'identifier',
+                'object_type__uri': 'object_type',
+                'rights__uri': 'rights',
+                'format__uri': 'format',
+                'archival_collection__uri': 'archival_collection',
+                'presentation_set__uri': 'presentation_set',
+                'date__str': 'date',
+                'description__txt': 'description',
+                'creator__label__txt': 'creator.label',
+                'contributor__label__txt': 'contributor.label',
+                'publisher__label__txt': 'publisher.label',
+                'subject__label__txt': 'subject.label',
+                'location__label__txt': 'location.label',
+                'language__str': 'language',
+                'member_of__uri': 'member_of',
+            },
+        ),
+        SolrDocumentMapping(
+            model=Issue,
+            fields={
+                'title__txt': 'title',
+                'date__str': 'date',
+                'volume__str': 'volume',
+                'issue__str': 'issue',
+                'edition__str': 'edition',
+                'member_of__uri': 'member_of',
+            },
+        ),
+        SolrDocumentMapping(
+            model=Page,
+            fields={
+                'title__txt': 'title',
+                'page_number__str': 'number',
+                'member_of__uri': 'member_of',
+            },
+        ),
+    ]
+    return {mapping.model.model_name: mapping for mapping in mappings}
+
+
+def get_mapping(
+        resource: RDFResourceBase,
+        mappings: Mapping[str, SolrDocumentMapping],
+) -> Optional[SolrDocumentMapping]:
+    """Find the mapping whose content model's RDF types are all present on the
+    resource, preferring the most specific model. Returns `None` if there is none."""
+    types = set(resource.rdf_type.values)
+    for mapping in sorted(mappings.values(), key=lambda m: -len(m.model.default_values.get('rdf_type', ()))):
+        if mapping.model.default_values.get('rdf_type', set()) <= types:
+            return mapping
+    return None
+
+
+class IndexingError(Exception):
+    pass
+
+
+@dataclass
+class IndexFailure:
+    id: str
+    reason: str
+
+
+@dataclass
+class IndexReport:
+    """Totals for an indexing session, and the documents that Solr did not accept."""
+    indexed: int = 0
+    batches: int = 0
+    retries: int = 0
+    committed: bool = False
+    failures: list[IndexFailure] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+
+class TransientSolrError(IndexingError):
+    pass
+
+
+class SolrIndexer:
+    """Sends documents to the Solr update handler in batches.
+
+    Documents passed to `add()` are buffered and sent `batch_size` at a time,
+    with a `commitWithin` of `commit_within` milliseconds instead of an explicit
+    commit per request. Connection errors, timeouts, and 5xx and 429 responses
+    are retried up to `max_retries` times, waiting `retry_delay` seconds (doubled
+    on each retry). If Solr rejects a batch with any other error, the batch is
+    split in half and each half resent, so that the documents that caused the
+    error are isolated and reported in `report.failures` while the rest are
+    indexed.
+
+    Use it as a context manager to send the final partial batch and an explicit
+    commit when done:
+
+    ```pycon
+    >>> with SolrIndexer('http://localhost:8983/solr/fedora4', batch_size=500) as indexer:
+    ...     for document in documents:
+    ...         indexer.add(document)
+    >>> indexer.report
+    IndexReport(indexed=1200, batches=3, retries=0, committed=True, failures=[])
+    ```
+    """
+    def __init__(
+            self,
+            url: str,
+            batch_size: int = 500,
+            commit_within: int = 10000,
+            max_retries: int = 3,
+            retry_delay: float = 1.0,
+            timeout: float = 30,
+            session: requests.Session = None,
+    ):
+        self.url = url.rstrip('/')
+        self.batch_size = batch_size
+        self.commit_within = commit_within
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.report = IndexReport()
+        self._buffer: list[dict[str, Any]] = []
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> 'SolrIndexer':
+        """Create an indexer from the `SOLR` section of the Plastron configuration."""
+        try:
+            url = config['URL']
+        except KeyError as e:
+            raise RuntimeError(f"Missing configuration key {e} in section 'SOLR'")
+        return cls(
+            url=url,
+            batch_size=int(config.get('BATCH_SIZE', 500)),
+            commit_within=int(config.get('COMMIT_WITHIN', 10000)),
+            max_retries=int(config.get('MAX_RETRIES', 3)),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+        if exc_type is None:
+            self.commit()
+
+    @property
+    def update_url(self) -> str:
+        return self.url + '/update'
+
+    def add(self, document: dict[str, Any]):
+        self._buffer.append(document)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Send any buffered documents."""
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        self.report.batches += 1
+        self._send_batch(batch)
+
+    def commit(self):
+        """Send an explicit commit, making everything sent so far visible."""
+        self._post({'commit': {}}, params={})
+        self.report.committed = True
+        logger.info(f'Committed to {self.url}')
+
+    def _send_batch(self, batch: list[dict[str, Any]]):
+        try:
+            self._post(batch, params={'commitWithin': self.commit_within})
+        except TransientSolrError as e:
+            logger.error(f'Giving up on a batch of {len(batch)} documents: {e}')
+            self.report.failures.extend(IndexFailure(doc.get('id'), str(e)) for doc in batch)
+        except IndexingError as e:
+            if len(batch) == 1:
+                logger.warning(f'Solr rejected {batch[0].get("id")}: {e}')
+                self.report.failures.append(IndexFailure(batch[0].get('id'), str(e)))
+            else:
+                # isolate the rejected document(s)
+                middle = len(batch) // 2
+                self._send_batch(batch[:middle])
+                self._send_batch(batch[middle:])
+        else:
+            self.report.indexed += len(batch)
+            logger.debug(f'Sent {len(batch)} documents to {self.url}')
+
+    def _post(self, body: Any, params: dict[str, Any]):
+        attempt = 0
+        while True:
+            try:
+                response = self.session.post(
+                    self.update_url,
+                    params={**params, 'wt': 'json'},
+                    json=body,
+                    timeout=self.timeout,
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error: IndexingError = TransientSolrError(str(e))
+            else:
+                if response.ok:
+                    return
+                error = self._error_for(response)
+
+            if not isinstance(error, TransientSolrError) or attempt >= self.max_retries:
+                raise error
+            delay = self.retry_delay * 2 ** attempt
+            attempt += 1
+            self.report.retries += 1
+            logger.warning(f'Solr update failed ({error}); retrying in {delay}s')
+            sleep(delay)
+
+    @staticmethod
+    def _error_for(response: requests.Response) -> IndexingError:
+        try:
+            message = response.json()['error']['msg']
+        except (ValueError, KeyError, TypeError):
+            message = response.reason
+        text = f'{response.status_code} {message}'
+        if response.status_code >= 500 or response.status_code == 429:
+            return TransientSolrError(text)
+        return IndexingError(text)
+
+
+def escape_phrase(value: str) -> str:
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def terms_query(field_name: str, values: Sequence[str], separator: str = ' ') -> str:
+    """Query for documents whose `field_name` is any of `values`, using the Solr
+    terms query parser. The `separator` must not appear in any of the values;
+    the default, a space, cannot appear in a URI.
+
+    ```pycon
+    >>> terms_query('id', ['http://example.com/a', 'http://example.com/b'], separator='|')
+    '{!terms f=id separator="|"}http://example.com/a|http://example.com/b'
+    ```
+    """
+    return f'{{!terms f={field_name} separator="{separator}"}}' + separator.join(values)
+
+
+def or_query(field_name: str, values: Sequence[str]) -> str:
+    """Query for documents whose `field_name` is any of `values`, as a boolean
+    OR of phrase queries.
+
+    ```pycon
+    >>> or_query('id', ['http://example.com/a', 'http://example.com/b'])
+    'id:("http://example.com/a" OR "http://example.com/b")'
+    ```
+    """
+    return f'{field_name}:(' + ' OR '.join(escape_phrase(value) for value in values) + ')'
+
+
+def cursor_pages(
+        solr: pysolr.Solr,
+        query: str,
+        id_field: str = 'id',
+        rows: int = 1000,
+        **kwargs,
+) -> Iterator[list[str]]:
+    """Yield the IDs of the documents matching `query`, one page (and one Solr
+    request) at a time, using a cursor so that deep result sets can be read
+    without the cost of large `start` offsets. Additional keyword arguments
+    (e.g., `fq`) are passed along to the search."""
+    cursor = '*'
+    while True:
+        results = solr.search(
+            query,
+            fl=id_field,
+            rows=rows,
+            sort=f'{id_field} asc',
+            cursorMark=cursor,
+            **kwargs,
+        )
+        yield [doc[id_field] for doc in results.docs]
+        if results.nextCursorMark is None or results.nextCursorMark == cursor:
+            return
+        cursor = results.nextCursorMark
+
+
+QUERY_BUILDERS = {
+    'terms': terms_query,
+    'or': or_query,
+}
+
+
+@dataclass
+class VerificationResult:
+    uri: str
+    status: str
+    """Either "missing" (expected, but not in the index) or "extra" (in the
+    index, but not expected)"""
+
+
+class SolrVerifier:
+    """Checks which of a set of URIs are present in a Solr index, using one
+    query per batch of `batch_size` URIs instead of one per URI. Batches are
+    queried concurrently by up to `max_workers` threads. The `query_mode` is
+    either "terms" (the terms query parser; the default) or "or" (a boolean OR
+    of phrase queries, for indexes where the terms parser is unavailable).
+
+    ```pycon
+    >>> verifier = SolrVerifier(context.solr, batch_size=200)
+    >>> for result in verifier.verify(uris, scope='presentation_set__uri:"http://vocab.lib.umd.edu/set#test"'):
+    ...     print(result.uri, result.status)
+    ```
+    """
+    def __init__(
+            self,
+            solr: pysolr.Solr,
+            batch_size: int = 100,
+            max_workers: int = 4,
+            query_mode: str = 'terms',
+            id_field: str = 'id',
+    ):
+        if query_mode not in QUERY_BUILDERS:
+            raise ValueError(f'Unknown query mode "{query_mode}"; use one of: {", ".join(QUERY_BUILDERS)}')
+        self.solr = solr
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.query_mode = query_mode
+        self.id_field = id_field
+        self.queries = 0
+
+    def query_for(self, uris: Sequence[str]) -> str:
+        return QUERY_BUILDERS[self.query_mode](self.id_field, uris)
+
+    def indexed(self, uris: Sequence[str]) -> set[str]:
+        """The subset of `uris` that are in the index."""
+        results = self.solr.search(self.query_for(uris), fl=self.id_field, rows=len(uris))
+        self.queries += 1
+        return {doc[self.id_field] for doc in results.docs}
+
+    def _batches(self, uris: Iterable[str], seen: set[str]) -> Iterator[list[str]]:
+        unique = (uri for uri in uris if not (uri in seen or seen.add(uri)))
+        while batch := list(islice(unique, self.batch_size)):
+            yield batch
+
+    def missing(self, uris: Iterable[str], seen: set[str] = None) -> Iterator[str]:
+        """Yield each URI from `uris` that is not in the index, as the batches
+        complete. Duplicate URIs are checked once. The URIs checked are added to
+        `seen`, if given."""
+        if seen is None:
+            seen = set()
+        batches = self._batches(uris, seen)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=__name__) as executor:
+            futures: dict[Future, list[str]] = {}
+            while True:
+                # keep the number of batches in flight bounded, so the URIs are streamed
+                while len(futures) < 2 * self.max_workers and (batch := next(batches, None)) is not None:
+                    futures[executor.submit(self.indexed, batch)] = batch
+                if not futures:
+                    return
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = futures.pop(future)
+                    found = future.result()
+                    yield from (uri for uri in batch if uri not in found)
+
+    def indexed_ids(self, query: str, rows: int = 1000) -> Iterator[str]:
+        """Yield the ID of every document matching `query`, paging through the
+        results with a cursor."""
+        for page in cursor_pages(self.solr, query, id_field=self.id_field, rows=rows):
+            self.queries += 1
+            yield from page
+
+    def verify(self, uris: Iterable[str], scope: str = None) -> Iterator[VerificationResult]:
+        """Yield a result for each URI in `uris` that is missing from the index.
+        If a `scope` query is given, also yield a result for each document
+        matching it whose ID is not in `uris`."""
+        seen: set[str] = set()
+        for uri in self.missing(uris, seen):
+            yield VerificationResult(uri, 'missing')
+        if scope is not None:
+            for uri in self.indexed_ids(scope):
+                if uri not in seen:
+                    yield VerificationResult(uri, 'extra')
@@ -0,0 +1,295 @@
+import logging
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, Mapping, Optional
+
+import pysolr
+from rdflib import Literal, URIRef
+
+from plastron.models import ModelRegistry, get_registry
+from plastron.namespaces import ldp, rdf
+from plastron.rdfmapping.descriptors import Property
+from plastron.repo import Repository, RepositoryError, RepositoryResource
+from plastron.repo.indexing import SolrDocumentMapping, cursor_pages, escape_phrase, get_default_mappings
+
+logger = logging.getLogger(__name__)
+
+PropertyFilter = tuple[URIRef, Literal | URIRef]
+
+CONTENT_MODEL_FIELD = 'content_model_name__str'
+"""Solr field with the name of the content model of each document, as written
+by `plastron.repo.indexing.SolrDocumentMapping`"""
+
+
+def find(
+        start_resource: RepositoryResource,
+        matcher: Callable[[Iterable], bool],
+        traverse: list[URIRef] = None,
+        properties: list[PropertyFilter] = None
+) -> Iterator[RepositoryResource]:
+    """Walk the repository from `start_resource`, following the `traverse`
+    predicates, and yield each resource whose graph matches the `properties`
+    (combined using `matcher`, i.e., `all` or `any`). With no properties, every
+    resource found is yielded."""
+    if traverse is None:
+        traverse = []
+    if properties is None:
+        properties = []
+    for resource in start_resource.walk(traverse=traverse):
+        if len(properties) > 0:
+            if matches(resource, matcher, properties):
+                yield resource
+        else:
+            # with no filters specified, list all resources found
+            # this mimics the behavior of the Linux "find" command
+            yield resource
+
+
+def matches(
+        resource: RepositoryResource,
+        matcher: Callable[[Iterable], bool],
+        properties: list[PropertyFilter],
+) -> bool:
+    subject = URIRef(resource.url)
+    return matcher((subject, p, o) in resource.graph for p, o in properties)
+
+
+def get_indexed_predicates(mappings: Mapping[str, SolrDocumentMapping]) -> dict[URIRef, set[str]]:
+    """Map each predicate that is indexed to the Solr fields it is indexed in.
+    Only fields whose source is a single attribute of the model are included;
+    fields that follow a path through other objects, or are computed by a
+    function, cannot be traced back to a single predicate."""
+    fields = defaultdict(set)
+    for mapping in mappings.values():
+        for name, source in mapping.fields.items():
+            if callable(source) or '.' in source:
+                continue
+            descriptor = getattr(mapping.model, source, None)
+            if isinstance(descriptor, Property):
+                fields[descriptor.predicate].add(name)
+    return dict(fields)
+
+
+def get_indexed_types(mappings: Mapping[str, SolrDocumentMapping]) -> dict[URIRef, set[str]]:
+    """Map each RDF type to the names of the indexed content models that have
+    that type."""
+    types = defaultdict(set)
+    for mapping in mappings.values():
+        for rdf_type in mapping.model.default_values.get('rdf_type', ()):
+            types[rdf_type].add(mapping.model.model_name)
+    return dict(types)
+
+
+@dataclass
+class FindPlan:
+    """How a find will be carried out. If there is a `query`, the candidates
+    come from Solr and are checked against the repository; otherwise, the
+    repository is walked, and `reason` says why."""
+    query: Optional[str] = None
+    indexed: list[PropertyFilter] = field(default_factory=list)
+    unindexed: list[PropertyFilter] = field(default_factory=list)
+    reason: Optional[str] = None
+
+    @property
+    def uses_index(self) -> bool:
+        return self.query is not None
+
+
+class IndexedFinder:
+    """Finds resources using the Solr index to narrow down the candidates, when
+    the search can be answered from the index, and walking the repository when
+    it cannot.
+
+    Each property filter whose predicate is indexed becomes a clause of a Solr
+    query, scoped to the descendants of the starting resource. The matching
+    documents are only candidates: each one is read from the repository (by up
+    to `max_workers` threads) and checked against all the property filters,
+    so the results are the same as walking, as long as the index is current.
+    Resources that are not indexed are never found this way.
+
+    The index must be one built from the `mappings` (e.g., by
+    `plastron reindex --direct`), since the content model field and the field
+    names come from them; if there are no documents with a content model in
+    the index, `find()` raises a `SearchError` instead of silently finding
+    nothing. The fields to search for each predicate may be given explicitly
+    as `fields` instead, e.g., if the index has extra fields populated some
+    other way. Only the content models in the `mappings` are indexed, so the
+    index is only searched when the property filters restrict the results to
+    those content models: i.e., when they require (with `all`), or only accept
+    (with `any`), RDF types that no other content model in the `registry` has.
+    Otherwise (e.g., for a search with no type, or for `pcdm:Object`, which
+    Letters and Posters have too), the repository is walked instead.
+
+    ```pycon
+    >>> finder = IndexedFinder(repo, context.solr)
+    >>> for resource in finder.find(repo['/pcdm'], all, [ldp.contains], [(dcterms.title, Literal('Moonpig'))]):
+    ...     print(resource.url)
+    ```
+    """
+    def __init__(
+            self,
+            repo: Repository,
+            solr: pysolr.Solr,
+            mappings: Mapping[str, SolrDocumentMapping] = None,
+            fields: Mapping[URIRef, Iterable[str]] = None,
+            registry: ModelRegistry = None,
+            max_workers: int = 4,
+            rows: int = 1000,
+    ):
+        self.repo = repo
+        self.solr = solr
+        if mappings is None:
+            mappings = get_default_mappings()
+        if fields is None:
+            self.predicates = get_indexed_predicates(mappings)
+        else:
+            self.predicates = {URIRef(p): set(names) for p, names in fields.items()}
+        self.types = get_indexed_types(mappings)
+        self.registry = registry or get_registry()
+        self.max_workers = max_workers
+        self.rows = rows
+        self._index_checked = False
+
+    def check_index(self):
+        """Raise a `SearchError` if the index has no documents with a content
+        model, i.e., it was not built from content model mappings, and so cannot
+        answer any search. The check is only made once."""
+        if self._index_checked:
+            return
+        results = self.solr.search(f'{CONTENT_MODEL_FIELD}:[* TO *]', rows=0)
+        if results.hits == 0:
+            raise SearchError(
+                f'The index has no documents with a {CONTENT_MODEL_FIELD} field; '
+                'it must be built with "plastron reindex --direct" before it can be searched'
+            )
+        self._index_checked = True
+
+    def clause(self, p: URIRef, o: Literal | URIRef) -> Optional[str]:
+        """Solr query clause for a property filter, or `None` if the property
+        is not indexed."""
+        if p == rdf.type:
+            if o not in self.types:
+                return None
+            names = sorted(self.types[o])
+            return f'{CONTENT_MODEL_FIELD}:(' + ' OR '.join(escape_phrase(n) for n in names) + ')'
+        if p not in self.predicates:
+            return None
+        return ' OR '.join(f'{name}:{escape_phrase(str(o))}' for name in sorted(self.predicates[p]))
+
+    def plan(
+            self,
+            matcher: Callable[[Iterable], bool],
+            traverse: list[URIRef],
+            properties: list[PropertyFilter],
+    ) -> FindPlan:
+        if not properties:
+            return FindPlan(reason='no properties to match')
+        if traverse != [ldp.contains]:
+            return FindPlan(reason='the index can only be searched within a containment hierarchy')
+        plan = FindPlan()
+        for p, o in properties:
+            if p == rdf.type:
+                # resources of other content models are not in the index at all
+                models = {cls.model_name for cls in self.registry.by_type.get(o, ())}
+                unindexed = sorted(models - self.types.get(o, set()))
+                if o not in self.types:
+                    plan.reason = f'the type {o} is not indexed'
+                    return plan
+                if unindexed:
+                    plan.reason = f'the type {o} is not indexed for the {", ".join(unindexed)} content model(s)'
+                    return plan
+        clauses = []
+        for p, o in properties:
+            clause = self.clause(p, o)
+            if clause is None:
+                plan.unindexed.append((p, o))
+            else:
+                plan.indexed.append((p, o))
+                clauses.append(f'({clause})')
+        # resources of other content models are not in the index, so the results
+        # must be restricted to the indexed content models by their types
+        untyped = f'resources that are not of an indexed content model could match without an {rdf.type} filter'
+        if matcher is all:
+            if not clauses:
+                plan.reason = 'none of the properties are indexed'
+                return plan
+            if not any(p == rdf.type for p, _ in properties):
+                plan.reason = untyped
+                return plan
+            # any unindexed properties are checked when the candidates are read
+            plan.query = ' AND '.join(clauses)
+        elif matcher is any:
+            if plan.unindexed:
+                plan.reason = 'some of the properties are not indexed'
+                return plan
+            if not all(p == rdf.type for p, _ in properties):
+                plan.reason = untyped
+                return plan
+            plan.query = ' OR '.join(clauses)
+        else:
+            plan.reason = f'unsupported matcher {matcher!r}'
+        return plan
+
+    def candidates(self, plan: FindPlan, start_url: str) -> Iterator[str]:
+        """Yield the IDs of the indexed documents matching the plan's query at
+        or below `start_url`."""
+        start_url = start_url.rstrip('/')
+        scope = f'{{!prefix f=id}}{start_url}'
+        for page in cursor_pages(self.solr, plan.query, rows=self.rows, fq=scope):
+            for uri in page:
+                # the prefix filter would also match siblings such as "/foo2" for "/foo"
+                if uri == start_url or uri.startswith(start_url + '/'):
+                    yield uri
+
+    def _check(
+            self,
+            uri: str,
+            matcher: Callable[[Iterable], bool],
+            properties: list[PropertyFilter],
+    ) -> Optional[RepositoryResource]:
+        try:
+            resource = self.repo[uri].read()
+        except RepositoryError as e:
+            # the index may be out of date
+            logger.warning(f'Skipping indexed resource {uri}: {e}')
+            return None
+        return resource if matches(resource, matcher, properties) else None
+
+    def find(
+            self,
+            start_resource: RepositoryResource,
+            matcher: Callable[[Iterable], bool],
+            traverse: list[URIRef] = None,
+            properties: list[PropertyFilter] = None,
+            plan: FindPlan = None,
+    ) -> Iterator[RepositoryResource]:
+        """Same as `find()`, but using the index when possible. The results are
+        yielded in index order."""
+        traverse = traverse or []
+        properties = properties or []
+        if plan is None:
+            plan = self.plan(matcher, traverse, properties)
+        if not plan.uses_index:
+            logger.info(f'Walking the repository: {plan.reason}')
+            yield from find(start_resource, matcher, traverse, properties)
+            return
+
+        self.check_index()
+        logger.info(f'Searching the index: {plan.query}')
+        candidates = self.candidates(plan, str(start_resource.url))
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=__name__) as executor:
+            pending: deque[Future] = deque()
+            while True:
+                # keep a bounded window of reads in flight, and yield in order
+                while len(pending) < 2 * self.max_workers and (uri := next(candidates, None)) is not None:
+                    pending.append(executor.submit(self._check, uri, matcher, properties))
+                if not pending:
+                    return
+                resource = pending.popleft().result()
+                if resource is not None:
+                    yield resource
+
+
+class SearchError(Exception):
+    pass
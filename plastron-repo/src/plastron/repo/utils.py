@@ -1,4 +1,7 @@
-from contextlib import nullcontext
+from contextlib import contextmanager, nullcontext
+
+from plastron.client.transactions import transaction
+from plastron.repo import Repository
 
 
 def context(repo, use_transactions: bool = True, dry_run: bool = False):
@@ -7,3 +10,17 @@ def context(repo, use_transactions: bool = True, dry_run: bool = False):
     else:
         # for a dry-run, or if no transactions are requested, use a null context
         return nullcontext()
+
+
+@contextmanager
+def isolated_context(repo: Repository, use_transactions: bool = True, dry_run: bool = False):
+    """Like `context()`, but instead of starting the transaction on `repo` itself,
+    yields a separate `Repository` that uses its own transaction. Since `repo` is not
+    modified, multiple threads may each hold an isolated context at the same time.
+
+    For a dry-run, or if no transactions are requested, yields `repo` unchanged."""
+    if use_transactions and not dry_run:
+        with transaction(repo.client) as txn_client:
+            yield Repository(client=txn_client)
+    else:
+        yield repo
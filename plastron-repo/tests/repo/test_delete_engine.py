@@ -0,0 +1,130 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from requests import Session
+
+from plastron.client import Client, Endpoint
+from plastron.repo import Repository, RepositoryError, ldp
+from plastron.repo.delete import DeleteEngine, batched
+
+BASE_URL = 'http://localhost:8080/fcrepo/rest'
+LDP_CONTAINS = '<http://www.w3.org/ns/ldp#contains>'
+
+
+class MockResponse:
+    def __init__(self, status_code: int, text: str = ''):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.reason = None
+        self.text = text
+        self.headers = {'Content-Type': 'application/n-triples'}
+        self.links = {}
+
+
+class MockFedora:
+    """Minimal stand-in for a Fedora repository containing a tree of containers."""
+    def __init__(self, tree: dict[str, list[str]], fail_on: str = None):
+        self.tree = tree
+        self.gone = set()
+        self.tombstones = set()
+        self.deleted = []
+        self.fail_on = fail_on
+        self.lock = threading.Lock()
+
+    def request(self, method, url, **_kwargs):
+        path = url.removeprefix(BASE_URL)
+        if path.endswith('/fcr:tombstone'):
+            with self.lock:
+                self.tombstones.remove(path.removesuffix('/fcr:tombstone'))
+            return MockResponse(204)
+        if path in self.gone:
+            return MockResponse(410)
+        if path not in self.tree:
+            return MockResponse(404)
+        if method == 'DELETE':
+            if path == self.fail_on:
+                return MockResponse(500)
+            with self.lock:
+                self.deleted.append(path)
+                self.gone.add(path)
+                self.tombstones.add(path)
+            return MockResponse(204)
+        body = '\n'.join(f'<{BASE_URL}{path}> {LDP_CONTAINS} <{BASE_URL}{child}> .' for child in self.tree[path])
+        return MockResponse(200, body)
+
+
+@pytest.fixture
+def fedora():
+    return MockFedora({
+        '/a': ['/a/b', '/a/c'],
+        '/a/b': ['/a/b/d', '/a/b/e'],
+        '/a/c': [],
+        '/a/b/d': [],
+        '/a/b/e': [],
+    })
+
+
+@pytest.fixture
+def repo(fedora):
+    session = MagicMock(spec=Session)
+    session.request.side_effect = fedora.request
+    return Repository(client=Client(endpoint=Endpoint(BASE_URL), session=session))
+
+
+def run(engine, uris):
+    statuses = []
+    generator = engine.run(uris)
+    while True:
+        try:
+            statuses.append(next(generator))
+        except StopIteration as e:
+            return statuses, e.value
+
+
+def test_batched():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_delete_bottom_up(repo, fedora):
+    engine = DeleteEngine(repo, traverse=[ldp.contains], max_workers=4, batch_size=1)
+    statuses, result = run(engine, ['/a'])
+    assert result['count']['total'] == 5
+    assert result['count']['deleted'] == 5
+    assert result['count']['errors'] == 0
+    assert len(statuses) == 5
+    assert statuses[-1]['progress'] == 100
+    # every child is deleted before its parent
+    for parent, children in fedora.tree.items():
+        for child in children:
+            assert fedora.deleted.index(child) < fedora.deleted.index(parent)
+    assert fedora.tombstones == set(fedora.tree.keys())
+
+
+def test_delete_purge_tombstones(repo, fedora):
+    engine = DeleteEngine(repo, traverse=[ldp.contains], purge_tombstones=True)
+    _, result = run(engine, ['/a'])
+    assert result['count']['deleted'] == 5
+    assert fedora.tombstones == set()
+
+
+def test_delete_dry_run(repo, fedora):
+    engine = DeleteEngine(repo, traverse=[ldp.contains], dry_run=True)
+    _, result = run(engine, ['/a'])
+    assert result['count']['deleted'] == 5
+    assert fedora.deleted == []
+
+
+def test_delete_not_found(repo, fedora):
+    engine = DeleteEngine(repo, traverse=[ldp.contains])
+    _, result = run(engine, ['/z'])
+    assert result['count']['total'] == 0
+    assert fedora.deleted == []
+
+
+def test_delete_error_stops_before_parent(repo, fedora):
+    fedora.fail_on = '/a/b/d'
+    engine = DeleteEngine(repo, traverse=[ldp.contains])
+    with pytest.raises(RepositoryError):
+        run(engine, ['/a'])
+    assert fedora.deleted == ['/a/b/e']
@@ -0,0 +1,268 @@
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from urllib.parse import parse_qs, urlsplit
+
+import pysolr
+import pytest
+from rdflib import Literal, URIRef
+
+from plastron.models.authorities import Agent
+from plastron.models.page import Page
+from plastron.models.umd import Item
+from plastron.rdfmapping.embed import embedded
+from plastron.repo.indexing import (
+    SolrDocumentMapping,
+    SolrIndexer,
+    SolrVerifier,
+    VerificationResult,
+    get_default_mappings,
+    get_mapping,
+    or_query,
+)
+
+
+class StubSolr:
+    """Local stand-in for a Solr update handler. Accepts JSON document batches,
+    rejects any batch containing one of the `reject_ids`, and responds with
+    `unavailable` 503 errors before accepting requests."""
+    def __init__(self):
+        self.requests = []
+        self.documents = {}
+        self.commits = 0
+        self.reject_ids = set()
+        self.unavailable = 0
+        self.lock = threading.Lock()
+
+    def handle(self, path: str, params: dict[str, list[str]], body) -> tuple[int, dict]:
+        with self.lock:
+            self.requests.append((path, params, body))
+            if self.unavailable > 0:
+                self.unavailable -= 1
+                return 503, {'error': {'msg': 'Service Unavailable', 'code': 503}}
+            if isinstance(body, dict) and 'commit' in body:
+                self.commits += 1
+                return 200, {'responseHeader': {'status': 0}}
+            rejected = [doc['id'] for doc in body if doc['id'] in self.reject_ids]
+            if rejected:
+                return 400, {'error': {'msg': f'Bad document {rejected[0]}', 'code': 400}}
+            for doc in body:
+                self.documents[doc['id']] = doc
+            return 200, {'responseHeader': {'status': 0}}
+
+    @property
+    def batches(self) -> list[list[dict]]:
+        return [body for _, _, body in self.requests if isinstance(body, list)]
+
+
+@pytest.fixture
+def solr():
+    stub = StubSolr()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            url = urlsplit(self.path)
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length))
+            status, response = stub.handle(url.path, parse_qs(url.query), body)
+            content = json.dumps(response).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    stub.url = f'http://127.0.0.1:{server.server_port}/solr/fedora4'
+    yield stub
+    server.shutdown()
+    server.server_close()
+
+
+def documents(n: int) -> list[dict]:
+    return [{'id': f'http://example.com/{i}', 'title__txt': [f'Document {i}']} for i in range(n)]
+
+
+def test_item_document():
+    item = Item(
+        uri=URIRef('http://example.com/item'),
+        title=Literal('Moonpig'),
+        identifier=[Literal('moonpig-1')],
+        creator=[embedded(Agent)(label=Literal('Jim Henson')), embedded(Agent)(label=Literal('Frank Oz'))],
+        date=Literal('2023-06'),
+    )
+    mapping = get_default_mappings()['Item']
+    document = mapping.to_document(item)
+    assert document['id'] == 'http://example.com/item'
+    assert document['content_model_name__str'] == 'Item'
+    assert document['title__txt'] == ['Moonpig']
+    assert document['identifier__str'] == ['moonpig-1']
+    assert sorted(document['creator__label__txt']) == ['Frank Oz', 'Jim Henson']
+    assert document['date__str'] == ['2023-06']
+    # empty fields are left out
+    assert 'description__txt' not in document
+
+
+def test_custom_mapping_with_function():
+    mapping = SolrDocumentMapping(
+        model=Page,
+        fields={
+            'title__txt': 'title',
+            'label__str': lambda page: [f'Page {page.number.value}'],
+        },
+    )
+    page = Page(uri=URIRef('http://example.com/p1'), title=Literal('One'), number=Literal('1'))
+    assert mapping.to_document(page) == {
+        'id': 'http://example.com/p1',
+        'content_model_name__str': 'Page',
+        'title__txt': ['One'],
+        'label__str': ['Page 1'],
+    }
+
+
+def test_get_mapping():
+    mappings = get_default_mappings()
+    assert get_mapping(Item(), mappings).model is Item
+    assert get_mapping(Page(), mappings).model is Page
+
+
+def test_batches_with_commit_within(solr):
+    with SolrIndexer(solr.url, batch_size=2, commit_within=5000) as indexer:
+        for document in documents(5):
+            indexer.add(document)
+
+    assert [len(batch) for batch in solr.batches] == [2, 2, 1]
+    assert all(params['commitWithin'] == ['5000'] for _, params, body in solr.requests if isinstance(body, list))
+    # a single explicit commit at the end
+    assert solr.commits == 1
+    assert len(solr.documents) == 5
+    assert indexer.report.indexed == 5
+    assert indexer.report.batches == 3
+    assert indexer.report.committed
+    assert indexer.report.ok
+
+
+def test_retries_transient_errors(solr):
+    solr.unavailable = 2
+    with SolrIndexer(solr.url, batch_size=10, retry_delay=0) as indexer:
+        for document in documents(3):
+            indexer.add(document)
+
+    assert len(solr.documents) == 3
+    assert indexer.report.retries == 2
+    assert indexer.report.ok
+
+
+def test_gives_up_after_max_retries(solr):
+    solr.unavailable = 100
+    indexer = SolrIndexer(solr.url, batch_size=10, max_retries=2, retry_delay=0)
+    for document in documents(3):
+        indexer.add(document)
+    indexer.flush()
+
+    assert indexer.report.indexed == 0
+    assert indexer.report.retries == 2
+    assert [failure.id for failure in indexer.report.failures] == [doc['id'] for doc in documents(3)]
+    assert indexer.report.failures[0].reason == '503 Service Unavailable'
+
+
+def test_isolates_rejected_documents(solr):
+    solr.reject_ids = {'http://example.com/3', 'http://example.com/6'}
+    with SolrIndexer(solr.url, batch_size=8) as indexer:
+        for document in documents(8):
+            indexer.add(document)
+
+    assert sorted(solr.documents) == sorted(
+        doc['id'] for doc in documents(8) if doc['id'] not in solr.reject_ids
+    )
+    assert indexer.report.indexed == 6
+    assert {failure.id: failure.reason for failure in indexer.report.failures} == {
+        'http://example.com/3': '400 Bad document http://example.com/3',
+        'http://example.com/6': '400 Bad document http://example.com/6',
+    }
+    assert indexer.report.committed
+
+
+def test_from_config():
+    indexer = SolrIndexer.from_config({'URL': 'http://localhost:8983/solr/fedora4/', 'BATCH_SIZE': '50'})
+    assert indexer.update_url == 'http://localhost:8983/solr/fedora4/update'
+    assert indexer.batch_size == 50
+    assert indexer.commit_within == 10000
+
+    with pytest.raises(RuntimeError):
+        SolrIndexer.from_config({})
+
+
+def mock_solr(indexed_ids: list[str]) -> MagicMock:
+    """Mock Solr client that answers terms, OR, and cursor-paged scope queries
+    against a fixed list of indexed IDs."""
+    indexed = sorted(indexed_ids)
+
+    def search(q, **kwargs):
+        if q.startswith('{!terms'):
+            values = q[q.index('}') + 1:].split(' ')
+            return SimpleNamespace(docs=[{'id': v} for v in values if v in indexed], nextCursorMark=None)
+        if q.startswith('id:('):
+            values = [v.replace('\\"', '"') for v in re.findall(r'"((?:[^"\\]|\\.)*)"', q)]
+            return SimpleNamespace(docs=[{'id': v} for v in values if v in indexed], nextCursorMark=None)
+        # scope query, paged by cursor
+        cursor = kwargs['cursorMark']
+        start = 0 if cursor == '*' else int(cursor)
+        end = start + kwargs['rows']
+        page = indexed[start:end]
+        return SimpleNamespace(docs=[{'id': v} for v in page], nextCursorMark=str(min(end, len(indexed))))
+
+    solr = MagicMock(spec=pysolr.Solr)
+    solr.search.side_effect = search
+    return solr
+
+
+def uris(*numbers: int) -> list[str]:
+    return [f'http://example.com/{n}' for n in numbers]
+
+
+def test_verifier_batches_queries():
+    solr = mock_solr(uris(*range(10)))
+    verifier = SolrVerifier(solr, batch_size=4, max_workers=2)
+    assert list(verifier.missing(uris(*range(12)))) == uris(10, 11)
+    assert verifier.queries == 3
+    for call in solr.search.call_args_list:
+        assert call.args[0].startswith('{!terms f=id separator=" "}')
+
+
+def test_verifier_checks_duplicates_once():
+    solr = mock_solr(uris(1))
+    verifier = SolrVerifier(solr, batch_size=2)
+    assert list(verifier.missing(uris(1, 2, 1, 2, 2))) == uris(2)
+    assert verifier.queries == 1
+
+
+def test_verifier_reports_extras():
+    solr = mock_solr(uris(*range(25)))
+    verifier = SolrVerifier(solr, batch_size=10)
+    results = list(verifier.verify(uris(*range(20), 30), scope='*:*'))
+    assert results[0] == VerificationResult('http://example.com/30', 'missing')
+    assert sorted(r.uri for r in results[1:]) == sorted(uris(*range(20, 25)))
+    assert all(r.status == 'extra' for r in results[1:])
+
+
+def test_verifier_or_mode():
+    solr = mock_solr(['http://example.com/"quoted"'])
+    verifier = SolrVerifier(solr, query_mode='or')
+    assert list(verifier.missing(['http://example.com/"quoted"', 'http://example.com/plain'])) == [
+        'http://example.com/plain'
+    ]
+    assert or_query('id', ['a"b']) == 'id:("a\\"b")'
+
+
+def test_verifier_invalid_mode():
+    with pytest.raises(ValueError):
+        SolrVerifier(MagicMock(spec=pysolr.Solr), query_mode='nope')
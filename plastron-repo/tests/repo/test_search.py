@@ -0,0 +1,155 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pysolr
+import pytest
+from rdflib import Graph, Literal, URIRef
+
+from plastron.namespaces import bibo, dcterms, ldp, pcdm, rdf, umd
+from plastron.repo import Repository, RepositoryError
+from plastron.repo.indexing import get_default_mappings
+from plastron.repo.search import IndexedFinder, SearchError, get_indexed_predicates, get_indexed_types
+
+BASE = 'http://example.com/fcrepo/container'
+
+
+class StubResource:
+    def __init__(self, url: str, graph: Graph):
+        self.url = url
+        self.graph = graph
+
+    def read(self):
+        return self
+
+
+@pytest.fixture
+def resources() -> dict[str, StubResource]:
+    resources = {}
+    for n, title in enumerate(['Moonpig', 'Foobar', 'Moonpig and Friends']):
+        uri = f'{BASE}/{n}'
+        graph = Graph()
+        graph.add((URIRef(uri), rdf.type, pcdm.Object))
+        graph.add((URIRef(uri), rdf.type, umd.Item))
+        graph.add((URIRef(uri), dcterms.title, Literal(title)))
+        resources[uri] = StubResource(uri, graph)
+    return resources
+
+
+@pytest.fixture
+def repo(resources) -> MagicMock:
+    def get_resource(uri):
+        if uri not in resources:
+            raise RepositoryError(f'Unable to read {uri}')
+        return resources[uri]
+
+    repo = MagicMock(spec=Repository)
+    repo.__getitem__.side_effect = get_resource
+    return repo
+
+
+def mock_solr(ids: list[str]) -> MagicMock:
+    solr = MagicMock(spec=pysolr.Solr)
+    solr.search.return_value = SimpleNamespace(docs=[{'id': i} for i in ids], hits=len(ids), nextCursorMark=None)
+    return solr
+
+
+def test_indexed_predicates():
+    predicates = get_indexed_predicates(get_default_mappings())
+    assert predicates[dcterms.title] == {'title__txt'}
+    # paths through embedded objects can't be traced to a single predicate
+    assert dcterms.creator not in predicates
+
+
+def test_indexed_types():
+    types = get_indexed_types(get_default_mappings())
+    assert types[umd.Item] == {'Item'}
+    assert types[pcdm.Object] == {'Item', 'Issue', 'Page'}
+
+
+@pytest.mark.parametrize(
+    ('matcher', 'traverse', 'properties', 'expected_query'),
+    [
+        (
+            all,
+            [ldp.contains],
+            [(rdf.type, umd.Item), (dcterms.title, Literal('Moonpig'))],
+            '(content_model_name__str:("Item")) AND (title__txt:"Moonpig")',
+        ),
+        (
+            all,
+            [ldp.contains],
+            [(rdf.type, umd.Item), (dcterms.title, Literal('Moon "pig"'))],
+            '(content_model_name__str:("Item")) AND (title__txt:"Moon \\"pig\\"")',
+        ),
+        # unindexed properties are checked when reading the candidates
+        (
+            all,
+            [ldp.contains],
+            [(rdf.type, umd.Item), (dcterms.title, Literal('Moonpig')), (dcterms.extent, Literal('1'))],
+            '(content_model_name__str:("Item")) AND (title__txt:"Moonpig")',
+        ),
+        (
+            any,
+            [ldp.contains],
+            [(rdf.type, umd.Item), (rdf.type, bibo.Issue)],
+            '(content_model_name__str:("Item")) OR (content_model_name__str:("Issue"))',
+        ),
+        # these have to walk the repository
+        (any, [ldp.contains], [(dcterms.title, Literal('Moonpig')), (dcterms.extent, Literal('1'))], None),
+        (all, [ldp.contains], [(dcterms.extent, Literal('1'))], None),
+        # resources of content models that are not indexed would be missed
+        (all, [ldp.contains], [(rdf.type, umd.Letter), (dcterms.title, Literal('Moonpig'))], None),
+        (all, [ldp.contains], [(rdf.type, pcdm.Object), (dcterms.title, Literal('Moonpig'))], None),
+        # without a type, resources of any content model could match
+        (all, [ldp.contains], [(dcterms.title, Literal('Moonpig'))], None),
+        (any, [ldp.contains], [(rdf.type, umd.Item), (dcterms.title, Literal('Moonpig'))], None),
+        (all, [pcdm.hasMember], [(dcterms.title, Literal('Moonpig'))], None),
+        (all, [ldp.contains], [], None),
+    ]
+)
+def test_plan(repo, matcher, traverse, properties, expected_query):
+    plan = IndexedFinder(repo, mock_solr([])).plan(matcher, traverse, properties)
+    assert plan.query == expected_query
+    assert plan.uses_index == (expected_query is not None)
+    if not plan.uses_index:
+        assert plan.reason
+
+
+def test_find_checks_candidates(repo, resources):
+    # the title field is tokenized, so the index returns a superset of the matches
+    solr = mock_solr([f'{BASE}/0', f'{BASE}/2', 'http://example.com/fcrepo/container2/0', f'{BASE}/gone'])
+    finder = IndexedFinder(repo, solr, max_workers=2)
+    start = SimpleNamespace(url=BASE)
+    found = list(finder.find(start, all, [ldp.contains], [(rdf.type, umd.Item), (dcterms.title, Literal('Moonpig'))]))
+
+    assert [r.url for r in found] == [f'{BASE}/0']
+    # only the candidates below the start resource are read
+    assert [c.args[0] for c in repo.__getitem__.call_args_list] == [f'{BASE}/0', f'{BASE}/2', f'{BASE}/gone']
+    assert solr.search.call_args.kwargs['fq'] == f'{{!prefix f=id}}{BASE}'
+
+
+def test_find_falls_back_to_walking(repo, resources):
+    solr = mock_solr([])
+    start = MagicMock()
+    start.walk.return_value = iter(resources.values())
+    finder = IndexedFinder(repo, solr)
+    found = list(finder.find(start, any, [ldp.contains], [(dcterms.extent, Literal('1')), (rdf.type, pcdm.Object)]))
+
+    assert len(found) == 3
+    solr.search.assert_not_called()
+
+
+def test_find_fails_without_content_models_in_index(repo):
+    finder = IndexedFinder(repo, mock_solr([]))
+    start = SimpleNamespace(url=BASE)
+    with pytest.raises(SearchError):
+        list(finder.find(start, all, [ldp.contains], [(rdf.type, umd.Item), (dcterms.title, Literal('Moonpig'))]))
+    repo.__getitem__.assert_not_called()
+
+
+def test_configured_fields(repo):
+    finder = IndexedFinder(repo, mock_solr([]), fields={str(dcterms.title): ['display_title', 'title__txt']})
+    properties = [(rdf.type, umd.Item), (dcterms.title, Literal('Moonpig')), (dcterms.date, Literal('2024'))]
+    plan = finder.plan(all, [ldp.contains], properties)
+    assert plan.query == '(content_model_name__str:("Item")) AND (display_title:"Moonpig" OR title__txt:"Moonpig")'
+    assert plan.unindexed == [(dcterms.date, Literal('2024'))]
@@ -1,5 +1,17 @@
+import logging
+import urllib.parse
+from contextlib import contextmanager
 from importlib import import_module
+from pathlib import Path
 from types import ModuleType
+from typing import Iterator, Sequence
+
+from plastron.context import PlastronContext
+from plastron.jobs.logs import SQLiteItemLog
+from plastron.messaging.messages import PlastronCommandMessage
+from plastron.utils import strtobool
+
+logger = logging.getLogger(__name__)
 
 
 def get_module_name(command_name: str) -> str:
@@ -16,3 +28,67 @@ def get_command_module(command_name: str) -> ModuleType:
         return import_module(".".join((__package__, get_module_name(command_name))))
     except ModuleNotFoundError as e:
         raise RuntimeError(f'Unable to load a command with the name "{command_name}"') from e
+
+
+def get_resume_args(command_name: str) -> dict[str, str]:
+    """Arguments to add to an interrupted message for this command so that, when
+    it is run again, it continues from where it stopped. Command modules that
+    can resume declare these in a module-level `RESUME_ARGS` dictionary."""
+    return dict(getattr(get_command_module(command_name), 'RESUME_ARGS', {}))
+
+
+def get_job_state_dir(context: PlastronContext) -> Path:
+    """Directory where the STOMP daemon keeps the state that its jobs need in
+    order to resume after an interruption. This is `JOB_STATE_DIR` in the
+    `MESSAGE_BROKER` section of the config, defaulting to "job_state" in the
+    `MESSAGE_STORE_DIR`."""
+    broker_config = context.config.get('MESSAGE_BROKER', {}) or {}
+    state_dir = broker_config.get('JOB_STATE_DIR')
+    if state_dir is None:
+        state_dir = Path(context.broker.message_store_dir) / 'job_state'
+    return Path(state_dir)
+
+
+@contextmanager
+def completed_log(
+        context: PlastronContext,
+        message: PlastronCommandMessage,
+        fieldnames: Sequence[str],
+        keyfield: str = 'uri',
+) -> Iterator[SQLiteItemLog]:
+    """Log of the items that the job for this message has completed, kept in
+    `{job state dir}/{job id}/{command}.completed.log.csv` (see
+    `get_job_state_dir()`). Unless the message has a true `resume` argument,
+    any log left by an earlier job with the same id is cleared.
+
+    The log is only kept if the job is interrupted (i.e., the command's
+    generator is closed), so that the job can resume from it. Once the job
+    finishes, whether it succeeded or failed, the log is deleted.
+    """
+    job_dir = get_job_state_dir(context) / urllib.parse.quote(message.job_id, safe='')
+    job_dir.mkdir(parents=True, exist_ok=True)
+    log = SQLiteItemLog(job_dir / f'{message.command}.completed.log.csv', fieldnames, keyfield)
+    if not strtobool(message.args.get('resume', 'false')):
+        log.create()
+    interrupted = False
+    try:
+        yield log
+    except GeneratorExit:
+        interrupted = True
+        raise
+    finally:
+        if interrupted:
+            # the job may be resumed from where it stopped
+            log.close()
+            logger.info(f'Keeping completed item log {log.filename} for job {message.job_id}')
+        else:
+            log.remove()
+            _remove_empty_dir(job_dir)
+
+
+def _remove_empty_dir(path: Path):
+    try:
+        path.rmdir()
+    except OSError:
+        # not empty, or already gone
+        pass
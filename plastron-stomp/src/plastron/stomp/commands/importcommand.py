@@ -13,6 +13,9 @@ from plastron.utils import datetimestamp, strtobool, uri_or_curie
 
 logger = logging.getLogger(__name__)
 
+# an interrupted import continues from its completed item log
+RESUME_ARGS = {'resume': 'true'}
+
 
 def get_access_uri(access) -> Optional[URIRef]:
     if access is None:
@@ -73,6 +76,9 @@ def importcommand(
         job = jobs.create_job(ImportJob, config=ImportConfig(**job_config_args))
 
     job.ssh_private_key = config.get('SSH_PRIVATE_KEY', None)
+    validation_workers = message.args.get('validation-workers', config.get('VALIDATION_WORKERS', None))
+    if validation_workers is not None:
+        validation_workers = int(validation_workers)
 
     return job.run(
         context=context,
@@ -81,4 +87,5 @@ def importcommand(
         percentage=percentage,
         validate_only=validate_only,
         publish=publish,
+        validation_workers=validation_workers,
     )
@@ -3,18 +3,24 @@ from typing import Any, Generator
 from plastron.context import PlastronContext
 from plastron.jobs.publicationjob import PublicationJob, PublicationAction
 from plastron.messaging.messages import PlastronCommandMessage
+from plastron.stomp.commands import completed_log
 from plastron.utils import strtobool
 
+# an interrupted unpublish job skips the resources in its completed log
+RESUME_ARGS = {'resume': 'true'}
+
 
 def unpublish(
         context: PlastronContext,
         message: PlastronCommandMessage,
 ) -> Generator[dict[str, Any], None, dict[str, Any]]:
-    job = PublicationJob(
-        context=context,
-        uris=message.body.strip().split('\n'),
-        action=PublicationAction.UNPUBLISH,
-        force_hidden=bool(strtobool(message.args.get('hidden', 'false'))),
-        force_visible=bool(strtobool(message.args.get('visible', 'false'))),
-    )
-    return job.run()
+    with completed_log(context, message, ['uri', 'handle', 'status', 'timestamp']) as completed:
+        job = PublicationJob(
+            context=context,
+            uris=message.body.strip().split('\n'),
+            action=PublicationAction.UNPUBLISH,
+            force_hidden=bool(strtobool(message.args.get('hidden', 'false'))),
+            force_visible=bool(strtobool(message.args.get('visible', 'false'))),
+            completed=completed,
+        )
+        return (yield from job.run())
@@ -6,10 +6,14 @@ from plastron.context import PlastronContext
 from plastron.jobs.updatejob import UpdateJob
 from plastron.messaging.messages import PlastronCommandMessage
 from plastron.models import get_model_from_name
+from plastron.stomp.commands import completed_log
 from plastron.utils import strtobool, parse_predicate_list
 
 logger = logging.getLogger(__name__)
 
+# an interrupted update skips the resources in its completed log
+RESUME_ARGS = {'resume': 'true'}
+
 
 def parse_message(message: PlastronCommandMessage) -> dict[str, Any]:
     message.body = message.body.encode('utf-8').decode('utf-8-sig')
@@ -42,4 +46,8 @@ def update(
         context: PlastronContext,
         message: PlastronCommandMessage,
 ) -> Generator[dict[str, str], None, dict[str, Any]]:
-    return UpdateJob(repo=context.repo, **parse_message(message)).run()
+    args = parse_message(message)
+    if args['dry_run']:
+        return (yield from UpdateJob(repo=context.repo, **args).run())
+    with completed_log(context, message, ['uri', 'title', 'timestamp']) as completed:
+        return (yield from UpdateJob(repo=context.repo, completed=completed, **args).run())
@@ -1,5 +1,6 @@
 import logging
 import os
+import signal
 import sys
 from threading import Event, Thread
 from typing import TextIO, Any
@@ -56,9 +57,10 @@ class STOMPDaemon(Thread):
         if self.broker.connect(client_id=f'plastrond/{__version__}-{os.uname().nodename}-{os.getpid()}'):
             self.stopped.wait()
 
+            # let running jobs reach a checkpoint before disconnecting
+            scheduler_config = self.context.config.get('SCHEDULER', {}) or {}
+            self.command_listener.drain(timeout=float(scheduler_config.get('DRAIN_TIMEOUT', 60)))
             self.broker.disconnect()
-            if self.command_listener.inbox_watcher:
-                self.command_listener.inbox_watcher.stop()
         else:
             logger.error('Unable to connect to STOMP broker')
 
@@ -86,6 +88,9 @@ def main(config_file: TextIO, verbose: bool):
     logger.info(f'Starting {daemon_description}')
     thread = STOMPDaemon(config=config)
 
+    # drain gracefully when stopped by a service manager or container runtime
+    signal.signal(signal.SIGTERM, lambda *_: thread.stopped.set())
+
     try:
         thread.start()
         while thread.is_alive():
@@ -95,6 +100,8 @@ def main(config_file: TextIO, verbose: bool):
         if hasattr(thread, 'stopped'):
             thread.stopped.set()
             thread.stopped.wait()
+        # wait for running jobs to drain
+        thread.join()
 
     logger.info(f'{daemon_description} shut down successfully')
     sys.exit()
@@ -6,6 +6,7 @@ from stomp.exception import StompException
 
 from plastron.messaging.broker import Destination
 from plastron.messaging.messages import PlastronErrorMessage, PlastronCommandMessage
+from plastron.stomp.scheduler import JobInterrupted
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +18,11 @@ class AsynchronousResponseHandler:
         self.reply_queue: Destination = listener.broker['JOB_STATUS']
 
     def __call__(self, future):
+        if isinstance(e := future.exception(), JobInterrupted):
+            # keep the message in the inbox, to be resumed when the daemon restarts
+            self.listener.checkpoint(self.message, e.status)
+            return
+
         response = self.get_response(future)
 
         # save a copy of the response message in the outbox
@@ -1,30 +1,74 @@
 import importlib.metadata
+import json
 import logging
 import os
-from concurrent.futures import ThreadPoolExecutor
-from typing import Any, Callable, Generator, Iterator
+import threading
+from collections import deque
+from typing import Any, Callable, Generator, Iterator, Optional
 
+from stomp.exception import StompException
 from stomp.listener import ConnectionListener
 
 from plastron.context import PlastronContext
 from plastron.messaging.broker import Destination
-from plastron.messaging.messages import MessageBox, PlastronCommandMessage, PlastronMessage, PlastronResponseMessage
-from plastron.stomp.commands import get_command_module, get_module_name
+from plastron.messaging.messages import (
+    PlastronCommandMessage,
+    PlastronErrorMessage,
+    PlastronMessage,
+    PlastronResponseMessage,
+    SQLiteMessageBox,
+)
+from plastron.stomp.commands import get_command_module, get_module_name, get_resume_args
 from plastron.stomp.handlers import AsynchronousResponseHandler
-from plastron.stomp.inbox_watcher import InboxWatcher
+from plastron.stomp.progress import ProgressThrottle
+from plastron.stomp.scheduler import JobInterrupted, JobScheduler
 
 logger = logging.getLogger(__name__)
 version = importlib.metadata.version('plastron-stomp')
 
+DEFAULT_BACKLOG_SIZE = 4
+
 
 class CommandListener(ConnectionListener):
     def __init__(self, context: PlastronContext, after_connected: Callable = None, after_disconnected: Callable = None):
         self.context = context
         self.broker = context.broker
-        self.inbox = MessageBox(os.path.join(self.broker.message_store_dir, 'inbox'), PlastronCommandMessage)
-        self.outbox = MessageBox(os.path.join(self.broker.message_store_dir, 'outbox'), PlastronMessage)
-        self.executor = ThreadPoolExecutor(thread_name_prefix=__name__)
-        self.inbox_watcher = None
+        message_store_dir = self.broker.message_store_dir
+        os.makedirs(message_store_dir, exist_ok=True)
+        message_store = os.path.join(message_store_dir, 'messages.sqlite')
+        # messages left in the file-per-message inbox and outbox directories
+        # used by earlier versions are imported into the database
+        self.inbox = SQLiteMessageBox(
+            filename=message_store,
+            name='inbox',
+            message_class=PlastronCommandMessage,
+            import_dir=os.path.join(message_store_dir, 'inbox'),
+        )
+        self.outbox = SQLiteMessageBox(
+            filename=message_store,
+            name='outbox',
+            message_class=PlastronMessage,
+            import_dir=os.path.join(message_store_dir, 'outbox'),
+            key_header='PlastronJobId',
+        )
+        broker_config = context.config.get('MESSAGE_BROKER', {}) or {}
+        self.max_attempts = int(broker_config.get('MAX_DELIVERY_ATTEMPTS', 3))
+        self.scheduler = JobScheduler.from_config(context.config)
+        # number of unacknowledged messages the broker may send to this daemon;
+        # messages are acknowledged when a worker starts them, so this caps how
+        # many jobs this daemon holds back from other consumers of the queue
+        self.prefetch_size = int(broker_config.get('PREFETCH_SIZE', self.scheduler.max_workers))
+        # number of jobs waiting on their command's concurrency limit that may
+        # be acknowledged before they start, so they do not fill the prefetch window
+        self.backlog_size = int(broker_config.get('BACKLOG_SIZE', DEFAULT_BACKLOG_SIZE))
+        # IDs of the messages acknowledged before their jobs started
+        self.backlog: set[str] = set()
+        self.draining = False
+        # messages that arrived while the scheduler's queue was full, with their
+        # response handlers and whether they still need to be acknowledged
+        self.deferred: deque[tuple[PlastronCommandMessage, AsynchronousResponseHandler, bool]] = deque()
+        self._deferred_lock = threading.Lock()
+        self.scheduler.on_capacity = self.queue_deferred
         self.processor = MessageProcessor(context)
         self.after_connected = after_connected
         self.after_disconnected = after_disconnected
@@ -44,15 +88,19 @@ class CommandListener(ConnectionListener):
             # remove the message from the outbox now that sending has completed
             self.outbox.remove(message.job_id)
 
-        # then process anything in the inbox
-        for message in self.inbox:
+        # then replay anything left in the inbox, in the order it was received
+        for message in self.inbox.pending():
+            logger.info(f'Found message for job {message.job_id} in inbox')
             self.process_message(message, AsynchronousResponseHandler(self, message))
 
-        # subscribe to receive asynchronous jobs
-        self.broker['JOBS'].subscribe(id='plastron', ack='client-individual')
-
-        self.inbox_watcher = InboxWatcher(self, self.inbox)
-        self.inbox_watcher.start()
+        # subscribe to receive asynchronous jobs; messages are only acknowledged once
+        # a worker starts them (or they join the backlog), so the prefetch size caps
+        # how many jobs this daemon holds back from other consumers of the queue
+        self.broker['JOBS'].subscribe(
+            id='plastron',
+            ack='client-individual',
+            headers={'activemq.prefetchSize': str(self.prefetch_size)},
+        )
 
         if self.after_connected:
             self.after_connected()
@@ -62,22 +110,164 @@ class CommandListener(ConnectionListener):
         body = frame.body
         logger.debug(f'Received message on {headers["destination"]} with headers: {headers}')
         if headers['destination'] == self.broker['JOBS'].name:
-            # save the message in the inbox until we can process it
-            # Note: Processing will occur via the InboxWatcher, which will
-            # respond to the inbox placing a file in the inbox message directory
-            # containing the message
             message = PlastronCommandMessage(headers=headers, body=body)
-            self.inbox.add(message.id, message)
-            self.broker.ack(message.id, 'plastron')
+            if self.draining:
+                # leave the message unacknowledged, so the broker will deliver it again
+                logger.info(f'Not accepting message {message.id} for job {message.job_id} while draining')
+                return
+            if self.inbox.get(message.id) is not None:
+                # redelivery of a message this daemon has already accepted
+                logger.info(f'Message {message.id} for job {message.job_id} is already in the inbox')
+                self.broker.ack(message.id, 'plastron')
+                return
+            self.process_message(message, AsynchronousResponseHandler(self, message), acknowledge=True)
+
+    def process_message(self, message, response_handler, acknowledge: bool = False):
+        """Queue a message to be run, without blocking. Messages replayed from the
+        inbox are claimed when they are queued; new messages from the broker
+        (`acknowledge=True`) are saved to the inbox and acknowledged when a
+        worker starts them. The exception is a job that has to wait for the
+        `MAX_CONCURRENT` limit of its command: while there are fewer than
+        `backlog_size` of those, it is saved and acknowledged when it is queued,
+        so that it does not hold up the jobs for other commands behind it in
+        the prefetch window.
+
+        If the scheduler's queue is full, the message is deferred, and queued
+        from a worker thread once there is room. Since deferred messages from
+        the broker are not acknowledged, the prefetch window stops the broker
+        from sending more than `prefetch_size` of them."""
+        with self._deferred_lock:
+            if self.deferred or not self._queue_message(message, response_handler, acknowledge):
+                logger.info(f'Job queue is full; deferring job {message.job_id}')
+                self.deferred.append((message, response_handler, acknowledge))
+
+    def queue_deferred(self):
+        """Queue as many of the deferred messages as there is room for, in the
+        order they arrived."""
+        with self._deferred_lock:
+            while self.deferred and not self.draining:
+                if not self._queue_message(*self.deferred[0]):
+                    break
+                self.deferred.popleft()
+
+    def _queue_message(self, message, response_handler, acknowledge: bool) -> bool:
+        # must be called while holding the deferred lock, so that no other
+        # message can take the room in the queue; returns False if it is full
+        if not self.scheduler.wait_for_capacity(timeout=0):
+            return False
+        if acknowledge:
+            if len(self.backlog) < self.backlog_size and self.scheduler.is_at_limit(message.command):
+                self.accept_message(message)
+                self.backlog.add(message.id)
+                acknowledge = False
+        elif not self.claim_message(message):
+            return True
+        # queue for a message processor thread
+        future = self.scheduler.submit(message, self.run_message, message, acknowledge)
+        future.add_done_callback(response_handler)
+        return True
+
+    def accept_message(self, message: PlastronCommandMessage):
+        # save the message in the inbox, so it survives a restart, and only
+        # then acknowledge it to the broker
+        self.inbox.add(message.id, message)
+        self.inbox.claim(message.id)
+        self.broker.ack(message.id, 'plastron')
+
+    def run_message(self, message: PlastronCommandMessage, acknowledge: bool) -> PlastronResponseMessage:
+        if acknowledge:
+            # the worker pool has accepted the job
+            self.accept_message(message)
+        else:
+            with self._deferred_lock:
+                self.backlog.discard(message.id)
+        return self.processor(message, self.broker['JOB_STATUS'])
 
-    def process_message(self, message, response_handler):
-        # send to a message processor thread
-        self.executor.submit(self.processor, message, self.broker['JOB_STATUS']).add_done_callback(response_handler)
+    def claim_message(self, message: PlastronCommandMessage) -> bool:
+        if not self.inbox.claim(message.id):
+            logger.warning(f'Message {message.id} for job {message.job_id} is already being processed')
+            return False
+        attempts = self.inbox.attempts(message.id)
+        if attempts > self.max_attempts:
+            self.reject_message(message, f'Gave up on job {message.job_id} after {attempts - 1} attempts')
+            return False
+        return True
+
+    def reject_message(self, message: PlastronCommandMessage, reason: str):
+        """Mark the message as failed in the inbox, where it is kept but never
+        replayed, and send an error response for its job."""
+        logger.error(reason)
+        self.inbox.fail(message.id)
+        response = PlastronErrorMessage(
+            job_id=message.job_id,
+            error=reason,
+            status_url=message.status_url,
+            body={'state': f'{message.command}_error', 'progress': 0},
+        )
+        self.outbox.add(message.job_id, response)
+        self.broker['JOB_STATUS'].send(response)
+        self.outbox.remove(message.job_id)
+
+    def checkpoint(self, message: PlastronCommandMessage, status: Optional[dict[str, Any]]):
+        """Return an interrupted message to the inbox, recording its last progress
+        update and any arguments its command needs to resume from where it stopped."""
+        try:
+            resume_args = get_resume_args(message.command)
+        except RuntimeError:
+            resume_args = {}
+        for name, value in resume_args.items():
+            message.headers[f'PlastronArg-{name}'] = value
+        if status is not None:
+            message.headers['PlastronJobCheckpoint'] = json.dumps(status)
+        self.inbox.requeue(message.id, message)
+        logger.info(f'Saved checkpoint for job {message.job_id}; it will resume when the daemon restarts')
+
+    def drain(self, timeout: float = None) -> bool:
+        """Gracefully stop processing. Stops accepting messages from the broker,
+        returns queued jobs to the inbox (or, if they have not been acknowledged,
+        to the broker), unsubscribes, and asks running jobs to stop after
+        their current item, waiting up to `timeout` seconds for them. Interrupted
+        jobs are checkpointed in the inbox and resumed on the next start. Returns
+        `True` if all running jobs stopped before the timeout."""
+        logger.info('Draining jobs')
+        self.draining = True
+        with self._deferred_lock:
+            # deferred messages from the inbox were never claimed, so they are
+            # still pending there; the rest go back to the broker
+            deferred = [message for message, _, acknowledge in self.deferred if acknowledge]
+            self.deferred.clear()
+            self.backlog.clear()
+        for message in [job.message for job in self.scheduler.drain_queue()] + deferred:
+            if self.inbox.get(message.id) is not None:
+                logger.info(f'Returning queued job {message.job_id} to the inbox')
+                self.inbox.requeue(message.id)
+            else:
+                # not yet acknowledged; let the broker give it to another consumer
+                logger.info(f'Returning queued job {message.job_id} to the broker')
+                try:
+                    self.broker.nack(message.id, 'plastron')
+                except StompException as e:
+                    logger.warning(f'Unable to return message {message.id} to the broker: {e}')
+        try:
+            self.broker['JOBS'].unsubscribe(id='plastron')
+        except StompException as e:
+            logger.warning(f'Unable to unsubscribe from {self.broker["JOBS"]}: {e}')
+        self.processor.stopping.set()
+        stopped = self.scheduler.shutdown(wait=True, timeout=timeout)
+        if stopped:
+            logger.info('All running jobs have stopped')
+        else:
+            # these will be replayed from the inbox on the next start
+            logger.warning(f'Jobs still running after {timeout}s: {self.scheduler.metrics()["running"]}')
+        return stopped
+
+    @property
+    def metrics(self) -> dict[str, Any]:
+        """Queue depth, running job, and wait time metrics from the scheduler."""
+        return self.scheduler.metrics()
 
     def on_disconnected(self):
         logger.warning('Disconnected from the STOMP message broker')
-        if self.inbox_watcher:
-            self.inbox_watcher.stop()
         if self.after_disconnected:
             self.after_disconnected()
 
@@ -96,14 +286,63 @@ def get_command(command_name: str) -> STOMPCommandFunction:
     return command
 
 
+class MessageExecution:
+    """State of the processing of a single command message: the final result,
+    the progress reported so far, and where to send progress messages. A new
+    `MessageExecution` is created for every message, so jobs running
+    concurrently in the same `MessageProcessor` never share state."""
+
+    def __init__(
+            self,
+            message: PlastronCommandMessage,
+            progress_topic: Destination,
+            throttle: ProgressThrottle = None,
+    ):
+        self.message = message
+        self.progress_topic = progress_topic
+        self.throttle = throttle or ProgressThrottle(interval=0, step=0)
+        self.result: Optional[dict[str, Any]] = None
+        self.last_status: Optional[dict[str, Any]] = None
+        self.progress_count = 0
+
+    def run(self, command: Generator[dict, None, dict]) -> Iterator[dict[str, Any]]:
+        # delegating generator; each progress step is passed to the calling
+        # method, and the return value from the command is stored as the result
+        self.result = yield from command
+
+    def send_progress(self, status: dict[str, Any]):
+        # progress updates that arrive too close together are coalesced
+        if (status := self.throttle.offer(status)) is not None:
+            self._send(status)
+
+    def flush_progress(self):
+        # always deliver the last progress update, even if it was held back
+        if (status := self.throttle.flush()) is not None:
+            self._send(status)
+
+    def _send(self, status: dict[str, Any]):
+        self.last_status = status
+        self.progress_count += 1
+        self.progress_topic.send(
+            PlastronResponseMessage(
+                job_id=self.message.job_id,
+                status_url=self.message.status_url,
+                body=status,
+            ))
+
+    def response(self) -> PlastronResponseMessage:
+        result = self.result if self.result is not None else {}
+        # default message state is "Done"
+        return self.message.response(state=result.get('type', 'Done'), body=result)
+
+
 class MessageProcessor:
     def __init__(self, context: PlastronContext):
         self.context = context
-        # cache for command instances
-        self.commands = {}
-        self.result = None
+        # set to ask running jobs to stop after their current item
+        self.stopping = threading.Event()
 
-    def __call__(self, message: PlastronCommandMessage, progress_topic: Destination):
+    def __call__(self, message: PlastronCommandMessage, progress_topic: Destination) -> PlastronResponseMessage:
         if message.job_id is None:
             raise RuntimeError('Expecting a PlastronJobId header')
 
@@ -119,26 +358,33 @@ class MessageProcessor:
         if delegated_user is not None:
             logger.info(f'Running repository operations on behalf of {delegated_user}')
 
+        # all state for this job is kept in the execution object, not in the processor
+        command_config = self.context.config.get('COMMANDS', {}).get(message.command.upper(), {}) or {}
+        execution = MessageExecution(message, progress_topic, ProgressThrottle.from_config(command_config))
+
         # run the command, and send a progress message over STOMP every time it yields
-        # the _run() delegating generator captures the final status in self.result
+        # the run() delegating generator captures the final status in execution.result
         with self.context.repo_configuration(
             delegated_user=delegated_user,
             ua_string=f'plastron/{version}',
         ) as run_context:
-            for status in self._run(command(run_context, message)):
-                progress_topic.send(
-                    PlastronResponseMessage(
-                        job_id=message.job_id,
-                        status_url=message.status_url,
-                        body=status,
-                    ))
+            steps = execution.run(command(run_context, message))
+            for status in steps:
+                execution.send_progress(status)
+                if self.stopping.is_set():
+                    # stop at an item boundary; closing the generator lets the
+                    # job clean up (e.g., drop the items it has not started, wait
+                    # for the ones in progress, and flush its logs) before it is
+                    # requeued
+                    steps.close()
+                    execution.flush_progress()
+                    logger.warning(f'Job {message.job_id} interrupted')
+                    raise JobInterrupted(message, execution.last_status)
+            execution.flush_progress()
 
-        logger.info(f'Job {message.job_id} complete')
-
-        # default message state is "Done"
-        return message.response(state=self.result.get('type', 'Done'), body=self.result)
+        logger.info(
+            f'Job {message.job_id} complete; sent {execution.progress_count} of '
+            f'{execution.throttle.received} progress updates'
+        )
 
-    def _run(self, command: Generator[dict, None, dict]) -> Iterator[dict[str, Any]]:
-        # delegating generator; each progress step is passed to the calling
-        # method, and the return value from the command is stored as the result
-        self.result = yield from command
+        return execution.response()
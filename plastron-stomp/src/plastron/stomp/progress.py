@@ -0,0 +1,81 @@
+from time import monotonic
+from typing import Any, Callable, Mapping, Optional
+
+
+class ProgressThrottle:
+    """Decides which status updates from a running job are published as
+    progress messages.
+
+    A status is published when at least `interval` seconds have passed since
+    the last published status, or when its `progress` value (a percentage) has
+    advanced by at least `step` since the last published status. The first
+    status is always published. Statuses that are held back are coalesced: only
+    the most recent one is kept, and `flush()` returns it so that the final
+    state of the job is always delivered.
+
+    Setting `interval` to 0 publishes every status; setting `step` to 0 turns
+    off publishing by percentage.
+
+    ```pycon
+    >>> throttle = ProgressThrottle(interval=1.0, step=1)
+    >>> throttle.offer({'progress': 0})
+    {'progress': 0}
+    >>> throttle.offer({'progress': 0}) is None
+    True
+    >>> throttle.flush()
+    {'progress': 0}
+    ```
+    """
+
+    def __init__(self, interval: float = 1.0, step: float = 1, clock: Callable[[], float] = monotonic):
+        self.interval = interval
+        self.step = step
+        self.clock = clock
+        self.pending: Optional[dict[str, Any]] = None
+        self.last_sent_at: Optional[float] = None
+        self.last_sent_progress: Optional[float] = None
+        self.received = 0
+        self.sent = 0
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> 'ProgressThrottle':
+        """Create a throttle from the `PROGRESS_INTERVAL` and `PROGRESS_STEP`
+        options of a command's configuration sub-section."""
+        return cls(
+            interval=float(config.get('PROGRESS_INTERVAL', 1.0)),
+            step=float(config.get('PROGRESS_STEP', 1)),
+        )
+
+    def _is_due(self, status: dict[str, Any], now: float) -> bool:
+        if self.last_sent_at is None:
+            return True
+        if now - self.last_sent_at >= self.interval:
+            return True
+        progress = status.get('progress')
+        if self.step > 0 and progress is not None and self.last_sent_progress is not None:
+            return abs(progress - self.last_sent_progress) >= self.step
+        return False
+
+    def _sent(self, status: dict[str, Any], now: float) -> dict[str, Any]:
+        self.pending = None
+        self.last_sent_at = now
+        if status.get('progress') is not None:
+            self.last_sent_progress = status['progress']
+        self.sent += 1
+        return status
+
+    def offer(self, status: dict[str, Any]) -> Optional[dict[str, Any]]:
+        """Returns the status if it should be published now, otherwise holds
+        on to it and returns `None`."""
+        self.received += 1
+        now = self.clock()
+        if self._is_due(status, now):
+            return self._sent(status, now)
+        self.pending = status
+        return None
+
+    def flush(self) -> Optional[dict[str, Any]]:
+        """Returns the most recent status that was held back, if any."""
+        if self.pending is None:
+            return None
+        return self._sent(self.pending, self.clock())
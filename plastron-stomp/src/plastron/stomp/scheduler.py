@@ -0,0 +1,296 @@
+import heapq
+import logging
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from enum import IntEnum
+from itertools import count
+from time import monotonic
+from typing import Any, Callable, Mapping, Optional
+
+from plastron.messaging.messages import PlastronCommandMessage
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Priority classes for queued jobs. Lower values are run first."""
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+    @classmethod
+    def parse(cls, value: Optional[str], default: 'Priority' = None) -> 'Priority':
+        if default is None:
+            default = cls.NORMAL
+        if value is None:
+            return default
+        try:
+            return cls[value.strip().upper()]
+        except KeyError:
+            logger.warning(f'Unknown priority "{value}"; using {default.name.lower()}')
+            return default
+
+
+@dataclass
+class CommandPolicy:
+    """Scheduling settings for a single command."""
+    max_concurrent: Optional[int] = None
+    """Maximum number of jobs for this command that may run at the same time; `None` for no limit"""
+    priority: Priority = Priority.NORMAL
+    """Priority for jobs for this command that do not specify one in their headers"""
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> 'CommandPolicy':
+        max_concurrent = config.get('MAX_CONCURRENT')
+        return cls(
+            max_concurrent=int(max_concurrent) if max_concurrent is not None else None,
+            priority=Priority.parse(config.get('PRIORITY')),
+        )
+
+
+@dataclass(order=True)
+class ScheduledJob:
+    priority: Priority
+    sequence: int
+    message: PlastronCommandMessage = field(compare=False)
+    fn: Callable = field(compare=False)
+    args: tuple = field(compare=False)
+    future: Future = field(compare=False)
+    queued_at: float = field(compare=False, default_factory=monotonic)
+
+    @property
+    def command(self) -> str:
+        return self.message.command
+
+
+class SchedulerShutdown(RuntimeError):
+    pass
+
+
+class JobInterrupted(Exception):
+    """Raised when a job stops early because the daemon is shutting down. The
+    `status` is the last progress update the job reported."""
+    def __init__(self, message: PlastronCommandMessage, status: Optional[dict[str, Any]] = None):
+        super().__init__(f'Job {message.job_id} was interrupted')
+        self.message = message
+        self.status = status
+
+
+class JobScheduler:
+    """Executor for command messages with a bounded queue, per-command concurrency
+    limits, and priorities.
+
+    Jobs are run by a fixed pool of `max_workers` threads. When a worker is free,
+    it takes the highest priority queued job (in order of arrival within a priority
+    class) whose command is not already running at its `max_concurrent` limit. A
+    long-running burst of one command therefore cannot hold every worker while jobs
+    for other commands wait.
+
+    The priority of a job is taken from its `PlastronJobPriority` header ("high",
+    "normal", or "low"), falling back to the priority configured for its command.
+
+    At most `max_queued` jobs may be waiting at once; `submit()` blocks until
+    there is room. Callers that must not block (such as the STOMP listener
+    callbacks) can check `wait_for_capacity(timeout=0)` instead, and hold on to
+    the job until `on_capacity` is called, which happens (in a worker thread)
+    every time a job leaves the queue.
+
+    ```pycon
+    >>> scheduler = JobScheduler(max_workers=4, policies={'export': CommandPolicy(max_concurrent=2)})
+    >>> future = scheduler.submit(message, processor, message, progress_topic)
+    ```
+    """
+
+    def __init__(
+            self,
+            max_workers: int = 8,
+            max_queued: int = 100,
+            policies: Mapping[str, CommandPolicy] = None,
+    ):
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+        if max_queued < 1:
+            raise ValueError('max_queued must be at least 1')
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.policies: dict[str, CommandPolicy] = dict(policies or {})
+        self._queue: list[ScheduledJob] = []
+        self._sequence = count()
+        self._running: dict[str, int] = {}
+        self._condition = threading.Condition()
+        self._shutdown = False
+        self._completed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._max_depth = 0
+        self.on_capacity: Optional[Callable[[], None]] = None
+        """Called with no arguments, from a worker thread, whenever a job leaves the queue"""
+        self._workers = [
+            threading.Thread(target=self._work, name=f'{__name__}-{n}', daemon=True) for n in range(max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> 'JobScheduler':
+        """Create a scheduler from the `SCHEDULER` and `COMMANDS` sections of
+        the Plastron configuration."""
+        scheduler_config = config.get('SCHEDULER', {}) or {}
+        commands_config = config.get('COMMANDS', {}) or {}
+        return cls(
+            max_workers=int(scheduler_config.get('MAX_WORKERS', 8)),
+            max_queued=int(scheduler_config.get('MAX_QUEUED', 100)),
+            policies={
+                name.lower(): CommandPolicy.from_config(command_config or {})
+                for name, command_config in commands_config.items()
+            },
+        )
+
+    def policy(self, command: str) -> CommandPolicy:
+        return self.policies.get((command or '').lower(), CommandPolicy())
+
+    def priority(self, message: PlastronCommandMessage) -> Priority:
+        return Priority.parse(message.priority, default=self.policy(message.command).priority)
+
+    def is_at_limit(self, command: str) -> bool:
+        """`True` if a new job for `command` would have to wait for its command's
+        `max_concurrent` limit, because enough jobs for it are already running
+        or queued ahead of it."""
+        limit = self.policy(command).max_concurrent
+        if limit is None:
+            return False
+        with self._condition:
+            queued = sum(1 for job in self._queue if job.command == command)
+            return self._running.get(command, 0) + queued >= limit
+
+    def wait_for_capacity(self, timeout: float = None) -> bool:
+        """Block until there is room in the queue for another job. Returns `False`
+        if the `timeout` expires first."""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._shutdown or len(self._queue) < self.max_queued,
+                timeout=timeout,
+            )
+
+    def submit(self, message: PlastronCommandMessage, fn: Callable, *args) -> Future:
+        """Queue `fn(*args)` to be run for the given `message`. Blocks while the
+        queue is full. Returns a `Future` for the result."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._shutdown or len(self._queue) < self.max_queued)
+            if self._shutdown:
+                raise SchedulerShutdown('Cannot submit jobs after the scheduler has shut down')
+            job = ScheduledJob(
+                priority=self.priority(message),
+                sequence=next(self._sequence),
+                message=message,
+                fn=fn,
+                args=args,
+                future=Future(),
+            )
+            heapq.heappush(self._queue, job)
+            self._max_depth = max(self._max_depth, len(self._queue))
+            logger.info(
+                f'Queued job {message.job_id} ({message.command}, priority {job.priority.name.lower()}); '
+                f'queue depth is {len(self._queue)}'
+            )
+            self._condition.notify_all()
+            return job.future
+
+    def _is_runnable(self, job: ScheduledJob) -> bool:
+        limit = self.policy(job.command).max_concurrent
+        return limit is None or self._running.get(job.command, 0) < limit
+
+    def _next_job(self) -> Optional[ScheduledJob]:
+        # must be called while holding the condition lock; returns the highest
+        # priority job whose command is below its concurrency limit
+        skipped = []
+        job = None
+        while self._queue:
+            candidate = heapq.heappop(self._queue)
+            if self._is_runnable(candidate):
+                job = candidate
+                break
+            skipped.append(candidate)
+        for candidate in skipped:
+            heapq.heappush(self._queue, candidate)
+        return job
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while (job := self._next_job()) is None:
+                    if self._shutdown and not self._queue:
+                        return
+                    self._condition.wait()
+                self._running[job.command] = self._running.get(job.command, 0) + 1
+                wait_time = monotonic() - job.queued_at
+                self._total_wait += wait_time
+                self._max_wait = max(self._max_wait, wait_time)
+                # there is room in the queue now
+                self._condition.notify_all()
+
+            if self.on_capacity is not None:
+                try:
+                    self.on_capacity()
+                except Exception as e:
+                    logger.error(f'Error in on_capacity callback: {e}')
+
+            logger.info(f'Starting job {job.message.job_id} ({job.command}) after waiting {wait_time:.2f}s')
+            if job.future.set_running_or_notify_cancel():
+                try:
+                    result = job.fn(*job.args)
+                except BaseException as e:
+                    job.future.set_exception(e)
+                else:
+                    job.future.set_result(result)
+
+            with self._condition:
+                self._running[job.command] -= 1
+                self._completed += 1
+                self._condition.notify_all()
+
+    def metrics(self) -> dict[str, Any]:
+        """Snapshot of the scheduler's queue depth, running jobs, and wait times."""
+        with self._condition:
+            queued_by_priority = {priority.name.lower(): 0 for priority in Priority}
+            for job in self._queue:
+                queued_by_priority[job.priority.name.lower()] += 1
+            started = self._completed + sum(self._running.values())
+            return {
+                'queue_depth': len(self._queue),
+                'max_queue_depth': self._max_depth,
+                'queued': queued_by_priority,
+                'running': {command: n for command, n in self._running.items() if n > 0},
+                'completed': self._completed,
+                'mean_wait': self._total_wait / started if started else 0.0,
+                'max_wait': self._max_wait,
+            }
+
+    def drain_queue(self) -> list[ScheduledJob]:
+        """Remove and return the jobs that have not started, in the order they
+        would have run. Their futures are left unresolved."""
+        with self._condition:
+            jobs = sorted(self._queue)
+            self._queue.clear()
+            self._condition.notify_all()
+            return jobs
+
+    def shutdown(self, wait: bool = True, cancel_queued: bool = False, timeout: float = None) -> bool:
+        """Stop accepting new jobs. If `cancel_queued` is `True`, cancel any jobs
+        that have not started; otherwise, the workers finish the queued jobs
+        first. If `wait` is `True`, block until the workers have stopped, or
+        until `timeout` seconds have passed. Returns `True` if all the workers
+        have stopped."""
+        with self._condition:
+            self._shutdown = True
+            if cancel_queued:
+                for job in self._queue:
+                    job.future.cancel()
+                self._queue.clear()
+            self._condition.notify_all()
+        if wait:
+            deadline = monotonic() + timeout if timeout is not None else None
+            for worker in self._workers:
+                worker.join(timeout=max(0.0, deadline - monotonic()) if deadline is not None else None)
+        return not any(worker.is_alive() for worker in self._workers)
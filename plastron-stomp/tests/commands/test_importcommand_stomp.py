@@ -40,6 +40,7 @@ def mock_repo():
                 'percentage': None,
                 'validate_only': False,
                 'publish': False,
+                'validation_workers': None,
             },
         ),
         (
@@ -50,6 +51,7 @@ def mock_repo():
                 'PlastronArg-dry-run': 'False',
                 'PlastronArg-no-transactions': 'True',
                 'PlastronArg-validate-only': 'True',
+                'PlastronArg-validation-workers': '4',
                 'PlastronArg-publish': 'True'
             },
             # expected args
@@ -60,6 +62,7 @@ def mock_repo():
                 'percentage': None,
                 'validate_only': True,
                 'publish': True,
+                'validation_workers': 4,
             },
         ),
     ],
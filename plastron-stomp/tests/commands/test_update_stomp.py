@@ -8,6 +8,7 @@ from plastron.messaging.messages import PlastronCommandMessage
 from plastron.models.letter import Letter
 from plastron.models.umd import Item
 from plastron.repo import Repository
+from plastron.stomp.commands import completed_log, get_job_state_dir, get_resume_args
 from plastron.stomp.commands.update import parse_message
 
 
@@ -146,3 +147,66 @@ def test_validate_requires_model(mock_repo, message_body):
     with raises(RuntimeError) as exc_info:
         parse_message(message)
     assert exc_info.value.args[0] == "Model must be provided when performing validation"
+
+
+@pytest.mark.parametrize('command', ['update', 'publish', 'unpublish'])
+def test_resumable_commands(command):
+    assert get_resume_args(command) == {'resume': 'true'}
+
+
+def test_job_state_dir(tmp_path):
+    context = MagicMock(config={})
+    context.broker.message_store_dir = str(tmp_path)
+    assert get_job_state_dir(context) == tmp_path / 'job_state'
+    context.config = {'MESSAGE_BROKER': {'JOB_STATE_DIR': str(tmp_path / 'state')}}
+    assert get_job_state_dir(context) == tmp_path / 'state'
+
+
+def logging_command(context, message: PlastronCommandMessage, uris):
+    with completed_log(context, message, ['uri', 'timestamp']) as log:
+        for uri in uris:
+            if uri not in log:
+                log.append({'uri': uri, 'timestamp': '2026-10-19T12:00:00'})
+                yield {'uri': uri, 'completed': len(log)}
+        return {'type': 'Done', 'completed': len(log)}
+
+
+def test_completed_log_is_kept_when_resuming(tmp_path):
+    context = MagicMock(config={'MESSAGE_BROKER': {'JOB_STATE_DIR': str(tmp_path)}})
+    headers = {'PlastronJobId': 'job/1', 'PlastronCommand': 'update'}
+    uris = ['http://example.com/foo', 'http://example.com/bar']
+    job_dir = tmp_path / 'job%2F1'
+
+    # interrupted after the first item
+    steps = logging_command(context, PlastronCommandMessage(headers=headers), uris)
+    assert next(steps) == {'uri': 'http://example.com/foo', 'completed': 1}
+    steps.close()
+    assert (job_dir / 'update.completed.log.csv').exists()
+
+    # the resumed job skips the completed item, and cleans up after itself when it is done
+    resumed = PlastronCommandMessage(headers={**headers, 'PlastronArg-resume': 'true'})
+    steps = logging_command(context, resumed, uris)
+    assert list(steps) == [{'uri': 'http://example.com/bar', 'completed': 2}]
+    assert not job_dir.exists()
+
+
+def test_completed_log_is_cleared_for_a_new_job(tmp_path):
+    context = MagicMock(config={'MESSAGE_BROKER': {'JOB_STATE_DIR': str(tmp_path)}})
+    headers = {'PlastronJobId': 'job/1', 'PlastronCommand': 'update'}
+    steps = logging_command(context, PlastronCommandMessage(headers=headers), ['http://example.com/foo'])
+    next(steps)
+    steps.close()
+
+    # a new job with the same id starts over
+    steps = logging_command(context, PlastronCommandMessage(headers=headers), ['http://example.com/foo'])
+    assert list(steps) == [{'uri': 'http://example.com/foo', 'completed': 1}]
+
+
+def test_completed_log_is_removed_when_job_fails(tmp_path):
+    context = MagicMock(config={'MESSAGE_BROKER': {'JOB_STATE_DIR': str(tmp_path)}})
+    headers = {'PlastronJobId': 'job-1', 'PlastronCommand': 'update'}
+    steps = logging_command(context, PlastronCommandMessage(headers=headers), ['http://example.com/foo'])
+    next(steps)
+    with raises(RuntimeError):
+        steps.throw(RuntimeError('failed'))
+    assert not (tmp_path / 'job-1').exists()
@@ -0,0 +1,408 @@
+import json
+import random
+import threading
+from concurrent.futures import wait
+from contextlib import contextmanager
+from time import monotonic, sleep
+
+import pytest
+from stomp.utils import Frame
+
+from plastron.messaging.messages import Message, PlastronCommandMessage, SQLiteMessageBox
+from plastron.stomp import listeners
+from plastron.stomp.handlers import AsynchronousResponseHandler
+from plastron.stomp.listeners import CommandListener, MessageExecution, MessageProcessor
+
+
+class InMemoryDestination:
+    """Destination stand-in that records every message sent to it."""
+    def __init__(self, name: str):
+        self.name = name
+        self.messages: list[Message] = []
+        self.lock = threading.Lock()
+
+    def send(self, message: Message):
+        with self.lock:
+            self.messages.append(message)
+
+    def subscribe(self, id: str, ack: str = 'auto', headers: dict = None, **kwargs):
+        self.subscription = {'id': id, 'ack': ack, 'headers': headers}
+
+    def unsubscribe(self, id: str, **kwargs):
+        pass
+
+
+class InMemoryBroker:
+    """Broker stand-in that keeps its destinations in memory."""
+    def __init__(self, message_store_dir):
+        self.message_store_dir = str(message_store_dir)
+        self.destinations: dict[str, InMemoryDestination] = {}
+        self.acked = []
+        self.nacked = []
+
+    def __getitem__(self, key: str) -> InMemoryDestination:
+        return self.destinations.setdefault(key, InMemoryDestination(f'/queue/{key.lower()}'))
+
+    def ack(self, message_id, subscription_id):
+        self.acked.append(message_id)
+
+    def nack(self, message_id, subscription_id):
+        self.nacked.append(message_id)
+
+
+class StubContext:
+    def __init__(self, broker, config=None):
+        self.broker = broker
+        self.config = config or {}
+
+    @contextmanager
+    def repo_configuration(self, delegated_user: str = None, ua_string: str = None):
+        yield self
+
+
+def jittery(_context, message: PlastronCommandMessage):
+    job_id = message.job_id
+    for n in range(5):
+        sleep(random.uniform(0, 0.005))
+        yield {'job': job_id, 'step': n}
+    return {'type': 'Done', 'job': job_id}
+
+
+@pytest.fixture
+def listener(tmp_path, monkeypatch):
+    monkeypatch.setattr(listeners, 'get_command', lambda _name: jittery)
+    context = StubContext(InMemoryBroker(tmp_path), config={
+        'SCHEDULER': {'MAX_WORKERS': 16},
+        # publish every progress update
+        'COMMANDS': {'JITTERY': {'PROGRESS_INTERVAL': 0}},
+    })
+    listener = CommandListener(context)
+    yield listener
+    listener.scheduler.shutdown(cancel_queued=True)
+
+
+def test_message_execution_response():
+    message = PlastronCommandMessage(job_id='job-1', command='jittery')
+    destination = InMemoryDestination('/topic/status')
+    execution = MessageExecution(message, destination)
+    for status in execution.run(jittery(None, message)):
+        execution.send_progress(status)
+
+    assert execution.progress_count == 5
+    assert execution.last_status == {'job': 'job-1', 'step': 4}
+    assert [json.loads(m.body)['step'] for m in destination.messages] == [0, 1, 2, 3, 4]
+
+    response = execution.response()
+    assert response.job_id == 'job-1'
+    assert response.state == 'Done'
+    assert json.loads(response.body) == {'type': 'Done', 'job': 'job-1'}
+
+
+def test_concurrent_messages_do_not_share_state(listener):
+    job_ids = [f'job-{n}' for n in range(200)]
+    futures = []
+    for job_id in job_ids:
+        message = PlastronCommandMessage(job_id=job_id, command='jittery', message_id=f'msg-{job_id}')
+        listener.inbox.add(message.id, message)
+        future = listener.scheduler.submit(message, listener.processor, message, listener.broker['JOB_STATUS'])
+        future.add_done_callback(AsynchronousResponseHandler(listener, message))
+        futures.append(future)
+
+    done, not_done = wait(futures, timeout=30)
+    assert not not_done
+    # the response handlers run just after each future completes
+    wait_until_empty(listener)
+
+    for future in futures:
+        response = future.result()
+        assert json.loads(response.body) == {'type': 'Done', 'job': response.job_id}
+
+    messages = listener.broker['JOB_STATUS'].messages
+    progress = [m for m in messages if 'PlastronJobState' not in m.headers]
+    final = [m for m in messages if 'PlastronJobState' in m.headers]
+
+    # every progress message belongs to the job it claims to
+    for message in progress:
+        assert json.loads(message.body)['job'] == message.headers['PlastronJobId']
+    assert len(progress) == 5 * len(job_ids)
+
+    # exactly one final response per job, with its own result
+    assert sorted(m.headers['PlastronJobId'] for m in final) == sorted(job_ids)
+    for message in final:
+        assert json.loads(message.body)['job'] == message.headers['PlastronJobId']
+
+    # per-job progress stayed in order
+    for job_id in job_ids:
+        steps = [json.loads(m.body)['step'] for m in progress if m.headers['PlastronJobId'] == job_id]
+        assert steps == [0, 1, 2, 3, 4]
+
+    assert list(listener.inbox) == []
+    assert list(listener.outbox) == []
+
+
+def test_progress_is_throttled_per_command(tmp_path, monkeypatch):
+    def chatty(_context, message: PlastronCommandMessage):
+        for n in range(1001):
+            yield {'job': message.job_id, 'progress': int(n / 1000 * 100)}
+        return {'type': 'Done', 'job': message.job_id}
+
+    monkeypatch.setattr(listeners, 'get_command', lambda _name: chatty)
+    context = StubContext(InMemoryBroker(tmp_path), config={
+        'COMMANDS': {'CHATTY': {'PROGRESS_INTERVAL': 60, 'PROGRESS_STEP': 10}},
+    })
+    processor = MessageProcessor(context)
+    destination = InMemoryDestination('/topic/status')
+    response = processor(PlastronCommandMessage(job_id='job-1', command='chatty'), destination)
+
+    progress = [json.loads(m.body)['progress'] for m in destination.messages]
+    assert progress == [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
+    assert json.loads(response.body) == {'type': 'Done', 'job': 'job-1'}
+
+
+def wait_for(condition, timeout: float = 10):
+    deadline = monotonic() + timeout
+    while not condition() and monotonic() < deadline:
+        sleep(0.01)
+
+
+def wait_until_empty(listener, timeout: float = 10):
+    wait_for(lambda: not (len(listener.inbox) or len(listener.outbox)), timeout)
+
+
+def final_responses(listener) -> list[Message]:
+    return [m for m in listener.broker['JOB_STATUS'].messages if 'PlastronJobState' in m.headers]
+
+
+def frame_for(message: PlastronCommandMessage) -> Frame:
+    return Frame(cmd='MESSAGE', headers={**message.headers, 'destination': '/queue/jobs'}, body=message.body)
+
+
+def test_on_message_stores_and_processes(listener):
+    message = PlastronCommandMessage(job_id='job-1', command='jittery', message_id='msg-1')
+    listener.on_message(frame_for(message))
+
+    wait_for(lambda: final_responses(listener))
+    wait_until_empty(listener)
+    assert listener.broker.acked == ['msg-1']
+    assert len(final_responses(listener)) == 1
+
+
+def test_redelivered_message_is_not_run_again(listener):
+    message = PlastronCommandMessage(job_id='job-1', command='jittery', message_id='msg-1')
+    listener.inbox.add(message.id, message)
+    listener.on_message(frame_for(message))
+
+    assert listener.broker.acked == ['msg-1']
+    assert listener.broker['JOB_STATUS'].messages == []
+    assert listener.scheduler.metrics()['completed'] == 0
+
+
+def test_subscribe_with_prefetch(tmp_path):
+    context = StubContext(InMemoryBroker(tmp_path), config={'MESSAGE_BROKER': {'PREFETCH_SIZE': 3}})
+    listener = CommandListener(context)
+    try:
+        listener.on_connected(Frame(cmd='CONNECTED'))
+    finally:
+        listener.scheduler.shutdown()
+    assert listener.broker['JOBS'].subscription == {
+        'id': 'plastron',
+        'ack': 'client-individual',
+        'headers': {'activemq.prefetchSize': '3'},
+    }
+
+
+def test_ack_when_job_starts(tmp_path, monkeypatch):
+    release = threading.Event()
+
+    def blocking(_context, message: PlastronCommandMessage):
+        assert release.wait(timeout=5)
+        yield {'job': message.job_id}
+        return {'type': 'Done', 'job': message.job_id}
+
+    monkeypatch.setattr(listeners, 'get_command', lambda _name: blocking)
+    context = StubContext(InMemoryBroker(tmp_path), config={'SCHEDULER': {'MAX_WORKERS': 1}})
+    listener = CommandListener(context)
+    try:
+        for n in range(3):
+            listener.on_message(frame_for(
+                PlastronCommandMessage(job_id=f'job-{n}', command='blocking', message_id=f'msg-{n}')
+            ))
+        wait_for(lambda: listener.broker.acked)
+        # only the running job has been accepted
+        assert listener.broker.acked == ['msg-0']
+        assert [m.id for m in listener.inbox] == ['msg-0']
+
+        # queued jobs that were never acknowledged go back to the broker
+        assert not listener.drain(timeout=0.1)
+        assert listener.broker.nacked == ['msg-1', 'msg-2']
+    finally:
+        release.set()
+        listener.scheduler.shutdown()
+
+    assert listener.broker.acked == ['msg-0']
+    # the accepted job was interrupted, and stays in the inbox
+    assert [m.id for m in listener.inbox.pending()] == ['msg-0']
+
+
+def test_capped_command_does_not_fill_prefetch_window(tmp_path, monkeypatch):
+    release = threading.Event()
+
+    def capped(_context, message: PlastronCommandMessage):
+        assert release.wait(timeout=5)
+        yield {'job': message.job_id}
+        return {'type': 'Done', 'job': message.job_id}
+
+    commands = {'capped': capped, 'jittery': jittery}
+    monkeypatch.setattr(listeners, 'get_command', lambda name: commands[name])
+    context = StubContext(InMemoryBroker(tmp_path), config={
+        'MESSAGE_BROKER': {'PREFETCH_SIZE': 2, 'BACKLOG_SIZE': 2},
+        'SCHEDULER': {'MAX_WORKERS': 2},
+        'COMMANDS': {'CAPPED': {'MAX_CONCURRENT': 1}},
+    })
+    listener = CommandListener(context)
+    received = []
+    try:
+        # more capped jobs than the prefetch window; only one of them can run
+        messages = [
+            *(PlastronCommandMessage(job_id=f'capped-{n}', command='capped', message_id=f'msg-{n}') for n in range(4)),
+            PlastronCommandMessage(job_id='other', command='jittery', message_id='msg-other'),
+        ]
+        for message in messages:
+            # the broker only sends another message while the window has room
+            wait_for(lambda: len(received) - len(listener.broker.acked) < listener.prefetch_size)
+            assert len(received) - len(listener.broker.acked) < listener.prefetch_size
+            listener.on_message(frame_for(message))
+            received.append(message.id)
+
+        # the other job runs while the capped jobs wait their turn
+        wait_for(lambda: final_responses(listener))
+        assert [m.job_id for m in final_responses(listener)] == ['other']
+        assert listener.scheduler.metrics()['queue_depth'] == 3
+        # two of the waiting jobs were accepted before they started; the third
+        # stays with the broker, in the prefetch window
+        assert listener.backlog == {'msg-1', 'msg-2'}
+        assert 'msg-3' not in listener.broker.acked
+    finally:
+        release.set()
+        wait_for(lambda: len(final_responses(listener)) == 5)
+        listener.scheduler.shutdown()
+
+    assert sorted(listener.broker.acked) == sorted(received)
+    assert not listener.backlog
+
+
+def test_on_message_does_not_block_when_queue_is_full(tmp_path, monkeypatch):
+    release = threading.Event()
+
+    def blocking(_context, message: PlastronCommandMessage):
+        assert release.wait(timeout=5)
+        yield {'job': message.job_id}
+        return {'type': 'Done', 'job': message.job_id}
+
+    monkeypatch.setattr(listeners, 'get_command', lambda _name: blocking)
+    context = StubContext(InMemoryBroker(tmp_path), config={'SCHEDULER': {'MAX_WORKERS': 1, 'MAX_QUEUED': 1}})
+    listener = CommandListener(context)
+    try:
+        receiver = threading.Thread(target=lambda: [
+            listener.on_message(frame_for(
+                PlastronCommandMessage(job_id=f'job-{n}', command='blocking', message_id=f'msg-{n}')
+            ))
+            for n in range(4)
+        ])
+        receiver.start()
+        # the receiver thread is never held up waiting for room in the queue
+        receiver.join(timeout=5)
+        assert not receiver.is_alive()
+        # once the first job has started, the second one takes its place in the queue
+        wait_for(lambda: listener.scheduler.metrics()['running'] and len(listener.deferred) == 2)
+        assert [m.id for m, _, _ in listener.deferred] == ['msg-2', 'msg-3']
+        wait_for(lambda: listener.broker.acked)
+        assert listener.broker.acked == ['msg-0']
+
+        # deferred messages are queued, in order, as room becomes available
+        release.set()
+        wait_for(lambda: len(final_responses(listener)) == 4)
+    finally:
+        release.set()
+        listener.scheduler.shutdown()
+
+    assert [m.job_id for m in final_responses(listener)] == ['job-0', 'job-1', 'job-2', 'job-3']
+    assert listener.broker.acked == ['msg-0', 'msg-1', 'msg-2', 'msg-3']
+    assert not listener.deferred
+
+
+def test_replay_on_connect(tmp_path, monkeypatch):
+    monkeypatch.setattr(listeners, 'get_command', lambda _name: jittery)
+    context = StubContext(InMemoryBroker(tmp_path), config={'MESSAGE_BROKER': {'MAX_DELIVERY_ATTEMPTS': 2}})
+
+    # simulate a previous run that stopped with messages in the inbox
+    inbox = SQLiteMessageBox(tmp_path / 'messages.sqlite', 'inbox', PlastronCommandMessage)
+    for n in range(3):
+        inbox.add(f'msg-{n}', PlastronCommandMessage(job_id=f'job-{n}', command='jittery', message_id=f'msg-{n}'))
+    # job-0 has already been attempted twice
+    for _ in range(2):
+        inbox.claim('msg-0')
+        inbox.release('msg-0')
+    inbox.close()
+
+    listener = CommandListener(context)
+    try:
+        listener.on_connected(Frame(cmd='CONNECTED'))
+        deadline = monotonic() + 10
+        while len(listener.inbox) and monotonic() < deadline:
+            sleep(0.01)
+    finally:
+        listener.scheduler.shutdown()
+
+    final = {
+        m.job_id: m for m in listener.broker['JOB_STATUS'].messages
+        if 'PlastronJobState' in m.headers or 'PlastronJobError' in m.headers
+    }
+    assert set(final) == {'job-0', 'job-1', 'job-2'}
+    assert final['job-0'].headers['PlastronJobError'] == 'Gave up on job job-0 after 2 attempts'
+    assert final['job-1'].headers['PlastronJobState'] == 'Done'
+    # the rejected message is kept, but will not be replayed
+    assert listener.inbox.get('msg-0') is not None
+    assert list(listener.inbox.pending()) == []
+
+
+def test_drain_checkpoints_running_and_queued_jobs(tmp_path, monkeypatch):
+    started = threading.Event()
+
+    def slow(_context, message: PlastronCommandMessage):
+        for n in range(1000):
+            started.set()
+            sleep(0.01)
+            yield {'job': message.job_id, 'step': n}
+        return {'type': 'Done', 'job': message.job_id}
+
+    monkeypatch.setattr(listeners, 'get_command', lambda _name: slow)
+    monkeypatch.setattr(listeners, 'get_resume_args', lambda _name: {'resume': 'true'})
+    context = StubContext(InMemoryBroker(tmp_path), config={'SCHEDULER': {'MAX_WORKERS': 1}})
+    listener = CommandListener(context)
+
+    for n in range(2):
+        message = PlastronCommandMessage(job_id=f'job-{n}', command='slow', message_id=f'msg-{n}')
+        listener.inbox.add(message.id, message)
+        listener.process_message(message, AsynchronousResponseHandler(listener, message))
+    assert started.wait(timeout=5)
+
+    assert listener.drain(timeout=5)
+
+    # new messages are not accepted while draining
+    listener.on_message(frame_for(PlastronCommandMessage(job_id='job-2', command='slow', message_id='msg-2')))
+    assert listener.broker.acked == []
+
+    # no final responses were sent
+    assert not any('PlastronJobState' in m.headers for m in listener.broker['JOB_STATUS'].messages)
+
+    # both jobs are back in the inbox, in order, without counting the interrupted attempt
+    pending = list(listener.inbox.pending())
+    assert [m.id for m in pending] == ['msg-0', 'msg-1']
+    assert listener.inbox.attempts('msg-0') == 0
+    assert listener.inbox.attempts('msg-1') == 0
+
+    # the running job has a checkpoint, and will resume
+    assert pending[0].args['resume'] == 'true'
+    assert json.loads(pending[0].headers['PlastronJobCheckpoint'])['job'] == 'job-0'
+    assert 'PlastronJobCheckpoint' not in pending[1].headers
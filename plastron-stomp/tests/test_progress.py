@@ -0,0 +1,49 @@
+from plastron.stomp.progress import ProgressThrottle
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_first_status_is_always_sent():
+    throttle = ProgressThrottle(interval=1, step=1, clock=FakeClock())
+    assert throttle.offer({'progress': 0}) == {'progress': 0}
+
+
+def test_statuses_are_coalesced_by_time():
+    clock = FakeClock()
+    throttle = ProgressThrottle(interval=1, step=0, clock=clock)
+    sent = []
+    for n in range(100):
+        clock.now = n * 0.1
+        if (status := throttle.offer({'n': n})) is not None:
+            sent.append(status['n'])
+    assert sent == [0, 10, 20, 30, 40, 50, 60, 70, 80, 90]
+    assert throttle.flush() == {'n': 99}
+    assert throttle.flush() is None
+
+
+def test_statuses_are_coalesced_by_progress():
+    throttle = ProgressThrottle(interval=60, step=25, clock=FakeClock())
+    sent = [s['progress'] for n in range(101) if (s := throttle.offer({'progress': n})) is not None]
+    assert sent == [0, 25, 50, 75, 100]
+    # nothing was held back after the last status
+    assert throttle.flush() is None
+
+
+def test_zero_interval_sends_everything():
+    throttle = ProgressThrottle(interval=0, step=0, clock=FakeClock())
+    assert all(throttle.offer({'n': n}) is not None for n in range(10))
+
+
+def test_from_config():
+    throttle = ProgressThrottle.from_config({'PROGRESS_INTERVAL': '5', 'PROGRESS_STEP': 2})
+    assert throttle.interval == 5.0
+    assert throttle.step == 2.0
+    throttle = ProgressThrottle.from_config({})
+    assert throttle.interval == 1.0
+    assert throttle.step == 1.0
@@ -0,0 +1,192 @@
+import threading
+from time import monotonic, sleep
+
+import pytest
+
+from plastron.messaging.messages import PlastronCommandMessage
+from plastron.stomp.scheduler import CommandPolicy, JobScheduler, Priority, SchedulerShutdown
+
+
+def message(command: str, job_id: str, priority: str = None) -> PlastronCommandMessage:
+    msg = PlastronCommandMessage(command=command, job_id=job_id)
+    if priority is not None:
+        msg.priority = priority
+    return msg
+
+
+class Gate:
+    """Job function that blocks until released, and records the order jobs start in."""
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = []
+        self.lock = threading.Lock()
+
+    def __call__(self, job_id):
+        with self.lock:
+            self.started.append(job_id)
+        assert self.release.wait(timeout=5)
+        return job_id
+
+
+def wait_until_started(gate: Gate, timeout: float = 5):
+    deadline = monotonic() + timeout
+    while not gate.started and monotonic() < deadline:
+        sleep(0.01)
+    assert gate.started
+
+
+@pytest.fixture
+def scheduler():
+    schedulers = []
+
+    def _scheduler(**kwargs):
+        s = JobScheduler(**kwargs)
+        schedulers.append(s)
+        return s
+
+    yield _scheduler
+    for s in schedulers:
+        s.shutdown(cancel_queued=True)
+
+
+def test_priority_parse():
+    assert Priority.parse('high') == Priority.HIGH
+    assert Priority.parse(' LOW ') == Priority.LOW
+    assert Priority.parse(None) == Priority.NORMAL
+    assert Priority.parse('urgent', default=Priority.LOW) == Priority.LOW
+
+
+def test_from_config():
+    scheduler = JobScheduler.from_config({
+        'SCHEDULER': {'MAX_WORKERS': 2, 'MAX_QUEUED': 5},
+        'COMMANDS': {
+            'EXPORT': {'MAX_CONCURRENT': 1, 'PRIORITY': 'low', 'SSH_PRIVATE_KEY': 'id_rsa'},
+            'UPDATE': {'PRIORITY': 'high'},
+        },
+    })
+    try:
+        assert scheduler.max_workers == 2
+        assert scheduler.max_queued == 5
+        assert scheduler.policy('export') == CommandPolicy(max_concurrent=1, priority=Priority.LOW)
+        assert scheduler.policy('update').priority == Priority.HIGH
+        assert scheduler.policy('echo') == CommandPolicy()
+        assert scheduler.priority(message('update', 'a')) == Priority.HIGH
+        assert scheduler.priority(message('update', 'a', priority='low')) == Priority.LOW
+    finally:
+        scheduler.shutdown()
+
+
+def test_submit_returns_result(scheduler):
+    s = scheduler(max_workers=2)
+    future = s.submit(message('echo', 'a'), lambda x: x * 2, 21)
+    assert future.result(timeout=5) == 42
+
+
+def test_submit_propagates_exception(scheduler):
+    def fail():
+        raise RuntimeError('boom')
+
+    future = scheduler(max_workers=1).submit(message('echo', 'a'), fail)
+    with pytest.raises(RuntimeError):
+        future.result(timeout=5)
+
+
+def test_command_concurrency_limit(scheduler):
+    gate = Gate()
+    s = scheduler(max_workers=4, policies={'export': CommandPolicy(max_concurrent=2)})
+    exports = [s.submit(message('export', f'export-{n}'), gate, f'export-{n}') for n in range(4)]
+    update = s.submit(message('update', 'update-1'), lambda: 'updated')
+
+    # the update is not blocked behind the exports
+    assert update.result(timeout=5) == 'updated'
+    metrics = s.metrics()
+    assert metrics['running'] == {'export': 2}
+    assert metrics['queue_depth'] == 2
+    assert sorted(gate.started) == ['export-0', 'export-1']
+
+    gate.release.set()
+    assert [f.result(timeout=5) for f in exports] == [f'export-{n}' for n in range(4)]
+
+
+def test_priority_order(scheduler):
+    gate = Gate()
+    s = scheduler(max_workers=1)
+    blocker = s.submit(message('echo', 'blocker'), gate, 'blocker')
+    wait_until_started(gate)
+    futures = [
+        s.submit(message('echo', 'low', priority='low'), gate, 'low'),
+        s.submit(message('echo', 'normal'), gate, 'normal'),
+        s.submit(message('echo', 'high', priority='high'), gate, 'high'),
+    ]
+    gate.release.set()
+    blocker.result(timeout=5)
+    for future in futures:
+        future.result(timeout=5)
+    assert gate.started == ['blocker', 'high', 'normal', 'low']
+
+
+def test_bounded_queue(scheduler):
+    gate = Gate()
+    s = scheduler(max_workers=1, max_queued=2)
+    futures = [s.submit(message('echo', f'job-{n}'), gate, f'job-{n}') for n in range(3)]
+    # one job running, two waiting: the queue is full
+    wait_until_started(gate)
+    assert not s.wait_for_capacity(timeout=0.1)
+
+    submitted = threading.Event()
+
+    def submit_another():
+        futures.append(s.submit(message('echo', 'job-3'), gate, 'job-3'))
+        submitted.set()
+
+    thread = threading.Thread(target=submit_another)
+    thread.start()
+    assert not submitted.wait(timeout=0.1)
+
+    gate.release.set()
+    thread.join(timeout=5)
+    assert submitted.is_set()
+    assert [f.result(timeout=5) for f in futures] == ['job-0', 'job-1', 'job-2', 'job-3']
+    metrics = s.metrics()
+    assert metrics['completed'] == 4
+    assert metrics['max_queue_depth'] == 2
+    assert metrics['max_wait'] > 0
+
+
+def test_on_capacity(scheduler):
+    gate = Gate()
+    s = scheduler(max_workers=1, max_queued=1)
+    calls = []
+    s.on_capacity = lambda: calls.append(s.wait_for_capacity(timeout=0))
+    futures = [s.submit(message('echo', f'job-{n}'), gate, f'job-{n}') for n in range(2)]
+    wait_until_started(gate)
+    assert not s.wait_for_capacity(timeout=0)
+    gate.release.set()
+    for future in futures:
+        future.result(timeout=5)
+    # called each time a job left the queue, when there was room for another
+    assert calls == [True, True]
+
+
+def test_is_at_limit(scheduler):
+    gate = Gate()
+    s = scheduler(max_workers=2, policies={'export': CommandPolicy(max_concurrent=1)})
+    assert not s.is_at_limit('export')
+    futures = [s.submit(message('export', 'job-0'), gate, 'job-0')]
+    wait_until_started(gate)
+    # one export is running, so the next one must wait for it
+    assert s.is_at_limit('export')
+    # commands without a limit never wait for one
+    assert not s.is_at_limit('echo')
+    gate.release.set()
+    for future in futures:
+        future.result(timeout=5)
+
+
+def test_shutdown_drains_queue(scheduler):
+    s = scheduler(max_workers=1)
+    futures = [s.submit(message('echo', f'job-{n}'), lambda n=n: n) for n in range(5)]
+    s.shutdown(wait=True)
+    assert [f.result(timeout=0) for f in futures] == list(range(5))
+    with pytest.raises(SchedulerShutdown):
+        s.submit(message('echo', 'late'), lambda: None)
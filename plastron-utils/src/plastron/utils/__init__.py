@@ -4,7 +4,9 @@ import platform
 import re
 from argparse import ArgumentTypeError
 from datetime import datetime
-from typing import Mapping, Optional
+from threading import Lock
+from time import monotonic, sleep
+from typing import Callable, Mapping, Optional
 
 from rdflib import URIRef
 from rdflib.term import Node
@@ -174,3 +176,47 @@ def parse_predicate_list(string: str, delimiter: str = ',') -> Optional[list[Nod
         return None
     manager = namespaces.get_manager()
     return [from_n3(p, nsm=manager) for p in string.split(delimiter)]
+
+
+class RateLimiter:
+    """Token bucket that limits an operation to `rate` times per second, on
+    average, while allowing bursts of up to `burst` operations. A `rate` of
+    `None` or 0 means no limit.
+
+    ```pycon
+    >>> limiter = RateLimiter(rate=50)
+    >>> for message in messages:
+    ...     limiter.wait()
+    ...     destination.send(message)
+    ```
+    """
+    def __init__(
+            self,
+            rate: Optional[float] = None,
+            burst: Optional[float] = None,
+            clock: Callable[[], float] = monotonic,
+            sleep: Callable[[float], None] = sleep,
+    ):
+        self.rate = rate or None
+        self.burst = burst if burst is not None else max(1.0, self.rate or 0)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.burst
+        self.updated = clock()
+        self.waited = 0.0
+        self._lock = Lock()
+
+    def wait(self, n: float = 1):
+        """Blocks until `n` operations are allowed, then uses them up."""
+        if self.rate is None:
+            return
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= n
+            if self.tokens < 0:
+                # sleep until the deficit has been refilled
+                delay = -self.tokens / self.rate
+                self.waited += delay
+                self.sleep(delay)
@@ -4,7 +4,7 @@ from argparse import ArgumentParser, ArgumentTypeError
 
 from plastron.namespaces import dcterms, rdf, pcdm
 from plastron.cli import parse_data_property, parse_object_property
-from plastron.utils import uri_or_curie
+from plastron.utils import RateLimiter, uri_or_curie
 from rdflib.term import URIRef, Literal
 
 INVALID_URI_OR_CURIE_ARGS = [
@@ -85,3 +85,32 @@ def test_parse_data_property(p, o, expected):
 )
 def test_parse_object_property(p, o, expected):
     assert parse_object_property(p, o) == expected
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+def test_rate_limiter():
+    clock = FakeClock()
+    limiter = RateLimiter(rate=10, burst=5, clock=clock, sleep=clock.sleep)
+    for _ in range(25):
+        limiter.wait()
+    # the first 5 are the burst; the other 20 are paced at 10 per second
+    assert clock.now == pytest.approx(2.0)
+    assert limiter.waited == pytest.approx(2.0)
+
+
+def test_rate_limiter_unlimited():
+    clock = FakeClock()
+    limiter = RateLimiter(rate=None, clock=clock, sleep=clock.sleep)
+    for _ in range(1000):
+        limiter.wait()
+    assert clock.now == 0